@@ -1,21 +1,100 @@
 import asyncio
+import contextlib
 import json
 import os
+from typing import Any
 
 from mcp import Resource
 from mcp.types import Prompt
 
-from agent.mcp_client import MCPClient
+from agent.catalog import CatalogManager
+from agent.completion_cache import CompletionCache
+from agent.mcp_manager import MCPConnectionManager, MCPServerPool, parse_mcp_servers
 from agent.dial_client import DialClient
+from agent.history import ConversationHistory
+from agent.resource_cache import ResourceCache
+from agent.tool_cache import ToolResultCache
+from agent.tool_exposure import PROMPT_TRIGGERS, ToolExposure
+from agent.tracing import Tracer
+from agent.models.completion import StopReason
 from agent.models.message import Message, Role
 from agent.prompts import SYSTEM_PROMPT
 
-DIAL_ENDPOINT = "https://ai-proxy.lab.epam.com"
+DIAL_ENDPOINT = os.getenv('DIAL_ENDPOINT', 'https://ai-proxy.lab.epam.com')
 API_KEY = os.getenv('DIAL_API_KEY')
+HISTORY_TOKEN_BUDGET = int(os.getenv('HISTORY_TOKEN_BUDGET', '12000'))
+SUMMARIZE_HISTORY = os.getenv('SUMMARIZE_HISTORY', 'false').lower() == 'true'
+MEMOIZE_TOOLS = os.getenv('MEMOIZE_TOOLS', 'false').lower() == 'true'
+MINIFY_TOOL_SCHEMAS = os.getenv('MINIFY_TOOL_SCHEMAS', 'true').lower() == 'true'
+# Replays temperature-0 completions of requests seen before (scripted QA runs, canned flows)
+COMPLETION_CACHE = os.getenv('COMPLETION_CACHE', 'false').lower() == 'true'
+# Read-only tools unless the turn asks for a change, MCP prompts only in turns they help with
+TOOL_SUBSETTING = os.getenv('TOOL_SUBSETTING', 'false').lower() == 'true'
+# `name=url|url,name=url`, replicas of one server are separated by `|`
+MCP_SERVERS = parse_mcp_servers(os.getenv('MCP_SERVERS', 'users=http://localhost:8005/mcp'))
+# Per-turn JSON traces are appended to this file, a p50/p95 summary is printed on exit
+AGENT_TRACE_FILE = os.getenv('AGENT_TRACE_FILE')
+UPSTREAM_LATENCY_URI = 'users-management://upstream-latency'
 
 # https://remote.mcpservers.org/fetch/mcp
 # Pay attention that `fetch` doesn't have resources and prompts
 
+def create_pools(sessions_per_replica: int = 1) -> list[MCPServerPool]:
+    """One pool per server in MCP_SERVERS, with `sessions_per_replica` sessions to each replica"""
+    return [
+        MCPServerPool.from_urls(
+            name,
+            urls * sessions_per_replica,
+            tool_cache=ToolResultCache() if MEMOIZE_TOOLS else None,
+            resource_cache=ResourceCache(),
+        )
+        for name, urls in MCP_SERVERS.items()
+    ]
+
+
+async def load_catalogs(mcp_manager: MCPConnectionManager) -> dict[str, CatalogManager]:
+    """Catalog of every connected server, loaded concurrently"""
+    catalog_managers = {name: CatalogManager(pool) for name, pool in mcp_manager.pools.items() if pool.connected}
+    await asyncio.gather(*(manager.load() for manager in catalog_managers.values()))
+    return catalog_managers
+
+
+def route_catalog_tools(
+        mcp_manager: MCPConnectionManager, catalog_managers: dict[str, CatalogManager]
+) -> list[dict[str, Any]]:
+    return mcp_manager.route_tools({name: manager.catalog.tools for name, manager in catalog_managers.items()})
+
+
+def _prompt_messages(catalog_managers: dict[str, CatalogManager]) -> dict[str, Message]:
+    return {
+        prompt.name: Message(
+            role=Role.USER,
+            content=f'## Prompt provided by MCP server: {prompt.description}\n{prompt.content}')
+        for manager in catalog_managers.values()
+        for prompt in manager.catalog.prompts
+    }
+
+
+def pinned_messages(catalog_managers: dict[str, CatalogManager]) -> list[Message]:
+    """System prompt and the prompts provided by MCP servers, kept at the start of every conversation"""
+    prompts = _prompt_messages(catalog_managers)
+    return [Message(role=Role.SYSTEM, content=SYSTEM_PROMPT)] + [
+        message for name, message in prompts.items() if not (TOOL_SUBSETTING and name in PROMPT_TRIGGERS)
+    ]
+
+
+def update_tool_exposure(tool_exposure: ToolExposure, catalog_managers: dict[str, CatalogManager]):
+    """MCP prompts that are sent on demand rather than pinned"""
+    prompts = _prompt_messages(catalog_managers)
+    tool_exposure.prompts = {name: prompts[name] for name in PROMPT_TRIGGERS if TOOL_SUBSETTING and name in prompts}
+
+
+def create_tool_exposure(catalog_managers: dict[str, CatalogManager]) -> ToolExposure:
+    tool_exposure = ToolExposure(minify=MINIFY_TOOL_SCHEMAS, subset=TOOL_SUBSETTING)
+    update_tool_exposure(tool_exposure, catalog_managers)
+    return tool_exposure
+
+
 async def main():
     #TODO:
     # 1. Create MCP client and open connection to the MCP server (use `async with {YOUR_MCP_CLIENT} as mcp_client`),
@@ -27,42 +106,82 @@ async def main():
     # 6. Add to messages Prompts from MCP server as User messages
     # 7. Create console chat (infinite loop + ability to exit from chat + preserve message history after the call to dial client)
     # raise NotImplementedError()
-    async with MCPClient('http://localhost:8005/mcp') as mcp_client:
-        resources = await mcp_client.get_resources()
-        print(f'mcp resources: {resources}\n')
-
-        tools = await mcp_client.get_tools()
+    pools = create_pools()
+    async with MCPConnectionManager(pools) as mcp_manager:
+        catalog_managers = await load_catalogs(mcp_manager)
+        tools = route_catalog_tools(mcp_manager, catalog_managers)
+        for manager in catalog_managers.values():
+            print(f'mcp resources: {manager.catalog.resources}\n')
         print(f'mcp tools: {tools}\n')
 
-        dial_client = DialClient(api_key=API_KEY, endpoint=DIAL_ENDPOINT, tools=tools, mcp_client=mcp_client)
-
-        messages = [Message(role=Role.SYSTEM, content=SYSTEM_PROMPT)]
-
-        prompt_results = await mcp_client.get_prompts()
-        if prompt_results:
-            for prompt in prompt_results.prompts:
-                content = await mcp_client.get_prompt(prompt.name)
-                messages.append(
-                    Message(
-                        role=Role.USER,
-                        content=f'## Prompt provided by MCP server: {prompt.description}\n{content}')
-                )
+        dial_client = DialClient(
+            api_key=API_KEY,
+            endpoint=DIAL_ENDPOINT,
+            tools=tools,
+            mcp_client=mcp_manager,
+            tool_exposure=create_tool_exposure(catalog_managers),
+            completion_cache=CompletionCache() if COMPLETION_CACHE else None,
+        )
+
+        def on_catalog_update(_):
+            dial_client.tools = route_catalog_tools(mcp_manager, catalog_managers)
+            update_tool_exposure(dial_client.tool_exposure, catalog_managers)
+
+        for catalog_manager in catalog_managers.values():
+            catalog_manager.on_update = on_catalog_update
+
+        history = ConversationHistory(
+            token_budget=HISTORY_TOKEN_BUDGET,
+            summarizer=dial_client.summarize if SUMMARIZE_HISTORY else None,
+        )
+        for message in pinned_messages(catalog_managers):
+            history.pin(message)
+
+        tracer = None
+        if AGENT_TRACE_FILE:
+            # Upstream (user service) timings come from the server that exposes them
+            upstream_pool = next(
+                (
+                    manager.mcp_client for manager in catalog_managers.values()
+                    if any(str(resource.uri) == UPSTREAM_LATENCY_URI for resource in manager.catalog.resources)
+                ),
+                None,
+            )
+
+            async def upstream_probe():
+                return json.loads(await upstream_pool.get_resource(UPSTREAM_LATENCY_URI))
+
+            tracer = Tracer(AGENT_TRACE_FILE, upstream_probe=upstream_probe if upstream_pool else None)
 
         print('Ask the question')
         while True:
             user_question = input('> ').strip()
 
             if user_question == 'exit':
+                print(f'Tokens sent per turn (estimated):\n{history.report()}')
+                if tracer:
+                    print(f'Latency per phase:\n{tracer.summary()}')
+                for pool in pools:
+                    if pool.tool_cache:
+                        print(f'{pool.name}: {pool.tool_cache.report()}')
+                if dial_client.completion_cache:
+                    print(dial_client.completion_cache.report())
                 print('Exiting')
                 break
 
-            messages.append(Message(role=Role.USER, content=user_question))
-            ai_response = await dial_client.get_completion(messages)
-
-            print('api response:', ai_response)
+            history.append(Message(role=Role.USER, content=user_question))
+            messages = history.for_request()
+            sent = len(messages)
+            async with tracer.turn() if tracer else contextlib.nullcontext():
+                completion = await dial_client.get_completion(messages)
 
-            messages.append(ai_response)
+            print('api response:', completion.message)
+            if completion.stop_reason != StopReason.COMPLETED:
+                print(f'stopped early: {completion.stop_reason} after {completion.tool_rounds} tool rounds')
 
+            # Tool calls and results of this turn were appended by the agent loop
+            history.extend(messages[sent:])
+            history.append(completion.message)
 
 
 if __name__ == "__main__":
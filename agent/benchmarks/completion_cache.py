@@ -0,0 +1,73 @@
+"""
+The end-to-end scenarios replayed with the completion cache (`COMPLETION_CACHE`): the first pass fills it from the
+fake LLM, later passes replay LLM requests from disk. Tools still run against the MCP server, so a request after a
+tool result that changed (`bulk_create` adds users every pass, which also changes the `search` result) is a miss.
+
+Run from the repository root:
+    python -m agent.benchmarks.completion_cache --passes 3 --ttft 0.3
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import tempfile
+
+from agent.benchmarks.end_to_end import SCENARIOS, scripted_responder
+from agent.benchmarks.fake_llm import FakeChatCompletions
+from agent.benchmarks.local_stack import import_mcp_server, start_user_service
+from agent.completion_cache import CompletionCache
+from agent.dial_client import DialClient
+from agent.mcp_client import MCPClient
+from agent.models.message import Message, Role
+from agent.prompts import SYSTEM_PROMPT
+from agent.tracing import Tracer
+
+
+async def main(args):
+    _, user_runner, user_service_url = await start_user_service(args.users)
+    fake_llm = FakeChatCompletions(scripted_responder, ttft=args.ttft, chunk_interval=args.chunk_interval)
+    llm_runner, llm_url = await fake_llm.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            mcp_client = await MCPClient(server=import_mcp_server(user_service_url)).__aenter__()
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                cache = CompletionCache(directory)
+                dial_client = DialClient(
+                    api_key="benchmark", endpoint=llm_url, tools=await mcp_client.get_tools(), mcp_client=mcp_client,
+                    completion_cache=cache,
+                )
+                print(f"{'pass':<6}{'scenario':<14}{'turn p50 ms':>13}{'llm p50 ms':>12}{'llm requests':>14}")
+                answers = {}
+                for index in range(args.passes):
+                    for name in args.scenarios:
+                        served = fake_llm.requests_served
+                        tracer = Tracer(os.devnull)
+                        with contextlib.redirect_stdout(io.StringIO()):
+                            async with tracer.turn():
+                                result = await dial_client.get_completion([
+                                    Message(role=Role.SYSTEM, content=SYSTEM_PROMPT),
+                                    Message(role=Role.USER, content=SCENARIOS[name].prompt),
+                                ])
+                        if answers.setdefault(name, result.message.content) != result.message.content:
+                            print(f"{name}: replayed answer differs")
+                        stats = tracer.stats()
+                        print(f"{index + 1:<6}{name:<14}{stats['turn']['p50_ms']:>13.1f}{stats['llm']['p50_ms']:>12.1f}"
+                              f"{fake_llm.requests_served - served:>14}")
+                print(cache.report())
+        finally:
+            await mcp_client.__aexit__(None, None, None)
+    finally:
+        await llm_runner.cleanup()
+        await user_runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--passes", type=int, default=3)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--ttft", type=float, default=0.3, help="Fake LLM time to first token, s")
+    parser.add_argument("--chunk-interval", type=float, default=0.005, help="Fake LLM delay between chunks, s")
+    asyncio.run(main(parser.parse_args()))
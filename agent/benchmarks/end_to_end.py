@@ -0,0 +1,218 @@
+"""
+Hermetic end-to-end benchmark: DialClient -> MCPClient -> mcp_server/server.py -> user service, with a scripted
+fake LLM (`fake_llm.py`) and the stand-in user service, so neither DIAL nor the mockuserservice image is needed.
+
+Scenarios: `search` (one search_user call), `bulk_create` (one bulk_add_users call) and `multi_tool` (four
+concurrent calls, then get_users_by_ids). Reports throughput, turn latency percentiles and per-phase p50/p95.
+
+Run from the repository root:
+    python -m agent.benchmarks.end_to_end --turns 50 --concurrency 4 --save-baseline e2e-baseline.json
+    python -m agent.benchmarks.end_to_end --turns 50 --concurrency 4 --baseline e2e-baseline.json
+The second form exits with code 1 when a metric is worse than the baseline by more than --tolerance.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from agent.benchmarks.fake_llm import FakeChatCompletions
+from agent.benchmarks.local_stack import (
+    import_mcp_server, start_http_server, start_user_service, stdio_server_params,
+)
+from agent.dial_client import DialClient
+from agent.mcp_client import MCPClient
+from agent.models.message import Message, Role
+from agent.prompts import SYSTEM_PROMPT
+from agent.tracing import Tracer, percentile
+
+
+class Scenario(NamedTuple):
+    prompt: str
+    # Tool calls the fake LLM makes, one list per tool round, before answering
+    rounds: list[list[dict[str, Any]]]
+    answer: str
+
+
+def tool_call(tool_name: str, **arguments: Any) -> dict[str, Any]:
+    return {"name": tool_name, "arguments": arguments}
+
+
+def new_users(count: int) -> list[dict[str, Any]]:
+    from benchmarks.user_service_stub import generate_users
+
+    return [{key: value for key, value in user.items() if key != "id"} for user in generate_users(count, seed=7)]
+
+
+SCENARIOS = {
+    "search": Scenario(
+        prompt="Find all users named John",
+        rounds=[[tool_call("search_user", name="john")]],
+        answer="I found several users named John. " * 8,
+    ),
+    "bulk_create": Scenario(
+        prompt="Add these 10 new users",
+        rounds=[[tool_call("bulk_add_users", user_create_models=new_users(10))]],
+        answer="All 10 users were added successfully. " * 4,
+    ),
+    "multi_tool": Scenario(
+        prompt="Compare users 1, 2 and 3 with everyone named Smith, then show users 4 to 13",
+        rounds=[
+            [
+                tool_call("get_user_by_id", id=1),
+                tool_call("get_user_by_id", id=2),
+                tool_call("get_user_by_id", id=3),
+                tool_call("search_user", surname="smith"),
+            ],
+            [tool_call("get_users_by_ids", ids=list(range(4, 14)))],
+        ],
+        answer="Here is the comparison you asked for. " * 12,
+    ),
+}
+
+
+def scripted_responder(messages: list[dict[str, Any]]) -> dict[str, Any]:
+    """Picks the scenario by the last user prompt and the round by the tool calls made since then"""
+    last_user = max(i for i, message in enumerate(messages) if message["role"] == "user")
+    scenario = next(s for s in SCENARIOS.values() if s.prompt == messages[last_user]["content"])
+    done_rounds = sum(1 for message in messages[last_user:] if message.get("tool_calls"))
+    if done_rounds < len(scenario.rounds):
+        return {"content": "", "tool_calls": scenario.rounds[done_rounds]}
+    return {"content": scenario.answer, "tool_calls": []}
+
+
+async def run_scenario(dial_client: DialClient, scenario: Scenario, turns: int, concurrency: int) -> dict[str, Any]:
+    tracer = Tracer(os.devnull)
+    samples = []
+    queue = iter(range(turns))
+
+    async def worker():
+        for _ in queue:
+            messages = [
+                Message(role=Role.SYSTEM, content=SYSTEM_PROMPT),
+                Message(role=Role.USER, content=scenario.prompt),
+            ]
+            started = time.perf_counter()
+            async with tracer.turn():
+                await dial_client.get_completion(messages)
+            samples.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    # DialClient prints streamed tokens, keep them out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "turns": turns,
+        "throughput_tps": round(turns / elapsed, 2),
+        "p50_ms": round(percentile(samples, 0.5) * 1000, 3),
+        "p95_ms": round(percentile(samples, 0.95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+        "phases": tracer.stats(),
+    }
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], tolerance: float) -> list[str]:
+    """Metrics worse than the baseline by more than `tolerance` (relative)"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms"):
+            if result[metric] > base[metric] * (1 + tolerance):
+                regressions.append(f"{name} {metric}: {base[metric]:.1f} -> {result[metric]:.1f}")
+        if result["throughput_tps"] < base["throughput_tps"] * (1 - tolerance):
+            regressions.append(
+                f"{name} throughput_tps: {base['throughput_tps']:.2f} -> {result['throughput_tps']:.2f}"
+            )
+    return regressions
+
+
+def create_client(transport: str, user_service_url: str, http_url: str) -> MCPClient:
+    if transport == "memory":
+        return MCPClient(server=import_mcp_server(user_service_url))
+    if transport == "stdio":
+        return MCPClient(stdio_params=stdio_server_params(user_service_url))
+    return MCPClient(http_url)
+
+
+async def main(args) -> int:
+    config = {key: value for key, value in vars(args).items() if key not in ("save_baseline", "baseline", "tolerance")}
+    _, user_runner, user_service_url = await start_user_service(args.users, args.user_latency)
+    fake_llm = FakeChatCompletions(
+        scripted_responder, ttft=args.ttft, chunk_interval=args.chunk_interval, chunk_chars=args.chunk_chars
+    )
+    llm_runner, llm_url = await fake_llm.start()
+    http_process, http_url = await start_http_server(user_service_url) if args.transport == "http" else (None, None)
+
+    results = {}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            mcp_client = await create_client(args.transport, user_service_url, http_url).__aenter__()
+        try:
+            dial_client = DialClient(
+                api_key="benchmark", endpoint=llm_url, tools=await mcp_client.get_tools(), mcp_client=mcp_client,
+                eager_tools=not args.no_eager_tools,
+            )
+            for name in args.scenarios:
+                results[name] = await run_scenario(dial_client, SCENARIOS[name], args.turns, args.concurrency)
+        finally:
+            await mcp_client.__aexit__(None, None, None)
+    finally:
+        if http_process:
+            http_process.terminate()
+        await llm_runner.cleanup()
+        await user_runner.cleanup()
+
+    print(f"transport={args.transport} turns={args.turns} concurrency={args.concurrency} ttft={args.ttft}s "
+          f"eager tools={not args.no_eager_tools}")
+    print(f"{'scenario':<14}{'turns/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+          f"{'llm p50':>10}{'tool p50':>10}")
+    for name, result in results.items():
+        phases = result["phases"]
+        print(
+            f"{name:<14}{result['throughput_tps']:>10.2f}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+            f"{result['p99_ms']:>10.1f}{phases.get('llm', {}).get('p50_ms', 0):>10.1f}"
+            f"{phases.get('tool', {}).get('p50_ms', 0):>10.1f}"
+        )
+
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps({"config": config, "results": results}, indent=2))
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        if baseline["config"] != config:
+            print(f"Warning: baseline was recorded with a different configuration: {baseline['config']}")
+        regressions = compare(results, baseline["results"], args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--transport", choices=["memory", "stdio", "http"], default="http")
+    parser.add_argument("--turns", type=int, default=50, help="Turns per scenario")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--users", type=int, default=1000, help="Synthetic users in the stand-in user service")
+    parser.add_argument("--user-latency", type=float, default=0.005, help="User service latency per request, s")
+    parser.add_argument("--ttft", type=float, default=0.2, help="Fake LLM time to first token, s")
+    parser.add_argument("--chunk-interval", type=float, default=0.005, help="Fake LLM delay between chunks, s")
+    parser.add_argument("--chunk-chars", type=int, default=16)
+    parser.add_argument("--no-eager-tools", action="store_true", help="Start tools only after the stream ends")
+    parser.add_argument("--save-baseline", help="Write results to this JSON file")
+    parser.add_argument("--baseline", help="Compare results with this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown vs the baseline")
+    sys.exit(asyncio.run(main(parser.parse_args())))
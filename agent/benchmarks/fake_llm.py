@@ -0,0 +1,138 @@
+"""
+Local stand-in for an OpenAI/Azure-compatible streaming chat completions endpoint.
+Replies come from a `responder` callback and are streamed as content and tool-call deltas with configurable latency.
+
+Run on its own (answers every request with a short text) from the repository root:
+    python -m agent.benchmarks.fake_llm --port 8090 --ttft 0.3
+"""
+import argparse
+import asyncio
+import itertools
+import json
+from typing import Any, Callable
+
+from aiohttp import web
+
+# responder(messages) -> {"content": str, "tool_calls": [{"name": str, "arguments": dict}]}
+Responder = Callable[[list[dict[str, Any]]], dict[str, Any]]
+
+
+def echo_responder(messages: list[dict[str, Any]]) -> dict[str, Any]:
+    return {"content": f"You said: {messages[-1].get('content')}", "tool_calls": []}
+
+
+def _split(text: str, size: int) -> list[str]:
+    return [text[i:i + size] for i in range(0, len(text), size)] or [""]
+
+
+class FakeChatCompletions:
+    """
+    Streams the responder's reply: waits `ttft` seconds (plus `prefill_per_1k_tokens` per 1000 prompt tokens), then
+    sends chunks of `chunk_chars` characters every `chunk_interval` seconds, finishing with a usage chunk.
+    Prompt tokens (messages and tool schemas) are estimated at ~4 characters per token.
+    """
+
+    def __init__(
+            self,
+            responder: Responder = echo_responder,
+            ttft: float = 0.0,
+            chunk_interval: float = 0.0,
+            chunk_chars: int = 16,
+            prefill_per_1k_tokens: float = 0.0,
+    ) -> None:
+        self.responder = responder
+        self.ttft = ttft
+        self.chunk_interval = chunk_interval
+        self.chunk_chars = chunk_chars
+        self.prefill_per_1k_tokens = prefill_per_1k_tokens
+        self.requests_served = 0
+        self._ids = itertools.count(1)
+
+    def _deltas(self, reply: dict[str, Any]) -> list[dict[str, Any]]:
+        deltas = []
+        if reply.get("content"):
+            deltas.extend({"content": piece} for piece in _split(reply["content"], self.chunk_chars))
+        for index, call in enumerate(reply.get("tool_calls", [])):
+            deltas.append({"tool_calls": [{
+                "index": index,
+                "id": f"call_{next(self._ids)}",
+                "type": "function",
+                "function": {"name": call["name"], "arguments": ""},
+            }]})
+            deltas.extend(
+                {"tool_calls": [{"index": index, "function": {"arguments": piece}}]}
+                for piece in _split(json.dumps(call["arguments"]), self.chunk_chars)
+            )
+        return deltas
+
+    async def handle_completions(self, request: web.Request) -> web.StreamResponse:
+        self.requests_served += 1
+        body = await request.json()
+        reply = self.responder(body["messages"])
+        model = body.get("model") or request.match_info.get("deployment", "gpt-4o")
+
+        def chunk(choices: list[dict[str, Any]], **extra: Any) -> bytes:
+            payload = {
+                "id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": 0, "model": model,
+                "choices": choices, **extra,
+            }
+            return f"data: {json.dumps(payload)}\n\n".encode()
+
+        prompt_tokens = (len(json.dumps(body["messages"])) + len(json.dumps(body.get("tools") or []))) // 4
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        ttft = self.ttft + self.prefill_per_1k_tokens * prompt_tokens / 1000
+        if ttft:
+            await asyncio.sleep(ttft)
+
+        await response.write(chunk([{"index": 0, "delta": {"role": "assistant"}, "finish_reason": None}]))
+        for i, delta in enumerate(self._deltas(reply)):
+            if i and self.chunk_interval:
+                await asyncio.sleep(self.chunk_interval)
+            await response.write(chunk([{"index": 0, "delta": delta, "finish_reason": None}]))
+
+        finish_reason = "tool_calls" if reply.get("tool_calls") else "stop"
+        await response.write(chunk([{"index": 0, "delta": {}, "finish_reason": finish_reason}]))
+        if (body.get("stream_options") or {}).get("include_usage"):
+            completion_tokens = len(json.dumps(reply)) // 4
+            await response.write(chunk([], usage={
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            }))
+        await response.write(b"data: [DONE]\n\n")
+        await response.write_eof()
+        return response
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes(
+            [
+                # Azure deployments (AsyncAzureOpenAI) and plain OpenAI paths
+                web.post("/openai/deployments/{deployment}/chat/completions", self.handle_completions),
+                web.post("/v1/chat/completions", self.handle_completions),
+                web.post("/chat/completions", self.handle_completions),
+            ]
+        )
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> tuple[web.AppRunner, str]:
+        """Start serving in the current event loop, returns runner (for cleanup) and base url"""
+        runner = web.AppRunner(self.create_app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        return runner, f"http://{host}:{bound_port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for a streaming chat completions endpoint")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--ttft", type=float, default=0.3, help="Seconds before the first chunk")
+    parser.add_argument("--chunk-interval", type=float, default=0.01, help="Seconds between chunks")
+    parser.add_argument("--prefill", type=float, default=0.0, help="Extra s to first token per 1000 prompt tokens")
+    args = parser.parse_args()
+
+    fake = FakeChatCompletions(ttft=args.ttft, chunk_interval=args.chunk_interval, prefill_per_1k_tokens=args.prefill)
+    web.run_app(fake.create_app(), host="0.0.0.0", port=args.port, access_log=None)
@@ -0,0 +1,86 @@
+"""
+Helpers that bring up the local stack for agent benchmarks: stand-in user service and the MCP server,
+either imported into this process or started as a subprocess (streamable HTTP or stdio).
+"""
+import asyncio
+import logging
+import os
+import socket
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any
+
+from mcp.client.stdio import StdioServerParameters
+
+MCP_SERVER_DIR = Path(__file__).resolve().parents[2] / "mcp_server"
+
+# mcp_server modules use flat imports (`from user_client import ...`), they need their folder on sys.path
+if str(MCP_SERVER_DIR) not in sys.path:
+    sys.path.append(str(MCP_SERVER_DIR))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def start_user_service(users: int = 1000, latency: float = 0.0):
+    """Starts the stand-in user service in this event loop, returns (stub, runner, base_url)"""
+    from benchmarks.user_service_stub import UserServiceStub, generate_users
+
+    stub = UserServiceStub(generate_users(users), latency=latency)
+    runner, base_url = await stub.start()
+    return stub, runner, base_url
+
+
+def import_mcp_server(user_service_url: str) -> Any:
+    """Imports mcp_server/server.py into this process, returns its FastMCP instance"""
+    os.environ["USERS_MANAGEMENT_SERVICE_URL"] = user_service_url
+    import server
+
+    # FastMCP configures INFO logging on import, keep per-request logs out of benchmark output
+    logging.getLogger().setLevel(logging.WARNING)
+    return server.mcp
+
+
+def server_env(user_service_url: str, **extra: str) -> dict[str, str]:
+    return {
+        **os.environ,
+        "USERS_MANAGEMENT_SERVICE_URL": user_service_url,
+        "FASTMCP_LOG_LEVEL": "WARNING",
+        **extra,
+    }
+
+
+def stdio_server_params(user_service_url: str) -> StdioServerParameters:
+    return StdioServerParameters(
+        command=sys.executable,
+        args=["server.py"],
+        cwd=str(MCP_SERVER_DIR),
+        env=server_env(user_service_url, MCP_TRANSPORT="stdio"),
+    )
+
+
+async def start_http_server(user_service_url: str, port: int = 0) -> tuple[subprocess.Popen, str]:
+    """Starts mcp_server/server.py with streamable HTTP as a subprocess, returns (process, mcp url)"""
+    port = port or free_port()
+    process = subprocess.Popen(
+        [sys.executable, "server.py"],
+        cwd=MCP_SERVER_DIR,
+        env=server_env(user_service_url, MCP_SERVER_PORT=str(port)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            break
+        except OSError:
+            await asyncio.sleep(0.1)
+    else:
+        process.terminate()
+        raise RuntimeError(f"MCP server did not start on port {port}")
+    return process, f"http://127.0.0.1:{port}/mcp"
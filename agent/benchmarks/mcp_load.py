@@ -0,0 +1,217 @@
+"""
+Load generator for the streamable HTTP MCP server: N concurrent MCP sessions, each running a weighted mix of
+tool calls and resource reads. Sessions start evenly over the ramp-up phase, then all of them run for the
+steady-state phase. Prints calls/s, latency percentiles, error rate and server RSS every interval, then a summary
+per phase and per operation.
+
+Run from the repository root (starts its own stand-in user service and MCP server):
+    python -m agent.benchmarks.mcp_load --sessions 50 --ramp-up 10 --steady 30
+Against a running server (RSS is reported when --pid is given):
+    python -m agent.benchmarks.mcp_load --url http://localhost:8005/mcp --pid 12345
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from mcp import ClientSession
+from mcp.client.streamable_http import streamablehttp_client
+
+from agent.benchmarks.local_stack import start_http_server, start_user_service
+from agent.tracing import percentile
+
+DEFAULT_MIX = "get_user_by_id=40,search_user=25,add_user=8,update_user=8,delete_user=4,resource=15"
+SEARCH_NAMES = ["john", "mike", "anna", "olena", "chen", "maria", "liam", "emma"]
+
+
+def parse_mix(value: str) -> dict[str, int]:
+    mix = {}
+    for item in value.split(","):
+        operation, _, weight = item.partition("=")
+        mix[operation.strip()] = int(weight)
+    return mix
+
+
+def server_rss_mb(pid: Optional[int]) -> Optional[float]:
+    """Resident set size from /proc (Linux), None when unknown"""
+    if not pid:
+        return None
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    except OSError:
+        return None
+    return None
+
+
+def new_user(rnd: random.Random) -> dict[str, Any]:
+    name = rnd.choice(SEARCH_NAMES).title()
+    return {
+        "name": name,
+        "surname": "Load",
+        "email": f"{name.lower()}.load{rnd.randrange(10 ** 9)}@example.org",
+        "about_me": "Created by the load generator",
+    }
+
+
+class LoadSession:
+    """One MCP session issuing calls back to back (plus `think_time`) until stopped"""
+
+    def __init__(self, index: int, url: str, mix: dict[str, int], users: int, think_time: float, samples: list):
+        self.url = url
+        self.operations = list(mix)
+        self.weights = list(mix.values())
+        self.users = users
+        self.think_time = think_time
+        self.samples = samples
+        self.rnd = random.Random(index)
+        self.created_ids: list[int] = []
+        self.resources: list[str] = []
+
+    def _arguments(self, operation: str) -> tuple[str, dict[str, Any]]:
+        if operation == "delete_user" and not self.created_ids:
+            # Only users created by this session are deleted, the seed data stays intact
+            operation = "add_user"
+        match operation:
+            case "get_user_by_id":
+                return operation, {"id": self.rnd.randint(1, self.users)}
+            case "search_user":
+                return operation, {"name": self.rnd.choice(SEARCH_NAMES)}
+            case "add_user":
+                return operation, {"user_create_model": new_user(self.rnd)}
+            case "update_user":
+                return operation, {
+                    "user_id": self.rnd.randint(1, self.users),
+                    "user_update_model": {"company": self.rnd.choice(["Acme Corp", "Globex", "Initech"])},
+                }
+            case "delete_user":
+                return operation, {"id": self.created_ids.pop()}
+        raise ValueError(f"Unknown operation: {operation}")
+
+    async def _call(self, session, operation: str) -> bool:
+        if operation == "resource":
+            await session.read_resource(self.rnd.choice(self.resources))
+            return True
+        tool_name, arguments = self._arguments(operation)
+        result = await session.call_tool(tool_name, arguments)
+        if tool_name == "add_user" and not result.isError:
+            text = result.content[0].text
+            self.created_ids.append(json.loads(text[text.index("{"):])["id"])
+        return not result.isError
+
+    async def run(self, stop: asyncio.Event, phase: dict[str, str]):
+        # A bare ClientSession: MCPClient prints on connect and its tool cache would hide server latency
+        async with streamablehttp_client(self.url) as (read_stream, write_stream, _):
+            async with ClientSession(read_stream, write_stream) as session:
+                await session.initialize()
+                self.resources = [str(resource.uri) for resource in (await session.list_resources()).resources]
+                while not stop.is_set():
+                    operation = self.rnd.choices(self.operations, self.weights)[0]
+                    started = time.perf_counter()
+                    try:
+                        ok = await self._call(session, operation)
+                    except Exception:
+                        ok = False
+                    self.samples.append((started, phase["name"], operation, time.perf_counter() - started, ok))
+                    if self.think_time:
+                        await asyncio.sleep(self.think_time)
+
+
+def describe(samples: list, duration: float) -> str:
+    if not samples:
+        return f"{0:>9}{0.0:>10.1f}{'-':>9}{'-':>9}{'-':>9}{'-':>8}"
+    latencies = [sample[3] * 1000 for sample in samples]
+    errors = sum(1 for sample in samples if not sample[4])
+    return (
+        f"{len(samples):>9}{len(samples) / duration:>10.1f}{percentile(latencies, 0.5):>9.1f}"
+        f"{percentile(latencies, 0.99):>9.1f}{percentile(latencies, 0.999):>9.1f}{errors / len(samples):>8.2%}"
+    )
+
+
+async def main(args):
+    mix = parse_mix(args.mix)
+    process = runner = None
+    url, pid = args.url, args.pid
+    if not url:
+        _, runner, user_service_url = await start_user_service(args.users, args.user_latency)
+        process, url = await start_http_server(user_service_url)
+        pid = process.pid
+
+    samples: list = []
+    stop = asyncio.Event()
+    phase = {"name": "ramp-up"}
+    sessions = [LoadSession(i, url, mix, args.users, args.think_time, samples) for i in range(args.sessions)]
+    tasks: list[asyncio.Task] = []
+    rss: list[float] = []
+
+    async def report():
+        reported = 0
+        started = time.perf_counter()
+        print(f"{'t, s':>6}{'phase':>9}{'sessions':>9}{'calls':>9}{'calls/s':>10}{'p50 ms':>9}{'p99 ms':>9}"
+              f"{'p999 ms':>9}{'errors':>8}{'rss MB':>9}")
+        while True:
+            await asyncio.sleep(args.interval)
+            window = samples[reported:]
+            reported += len(window)
+            memory = server_rss_mb(pid)
+            if memory is not None:
+                rss.append(memory)
+            print(
+                f"{time.perf_counter() - started:>6.0f}{phase['name']:>9}{len(tasks):>9}"
+                f"{describe(window, args.interval)}{memory if memory is not None else float('nan'):>9.1f}"
+            )
+
+    reporter = asyncio.create_task(report())
+    phase_started = {"ramp-up": time.perf_counter()}
+    try:
+        for session in sessions:
+            tasks.append(asyncio.create_task(session.run(stop, phase)))
+            await asyncio.sleep(args.ramp_up / max(args.sessions, 1))
+        phase["name"] = "steady"
+        phase_started["steady"] = time.perf_counter()
+        await asyncio.sleep(args.steady)
+    finally:
+        stop.set()
+        session_results = await asyncio.gather(*tasks, return_exceptions=True)
+        phase_ended = time.perf_counter()
+        reporter.cancel()
+        if process:
+            process.terminate()
+        if runner:
+            await runner.cleanup()
+
+    failed = [result for result in session_results if isinstance(result, BaseException)]
+    print(f"\n{args.sessions} sessions ({len(failed)} failed), mix {args.mix}")
+    if failed:
+        print(f"first session failure: {failed[0]!r}")
+    print(f"{'':<22}{'calls':>9}{'calls/s':>10}{'p50 ms':>9}{'p99 ms':>9}{'p999 ms':>9}{'errors':>8}")
+    ends = {"ramp-up": phase_started.get("steady", phase_ended), "steady": phase_ended}
+    for name, started in phase_started.items():
+        phase_samples = [sample for sample in samples if sample[1] == name]
+        print(f"{name:<22}{describe(phase_samples, ends[name] - started)}")
+    if "steady" in phase_started:
+        steady = [sample for sample in samples if sample[1] == "steady"]
+        for operation in mix:
+            operation_samples = [sample for sample in steady if sample[2] == operation]
+            print(f"{'  ' + operation:<22}{describe(operation_samples, phase_ended - phase_started['steady'])}")
+    if rss:
+        print(f"server RSS: start {rss[0]:.1f} MB, peak {max(rss):.1f} MB, end {rss[-1]:.1f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", help="MCP server to load, a local one is started when not set")
+    parser.add_argument("--pid", type=int, help="Process id of the --url server, for RSS")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--ramp-up", type=float, default=10.0, help="Seconds to start all sessions")
+    parser.add_argument("--steady", type=float, default=30.0, help="Seconds with all sessions running")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="Operation weights, `resource` reads a random resource")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Pause between calls of one session, s")
+    parser.add_argument("--interval", type=float, default=1.0, help="Report interval, s")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--user-latency", type=float, default=0.005)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,63 @@
+"""
+Repeated reads of the flow diagram resource and the MCP prompts, without and with the content-addressed
+ResourceCache (cold: first session; warm: new session, entries already on disk).
+
+Run from the repository root (starts its own stand-in user service and MCP server):
+    python -m agent.benchmarks.resource_reads --reads 50
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import statistics
+import tempfile
+import time
+from typing import Optional
+
+from agent.benchmarks.local_stack import start_http_server, start_user_service
+from agent.mcp_client import MCPClient
+from agent.resource_cache import ResourceCache
+
+FLOW_DIAGRAM_URI = "users-management://flow-diagram"
+
+
+async def measure(url: str, reads: int, resource_cache: Optional[ResourceCache]) -> tuple[float, float]:
+    """Returns median ms per flow diagram read and ms to read all prompt bodies, over one new session"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        async with MCPClient(url, resource_cache=resource_cache) as mcp_client:
+            started = time.perf_counter()
+            prompts = await mcp_client.get_prompts()
+            for prompt in prompts.prompts:
+                await mcp_client.get_prompt(prompt.name)
+            prompts_ms = (time.perf_counter() - started) * 1000
+
+            samples = []
+            for _ in range(reads):
+                started = time.perf_counter()
+                await mcp_client.get_resource(FLOW_DIAGRAM_URI)
+                samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples), prompts_ms
+
+
+async def main(args):
+    _, runner, user_service_url = await start_user_service()
+    process, url = await start_http_server(user_service_url)
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            print(f"{args.reads} flow diagram reads per session")
+            print(f"{'mode':<22}{'p50 read ms':>13}{'prompts ms':>12}")
+            for mode in ("no cache", "cache, cold", "cache, warm disk"):
+                cache = None if mode == "no cache" else ResourceCache(directory)
+                read_ms, prompts_ms = await measure(url, args.reads, cache)
+                print(f"{mode:<22}{read_ms:>13.2f}{prompts_ms:>12.2f}")
+                if cache:
+                    print(f"  {cache.report()}")
+    finally:
+        process.terminate()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--reads", type=int, default=50)
+    asyncio.run(main(parser.parse_args()))
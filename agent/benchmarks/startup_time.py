@@ -0,0 +1,72 @@
+"""
+Agent startup time until the catalog (tools, resources, prompt bodies) is ready:
+sequential bootstrap (previous app.py), concurrent fetch and on-disk snapshot.
+
+Start the MCP server first, then run from the repository root:
+    python -m agent.benchmarks.startup_time --url http://localhost:8005/mcp --runs 5
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import statistics
+import tempfile
+import time
+
+from agent.catalog import CatalogManager, CatalogStore, fetch_catalog
+from agent.mcp_client import MCPClient
+
+
+async def sequential_bootstrap(mcp_client: MCPClient):
+    await mcp_client.get_resources()
+    await mcp_client.get_tools()
+    prompts = await mcp_client.get_prompts()
+    for prompt in prompts.prompts:
+        await mcp_client.get_prompt(prompt.name)
+
+
+async def measure(url: str, mode: str, store: CatalogStore) -> tuple[float, int]:
+    """Returns seconds from connect until the catalog is ready and the number of requests sent before that"""
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        async with MCPClient(url) as mcp_client:
+            session = mcp_client.session
+            requests = 0
+            send_request = session.send_request
+
+            async def counting_send_request(*args, **kwargs):
+                nonlocal requests
+                requests += 1
+                return await send_request(*args, **kwargs)
+
+            session.send_request = counting_send_request
+            # initialize was sent from __aenter__
+            requests += 1
+
+            if mode == "sequential":
+                await sequential_bootstrap(mcp_client)
+            elif mode == "concurrent":
+                await fetch_catalog(mcp_client)
+            else:
+                await CatalogManager(mcp_client, store).load(revalidate=False)
+            elapsed = time.perf_counter() - started
+    return elapsed, requests
+
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as directory:
+        store = CatalogStore(directory)
+        async with MCPClient(args.url) as mcp_client:
+            store.save(await fetch_catalog(mcp_client))
+
+        print(f"{'mode':<12}{'p50 ms':>10}{'requests':>10}")
+        for mode in ("sequential", "concurrent", "snapshot"):
+            samples = [await measure(args.url, mode, store) for _ in range(args.runs)]
+            print(f"{mode:<12}{statistics.median(s[0] for s in samples) * 1000:>10.1f}{samples[0][1]:>10}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8005/mcp")
+    parser.add_argument("--runs", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,103 @@
+"""
+Input tokens and time to first token per LLM request for the end-to-end scenarios: full tool schemas and pinned
+MCP prompts (before) vs minified schemas vs minified schemas with per-turn tool subsets and on-demand prompts.
+The fake LLM adds `--prefill` seconds to the first token per 1000 prompt tokens, as real models do.
+
+Run from the repository root:
+    python -m agent.benchmarks.tool_exposure --turns 10 --prefill 0.05
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+from typing import Optional
+
+from agent.benchmarks.end_to_end import SCENARIOS, scripted_responder
+from agent.benchmarks.fake_llm import FakeChatCompletions
+from agent.benchmarks.local_stack import import_mcp_server, start_user_service
+from agent.catalog import fetch_catalog
+from agent.dial_client import DialClient
+from agent.mcp_client import MCPClient
+from agent.models.message import Message, Role
+from agent.prompts import SYSTEM_PROMPT
+from agent.tool_exposure import PROMPT_TRIGGERS, ToolExposure
+from agent.tracing import Tracer
+
+MODES = {
+    "full": None,
+    "minified": ToolExposure(minify=True),
+    "minified + subset": ToolExposure(minify=True, subset=True),
+}
+
+
+def chars(value) -> int:
+    return len(json.dumps(value))
+
+
+async def main(args):
+    _, user_runner, user_service_url = await start_user_service(args.users)
+    llm_runner, llm_url = await FakeChatCompletions(
+        scripted_responder, ttft=args.ttft, prefill_per_1k_tokens=args.prefill
+    ).start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            mcp_client = await MCPClient(server=import_mcp_server(user_service_url)).__aenter__()
+        try:
+            catalog = await fetch_catalog(mcp_client)
+            prompts = {
+                prompt.name: Message(
+                    role=Role.USER,
+                    content=f'## Prompt provided by MCP server: {prompt.description}\n{prompt.content}',
+                )
+                for prompt in catalog.prompts
+            }
+            print(f"tool schemas: {chars(catalog.tools) // 4} tokens full, "
+                  f"{chars(MODES['minified'].prepare([], catalog.tools)[1]) // 4} minified; "
+                  f"MCP prompts: {sum(chars(m.to_dict()) for m in prompts.values()) // 4} tokens")
+            print(f"{'scenario':<14}{'mode':<20}{'requests':>9}{'in tokens/req':>15}{'ttft p50 ms':>13}"
+                  f"{'turn p50 ms':>13}")
+            for name in args.scenarios:
+                for mode, exposure in MODES.items():
+                    await run(name, mode, exposure, catalog.tools, prompts, llm_url, mcp_client, args.turns)
+        finally:
+            await mcp_client.__aexit__(None, None, None)
+    finally:
+        await llm_runner.cleanup()
+        await user_runner.cleanup()
+
+
+async def run(name, mode, exposure: Optional[ToolExposure], tools, prompts, llm_url, mcp_client, turns: int):
+    on_demand = exposure is not None and exposure.subset
+    if exposure:
+        exposure.prompts = {key: message for key, message in prompts.items() if on_demand and key in PROMPT_TRIGGERS}
+    pinned = [Message(role=Role.SYSTEM, content=SYSTEM_PROMPT)] + [
+        message for key, message in prompts.items() if not (on_demand and key in PROMPT_TRIGGERS)
+    ]
+    dial_client = DialClient(
+        api_key="benchmark", endpoint=llm_url, tools=tools, mcp_client=mcp_client, tool_exposure=exposure
+    )
+    tracer = Tracer(os.devnull)
+    requests = prompt_tokens = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(turns):
+            async with tracer.turn():
+                result = await dial_client.get_completion(
+                    pinned + [Message(role=Role.USER, content=SCENARIOS[name].prompt)]
+                )
+            requests += result.llm_calls
+            prompt_tokens += result.prompt_tokens
+    stats = tracer.stats()
+    print(f"{name:<14}{mode:<20}{requests:>9}{prompt_tokens / requests:>15.0f}"
+          f"{stats['llm.ttft']['p50_ms']:>13.1f}{stats['turn']['p50_ms']:>13.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--turns", type=int, default=10, help="Turns per scenario and mode")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--ttft", type=float, default=0.1, help="Fake LLM time to first token, s")
+    parser.add_argument("--prefill", type=float, default=0.05, help="Extra time to first token per 1000 tokens, s")
+    asyncio.run(main(parser.parse_args()))
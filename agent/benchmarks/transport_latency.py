@@ -0,0 +1,63 @@
+"""
+Per-call tool latency of MCPClient over in-memory, stdio and streamable HTTP transports.
+
+Run from the repository root (starts its own stand-in user service and MCP servers):
+    python -m agent.benchmarks.transport_latency --calls 200
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import statistics
+import time
+
+from agent.benchmarks.local_stack import (
+    import_mcp_server, start_http_server, start_user_service, stdio_server_params,
+)
+from agent.mcp_client import MCPClient
+
+
+async def measure(mcp_client: MCPClient, calls: int) -> list[float]:
+    samples = []
+    for i in range(calls):
+        started = time.perf_counter()
+        await mcp_client.call_tool("get_user_by_id", {"id": i % 100 + 1})
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def percentile(samples: list[float], q: float) -> float:
+    return sorted(samples)[min(len(samples) - 1, int(q * len(samples)))] * 1000
+
+
+async def main(args):
+    _, runner, user_service_url = await start_user_service()
+    http_process, http_url = await start_http_server(user_service_url)
+
+    clients = {
+        "in-memory": lambda: MCPClient(server=import_mcp_server(user_service_url)),
+        "stdio": lambda: MCPClient(stdio_params=stdio_server_params(user_service_url)),
+        "streamable-http": lambda: MCPClient(http_url),
+    }
+
+    print(f"{args.calls} get_user_by_id calls per transport")
+    print(f"{'transport':<18}{'p50 ms':>10}{'p95 ms':>10}{'mean ms':>10}")
+    try:
+        for name, create_client in clients.items():
+            with contextlib.redirect_stdout(io.StringIO()):
+                async with create_client() as mcp_client:
+                    await measure(mcp_client, 10)
+                    samples = await measure(mcp_client, args.calls)
+            print(
+                f"{name:<18}{percentile(samples, 0.5):>10.2f}{percentile(samples, 0.95):>10.2f}"
+                f"{statistics.mean(samples) * 1000:>10.2f}"
+            )
+    finally:
+        http_process.terminate()
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
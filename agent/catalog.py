@@ -0,0 +1,131 @@
+import asyncio
+import hashlib
+import os
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from mcp.types import Resource
+from pydantic import BaseModel, ValidationError
+
+from agent.mcp_client import MCPClient
+
+CATALOG_CACHE_DIR = Path(os.getenv("MCP_CATALOG_CACHE_DIR", Path.home() / ".cache" / "users-management-agent"))
+
+
+class CatalogPrompt(BaseModel):
+    name: str
+    description: Optional[str] = None
+    content: str
+
+
+class McpCatalog(BaseModel):
+    """Tools (in DIAL format), resources and prompt bodies of one MCP server"""
+    server_key: str
+    tools: list[dict[str, Any]] = []
+    # Stored with aliases (`_meta`), otherwise MCP models don't load back equal
+    resources: list[Resource] = []
+    prompts: list[CatalogPrompt] = []
+
+
+class CatalogStore:
+    """On-disk catalog snapshots, one JSON file per server identity"""
+
+    def __init__(self, directory: Path = CATALOG_CACHE_DIR) -> None:
+        self.directory = Path(directory)
+
+    def _path(self, server_key: str) -> Path:
+        return self.directory / f"catalog-{hashlib.sha256(server_key.encode()).hexdigest()[:16]}.json"
+
+    def load(self, server_key: str) -> Optional[McpCatalog]:
+        path = self._path(server_key)
+        if not path.exists():
+            return None
+        try:
+            catalog = McpCatalog.model_validate_json(path.read_text())
+        except (OSError, ValidationError) as e:
+            print(f'Ignoring unreadable catalog snapshot {path}: {e}')
+            return None
+        return catalog if catalog.server_key == server_key else None
+
+    def save(self, catalog: McpCatalog):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(catalog.server_key)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(catalog.model_dump_json(by_alias=True))
+        tmp_path.replace(path)
+
+
+async def fetch_catalog(mcp_client: MCPClient) -> McpCatalog:
+    """Fetches the whole catalog with concurrent requests: three list calls, then all prompt bodies at once"""
+    resources, tools, prompts = await asyncio.gather(
+        mcp_client.get_resources(), mcp_client.get_tools(), mcp_client.get_prompts()
+    )
+    prompt_list = prompts.prompts if prompts else []
+    contents = await asyncio.gather(*(mcp_client.get_prompt(prompt.name) for prompt in prompt_list))
+
+    return McpCatalog(
+        server_key=mcp_client.server_key,
+        tools=tools,
+        resources=resources.resources if resources else [],
+        prompts=[
+            CatalogPrompt(name=prompt.name, description=prompt.description, content=content)
+            for prompt, content in zip(prompt_list, contents)
+        ],
+    )
+
+
+class CatalogManager:
+    """
+    Serves the catalog from the on-disk snapshot when there is one, so startup costs no extra round trips.
+    The snapshot is revalidated in the background and refreshed when the server sends `listChanged`.
+    `on_update` is called with the new catalog whenever a refresh changes it.
+    """
+
+    def __init__(
+            self,
+            mcp_client: MCPClient,
+            store: Optional[CatalogStore] = None,
+            on_update: Optional[Callable[[McpCatalog], None]] = None,
+    ) -> None:
+        self.mcp_client = mcp_client
+        self.store = store or CatalogStore()
+        self.on_update = on_update
+        self.catalog: Optional[McpCatalog] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._refresh_pending = False
+        mcp_client.on_list_changed = self._on_list_changed
+
+    async def load(self, revalidate: bool = True) -> McpCatalog:
+        self.catalog = self.store.load(self.mcp_client.server_key)
+        if self.catalog is None:
+            return await self.refresh()
+        if revalidate:
+            self.schedule_refresh()
+        return self.catalog
+
+    async def refresh(self) -> McpCatalog:
+        catalog = await fetch_catalog(self.mcp_client)
+        self.store.save(catalog)
+        changed = self.catalog is not None and catalog != self.catalog
+        self.catalog = catalog
+        if changed and self.on_update:
+            self.on_update(catalog)
+        return catalog
+
+    def schedule_refresh(self):
+        # A change announced while a refresh is running triggers one more refresh after it
+        self._refresh_pending = True
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.create_task(self._refresh_in_background())
+
+    async def _refresh_in_background(self):
+        while self._refresh_pending:
+            self._refresh_pending = False
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f'Catalog refresh failed: {e}')
+
+    async def _on_list_changed(self, kind: str):
+        print(f'MCP server changed its {kind}, refreshing catalog')
+        self.schedule_refresh()
@@ -0,0 +1,113 @@
+import asyncio
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional
+
+from openai.types.chat import ChatCompletionChunk
+
+COMPLETION_CACHE_DIR = Path(
+    os.getenv("COMPLETION_CACHE_DIR", Path.home() / ".cache" / "users-management-agent" / "completions")
+)
+COMPLETION_CACHE_MAX_BYTES = int(os.getenv("COMPLETION_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+REPLAY_CHUNK_CHARS = 64
+
+
+def completion_key(request: dict[str, Any]) -> str:
+    """Stable hash of everything that determines a temperature-0 completion: model, messages, tools, temperature"""
+    return hashlib.sha256(json.dumps(request, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+class CompletionCache:
+    """
+    Completions (content, tool calls, usage) on disk, one JSON file per request key.
+    When the files grow beyond `max_bytes` the least recently used ones are removed; file mtimes keep that order
+    across restarts.
+    """
+
+    def __init__(self, directory: Path = COMPLETION_CACHE_DIR, max_bytes: int = COMPLETION_CACHE_MAX_BYTES) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        files = sorted(self.directory.glob("*.json"), key=lambda path: path.stat().st_mtime)
+        self._sizes: OrderedDict[str, int] = OrderedDict((path.stem, path.stat().st_size) for path in files)
+        self.size = sum(self._sizes.values())
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[dict[str, Any]]:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text())
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        if key in self._sizes:
+            self._sizes.move_to_end(key)
+        os.utime(path)
+        return entry
+
+    def set(self, key: str, entry: dict[str, Any]):
+        data = json.dumps(entry)
+        path = self._path(key)
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(data)
+        tmp_path.replace(path)
+
+        self.size += len(data) - self._sizes.pop(key, 0)
+        self._sizes[key] = len(data)
+        while self.size > self.max_bytes and len(self._sizes) > 1:
+            oldest, size = self._sizes.popitem(last=False)
+            self._path(oldest).unlink(missing_ok=True)
+            self.size -= size
+            self.evictions += 1
+
+    def report(self) -> str:
+        return (
+            f"Completion cache: {self.hits} hits, {self.misses} misses, {len(self._sizes)} entries "
+            f"({self.size} bytes), {self.evictions} evicted"
+        )
+
+
+class ReplayStream:
+    """A cached completion as `ChatCompletionChunk`s, used in place of `chat.completions.create(stream=True)`"""
+
+    def __init__(self, entry: dict[str, Any], model: str, chunk_chars: int = REPLAY_CHUNK_CHARS) -> None:
+        self.entry = entry
+        self.model = model
+        self.chunk_chars = chunk_chars
+
+    async def __aenter__(self) -> "ReplayStream":
+        return self
+
+    async def __aexit__(self, *exc_info: Any):
+        pass
+
+    def _chunk(self, choices: list[dict[str, Any]], **extra: Any) -> ChatCompletionChunk:
+        return ChatCompletionChunk.model_validate({
+            "id": "chatcmpl-cached", "object": "chat.completion.chunk", "created": 0, "model": self.model,
+            "choices": choices, **extra,
+        })
+
+    async def __aiter__(self) -> AsyncIterator[ChatCompletionChunk]:
+        content = self.entry["content"]
+        deltas = [{"content": content[i:i + self.chunk_chars]} for i in range(0, len(content), self.chunk_chars)]
+        deltas.extend(
+            {"tool_calls": [{"index": index, **tool_call}]}
+            for index, tool_call in enumerate(self.entry["tool_calls"])
+        )
+        for delta in deltas:
+            yield self._chunk([{"index": 0, "delta": delta, "finish_reason": None}])
+            # Like a network stream, other tasks run between chunks
+            await asyncio.sleep(0)
+        finish_reason = "tool_calls" if self.entry["tool_calls"] else "stop"
+        yield self._chunk([{"index": 0, "delta": {}, "finish_reason": finish_reason}])
+        usage = self.entry["usage"]
+        yield self._chunk([], usage={**usage, "total_tokens": usage["prompt_tokens"] + usage["completion_tokens"]})
@@ -1,108 +1,333 @@
+import asyncio
 import json
-from collections import defaultdict
-from typing import Any
+import time
+from typing import Any, Awaitable, Callable, Optional
 
 from openai import AsyncAzureOpenAI
 
+from agent.completion_cache import CompletionCache, ReplayStream, completion_key
+from agent.models.completion import CompletionResult, StopReason
 from agent.models.message import Message, Role
 from agent.mcp_client import MCPClient
+from agent.mcp_manager import MCPConnectionManager
+from agent.prompts import SUMMARY_PROMPT
+from agent.tool_cache import MUTATING_TOOLS, READ_ONLY_TOOLS
+from agent.tool_exposure import ToolExposure, base_tool_name
+from agent.tracing import record, span
+
+MAX_CONCURRENT_TOOLS = 8
+TOOL_TIMEOUT_SECONDS = 60.0
+MAX_TOOL_ROUNDS = 10
+COMPLETION_DEADLINE_SECONDS = 180.0
+COMPLETION_TOKEN_BUDGET = 200_000
+# Read-only tool calls start as soon as their arguments are streamed, while the model is still generating
+EAGER_TOOLS = True
+
+TokenCallback = Callable[[str], Awaitable[None]]
 
 
 class DialClient:
     """Handles AI model interactions and integrates with MCP client"""
 
-    def __init__(self, api_key: str, endpoint: str, tools: list[dict[str, Any]], mcp_client: MCPClient):
+    def __init__(
+            self,
+            api_key: str,
+            endpoint: str,
+            tools: list[dict[str, Any]],
+            mcp_client: MCPClient | MCPConnectionManager,
+            max_concurrent_tools: int = MAX_CONCURRENT_TOOLS,
+            tool_timeout: float = TOOL_TIMEOUT_SECONDS,
+            serialize_mutating_tools: bool = True,
+            mutating_tools: frozenset[str] = MUTATING_TOOLS,
+            max_tool_rounds: int = MAX_TOOL_ROUNDS,
+            deadline: float = COMPLETION_DEADLINE_SECONDS,
+            token_budget: int = COMPLETION_TOKEN_BUDGET,
+            tool_exposure: Optional[ToolExposure] = None,
+            completion_cache: Optional[CompletionCache] = None,
+            eager_tools: bool = EAGER_TOOLS,
+            read_only_tools: frozenset[str] = READ_ONLY_TOOLS,
+    ):
         self.tools = tools
         self.mcp_client = mcp_client
+        self.max_concurrent_tools = max_concurrent_tools
+        self.tool_timeout = tool_timeout
+        self.serialize_mutating_tools = serialize_mutating_tools
+        self.mutating_tools = mutating_tools
+        self.max_tool_rounds = max_tool_rounds
+        self.deadline = deadline
+        self.token_budget = token_budget
+        self.tool_exposure = tool_exposure
+        self.completion_cache = completion_cache
+        self.eager_tools = eager_tools
+        self.read_only_tools = read_only_tools
         self.openai = AsyncAzureOpenAI(
             api_key=api_key,
             azure_endpoint=endpoint,
             api_version="2025-01-01-preview"
         )
 
-    def _collect_tool_calls(self, tool_deltas):
-        """Convert streaming tool call deltas to complete tool calls"""
-        tool_dict = defaultdict(lambda: {"id": None, "function": {"arguments": "", "name": None}, "type": None})
-
-        for delta in tool_deltas:
-            idx = delta.index
-            if delta.id: tool_dict[idx]["id"] = delta.id
-            if delta.function.name: tool_dict[idx]["function"]["name"] = delta.function.name
-            if delta.function.arguments: tool_dict[idx]["function"]["arguments"] += delta.function.arguments
-            if delta.type: tool_dict[idx]["type"] = delta.type
-
-        return list(tool_dict.values())
-
-    async def _stream_response(self, messages: list[Message]) -> Message:
-        """Stream OpenAI response and handle tool calls"""
-
-        stream = await self.openai.chat.completions.create(
-            **{
-                "model": "gpt-4o",
-                "messages": [msg.to_dict() for msg in messages],
-                "tools": self.tools,
-                "temperature": 0.0,
-                "stream": True
-            }
+    @staticmethod
+    def _add_tool_delta(tool_dict: dict[int, dict[str, Any]], delta) -> Optional[dict[str, Any]]:
+        """Adds one streamed tool call delta, returns the tool call once its arguments are a complete JSON object"""
+        tool = tool_dict.setdefault(
+            delta.index, {"id": None, "function": {"arguments": "", "name": None}, "type": None}
+        )
+        if delta.id: tool["id"] = delta.id
+        if delta.type: tool["type"] = delta.type
+        if not delta.function:
+            return None
+        if delta.function.name: tool["function"]["name"] = delta.function.name
+        if not delta.function.arguments:
+            return None
+        tool["function"]["arguments"] += delta.function.arguments
+        # Once the arguments parse as an object, later deltas can only add whitespace, so the call is complete. Such
+        # deltas make it parse again: callers must start each call id only once
+        if not tool["function"]["arguments"].rstrip().endswith("}"):
+            return None
+        try:
+            json.loads(tool["function"]["arguments"])
+        except ValueError:
+            return None
+        return tool
+
+    def _starts_early(self, tool: dict[str, Any], started_tools: Optional[dict[str, asyncio.Task]]) -> bool:
+        return (
+            self.eager_tools
+            and started_tools is not None
+            and tool["id"] is not None
+            and tool["id"] not in started_tools
+            and base_tool_name(tool["function"]["name"] or "") in self.read_only_tools
+            and len(started_tools) < self.max_concurrent_tools
         )
 
-        content = ""
-        tool_deltas = []
+    async def _stream_response(
+            self,
+            messages: list[Message],
+            on_token: Optional[TokenCallback] = None,
+            started_tools: Optional[dict[str, asyncio.Task]] = None,
+            semaphore: Optional[asyncio.Semaphore] = None,
+    ) -> tuple[Message, dict[str, int]]:
+        """
+        Stream OpenAI response and handle tool calls, returns the message and token usage of the request.
+        Content tokens go to `on_token` as they arrive, or to the console without it.
+        With a `completion_cache`, a request seen before is replayed from it as a stream.
+        Read-only tool calls are started as soon as they are complete and added to `started_tools` by call id, they
+        take a slot of `semaphore` like the calls run after the stream.
+        """
+        tools = self.tools
+        if self.tool_exposure:
+            messages, tools = self.tool_exposure.prepare(messages, tools)
+        request_messages = [msg.to_dict() for msg in messages]
+
+        request = {"model": "gpt-4o", "messages": request_messages, "tools": tools, "temperature": 0.0}
+        cache_key = completion_key(request) if self.completion_cache else None
+        cached = self.completion_cache.get(cache_key) if cache_key else None
+
+        with span("llm", model="gpt-4o", tools=len(tools), cached=cached is not None) as attrs:
+            requested = time.perf_counter()
+            if cached:
+                stream = ReplayStream(cached, request["model"])
+            else:
+                stream = await self.openai.chat.completions.create(
+                    **request, stream=True, stream_options={"include_usage": True}
+                )
+
+            content = ""
+            tool_dict: dict[int, dict[str, Any]] = {}
+            usage = None
+            first_token = None
+
+            if on_token is None:
+                print("🤖: ", end="", flush=True)
 
-        print("🤖: ", end="", flush=True)
+            # Closing the stream on exit (also on cancellation) releases the HTTP connection right away
+            async with stream:
+                async for chunk in stream:
+                    if chunk.usage:
+                        usage = chunk.usage
+                    if not chunk.choices:
+                        continue
+                    delta = chunk.choices[0].delta
+                    if first_token is None and (delta.content or delta.tool_calls):
+                        first_token = time.perf_counter()
+                        record("llm.ttft", requested)
 
-        async for chunk in stream:
-            delta = chunk.choices[0].delta
+                    # Stream content
+                    if delta.content:
+                        if on_token is None:
+                            print(delta.content, end="", flush=True)
+                        else:
+                            await on_token(delta.content)
+                        content += delta.content
 
-            # Stream content
-            if delta.content:
-                print(delta.content, end="", flush=True)
-                content += delta.content
+                    for tool_delta in delta.tool_calls or []:
+                        tool = self._add_tool_delta(tool_dict, tool_delta)
+                        if tool and self._starts_early(tool, started_tools):
+                            started_tools[tool["id"]] = asyncio.create_task(
+                                self._call_tool(tool, early=True, semaphore=semaphore)
+                            )
 
-            if delta.tool_calls:
-                tool_deltas.extend(delta.tool_calls)
+            if first_token is not None:
+                record("llm.stream", first_token)
+
+            if on_token is None:
+                print()
+            ai_message = Message(
+                role=Role.AI,
+                content=content,
+                tool_calls=[tool_dict[index] for index in sorted(tool_dict)]
+            )
+
+            if usage:
+                tokens = {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
+            else:
+                # Rough estimate (~4 chars per token) for endpoints that don't report usage
+                tokens = {
+                    "prompt_tokens": len(json.dumps(request_messages)) // 4,
+                    "completion_tokens": len(json.dumps(ai_message.to_dict())) // 4,
+                }
+            if cache_key and not cached:
+                self.completion_cache.set(
+                    cache_key, {"content": content, "tool_calls": ai_message.tool_calls, "usage": tokens}
+                )
+            attrs.update(
+                tokens,
+                estimated_tokens=usage is None,
+                tool_calls=len(ai_message.tool_calls),
+            )
+            return ai_message, tokens
 
-        print()
-        return Message(
-            role=Role.AI,
-            content=content,
-            tool_calls=self._collect_tool_calls(tool_deltas) if tool_deltas else []
+    async def get_completion(
+            self, messages: list[Message], on_token: Optional[TokenCallback] = None
+    ) -> CompletionResult:
+        """
+        Process user query with streaming and tool calling. Runs LLM and tool rounds until the model answers without
+        tool calls or a limit is hit: `max_tool_rounds`, total `deadline` (seconds) or cumulative `token_budget`.
+        Cancelling the calling task cancels the in-flight LLM stream and MCP calls.
+        `on_token` receives streamed content; the client holds no per-conversation state, so concurrent
+        conversations can share one DialClient.
+        """
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        deadline = started + self.deadline
+        result = CompletionResult(message=Message(role=Role.AI), stop_reason=StopReason.COMPLETED)
+        started_tools: dict[str, asyncio.Task] = {}
+        # Shared by the calls started while streaming and the ones run after it
+        semaphore = asyncio.Semaphore(self.max_concurrent_tools)
+
+        def finish(message: Message, stop_reason: StopReason) -> CompletionResult:
+            result.message = message
+            result.stop_reason = stop_reason
+            result.elapsed = loop.time() - started
+            return result
+
+        try:
+            while True:
+                ai_message, usage = await asyncio.wait_for(
+                    self._stream_response(messages, on_token, started_tools, semaphore), deadline - loop.time()
+                )
+                result.llm_calls += 1
+                result.prompt_tokens += usage["prompt_tokens"]
+                result.completion_tokens += usage["completion_tokens"]
+
+                if not ai_message.tool_calls:
+                    return finish(ai_message, StopReason.COMPLETED)
+                if result.tool_rounds >= self.max_tool_rounds:
+                    stop_message = f"Stopped: reached the limit of {self.max_tool_rounds} tool rounds"
+                    return finish(Message(role=Role.AI, content=stop_message), StopReason.MAX_TOOL_ROUNDS)
+                if result.total_tokens >= self.token_budget:
+                    stop_message = f"Stopped: used {result.total_tokens} of {self.token_budget} tokens"
+                    return finish(Message(role=Role.AI, content=stop_message), StopReason.TOKEN_BUDGET)
+
+                messages.append(ai_message)
+                await asyncio.wait_for(
+                    self._call_tools(ai_message, messages, started_tools, semaphore), deadline - loop.time()
+                )
+                result.tool_rounds += 1
+        except asyncio.TimeoutError:
+            return finish(
+                Message(role=Role.AI, content=f"Stopped: no answer within {self.deadline:.0f}s"),
+                StopReason.DEADLINE,
+            )
+        finally:
+            # Calls started early whose results are not used (stream failed, a limit was hit)
+            for task in started_tools.values():
+                task.cancel()
+
+    async def summarize(self, messages: list[Message]) -> str:
+        """Short summary of conversation messages, used to compact old history"""
+        transcript = "\n".join(f"{msg.role.value}: {msg.content}" for msg in messages if msg.content)
+        response = await self.openai.chat.completions.create(
+            model="gpt-4o",
+            messages=[{"role": "system", "content": SUMMARY_PROMPT}, {"role": "user", "content": transcript}],
+            temperature=0.0,
         )
+        return response.choices[0].message.content or ""
 
-    async def get_completion(self, messages: list[Message]) -> Message:
-        """Process user query with streaming and tool calling"""
-        ai_message: Message = await self._stream_response(messages)
-
-        # Check if any tool calls are present and perform them
-        if ai_message.tool_calls:
-            messages.append(ai_message)
-            await self._call_tools(ai_message, messages)
-            # recursively calling agent with tool messages
-            return await self.get_completion(messages)
-
-        return ai_message
-
-    async def _call_tools(self, ai_message: Message, messages: list[Message]):
-        """Execute tool calls using MCP client"""
-        #TODO:
-        # 1. Iterate through tool_calls
-        # 2. Get tool name and tool arguments (arguments is a JSON, don't forget about that)
-        # 3. Wrap into try/except block and call mcp_client tool call. If succeed then add tool message (don't forget
-        #    about tool call id), otherwise add tool message with error message (it kind of fallback strategy).
-        # raise NotImplementedError()
-
-        for tool in ai_message.tool_calls:
-            function = tool['function']
+    async def _call_tool(
+            self, tool: dict[str, Any], early: bool = False, semaphore: Optional[asyncio.Semaphore] = None
+    ) -> Any:
+        """Execute one tool call, errors and timeouts are returned as the tool result"""
+        if semaphore is not None:
+            async with semaphore:
+                return await self._call_tool(tool, early)
+        function = tool['function']
+        with span("tool", tool=function['name'], early=early) as attrs:
             try:
-                call_result = await self.mcp_client.call_tool(tool_name=function['name'], tool_args=json.loads(function['arguments']))
+                return await asyncio.wait_for(
+                    self.mcp_client.call_tool(tool_name=function['name'], tool_args=json.loads(function['arguments'])),
+                    timeout=self.tool_timeout,
+                )
+            except asyncio.TimeoutError:
+                attrs["error"] = "timeout"
+                return f'error calling tool: timed out after {self.tool_timeout}s'
             except Exception as e:
-                call_result = f'error calling tool: {e}'
+                attrs["error"] = type(e).__name__
+                return f'error calling tool: {e}'
+
+    async def _call_tools(
+            self,
+            ai_message: Message,
+            messages: list[Message],
+            started_tools: Optional[dict[str, asyncio.Task]] = None,
+            semaphore: Optional[asyncio.Semaphore] = None,
+    ):
+        """
+        Execute tool calls using MCP client. Independent calls run concurrently (at most `max_concurrent_tools`),
+        mutating tools run one at a time in their original order when `serialize_mutating_tools` is set.
+        Calls already started while streaming are awaited instead. Tool messages are appended in the original
+        `tool_calls` order.
+        """
+        semaphore = semaphore or asyncio.Semaphore(self.max_concurrent_tools)
+        mutation_lock = asyncio.Lock()
+
+        async def run(tool: dict[str, Any]) -> Any:
+            if started_tools and tool['id'] in started_tools:
+                return await started_tools.pop(tool['id'])
+            if self.serialize_mutating_tools and base_tool_name(tool['function']['name']) in self.mutating_tools:
+                async with mutation_lock, semaphore:
+                    return await self._call_tool(tool)
+            async with semaphore:
+                return await self._call_tool(tool)
+
+        try:
+            call_results = await asyncio.gather(*(run(tool) for tool in ai_message.tool_calls))
+        except asyncio.CancelledError:
+            # Every tool call needs a tool message, otherwise the history is rejected on the next request
+            call_results = ['error calling tool: cancelled'] * len(ai_message.tool_calls)
+            self._append_tool_messages(ai_message, call_results, messages)
+            raise
+
+        self._append_tool_messages(ai_message, call_results, messages)
 
+    @staticmethod
+    def _append_tool_messages(ai_message: Message, call_results: list[Any], messages: list[Message]):
+        for tool, call_result in zip(ai_message.tool_calls, call_results):
             messages.append(
                 Message(
                     role=Role.TOOL,
                     content=call_result,
                     tool_call_id=tool['id'],
-                    name=function['name'],
+                    name=tool['function']['name'],
                 )
             )
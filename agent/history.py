@@ -0,0 +1,121 @@
+import asyncio
+import json
+from typing import Awaitable, Callable, Optional
+
+from agent.models.message import Message, Role
+
+HISTORY_TOKEN_BUDGET = 12_000
+KEEP_RECENT_TURNS = 2
+TOOL_RESULT_STUB_CHARS = 160
+
+
+def estimate_tokens(messages: list[Message]) -> int:
+    """Rough token count of serialized messages (~4 chars per token)"""
+    return sum(len(json.dumps(message.to_dict(), ensure_ascii=False)) for message in messages) // 4
+
+
+class ConversationHistory:
+    """
+    Conversation messages with a token budget for what is sent to the model.
+    Pinned messages (system prompt, MCP prompts) are always sent as is. Tool results older than the last
+    `keep_recent_turns` user turns are replaced with short stubs, and if the history is still over budget the oldest
+    turns are dropped. Dropped turns are summarized in the background when a `summarizer` is provided.
+    """
+
+    def __init__(
+            self,
+            token_budget: int = HISTORY_TOKEN_BUDGET,
+            keep_recent_turns: int = KEEP_RECENT_TURNS,
+            summarizer: Optional[Callable[[list[Message]], Awaitable[str]]] = None,
+    ) -> None:
+        self.token_budget = token_budget
+        self.keep_recent_turns = keep_recent_turns
+        self.summarizer = summarizer
+        self.pinned: list[Message] = []
+        self.messages: list[Message] = []
+        self.summary: Optional[str] = None
+        self.turn_reports: list[dict[str, int]] = []
+        self._dropped_tokens = 0
+        self._to_summarize: list[Message] = []
+        self._summary_task: Optional[asyncio.Task] = None
+
+    def pin(self, message: Message):
+        self.pinned.append(message)
+
+    def append(self, message: Message):
+        self.messages.append(message)
+
+    def extend(self, messages: list[Message]):
+        self.messages.extend(messages)
+
+    def _turn_starts(self) -> list[int]:
+        return [i for i, message in enumerate(self.messages) if message.role == Role.USER]
+
+    @staticmethod
+    def _elide(message: Message) -> Message:
+        content = message.content or ""
+        if len(content) <= TOOL_RESULT_STUB_CHARS:
+            return message
+        return message.model_copy(
+            update={
+                "content": f"[older tool result elided, {len(content)} chars, call the tool again if needed] "
+                           f"{content[:TOOL_RESULT_STUB_CHARS]}..."
+            }
+        )
+
+    def _compacted(self) -> list[Message]:
+        turn_starts = self._turn_starts()
+        recent_start = turn_starts[-self.keep_recent_turns] if len(turn_starts) >= self.keep_recent_turns else 0
+
+        head = list(self.pinned)
+        if self.summary:
+            head.append(Message(role=Role.SYSTEM, content=f"Summary of the earlier conversation:\n{self.summary}"))
+        return head + [
+            self._elide(message) if i < recent_start and message.role == Role.TOOL else message
+            for i, message in enumerate(self.messages)
+        ]
+
+    def _drop_oldest_turn(self) -> bool:
+        turn_starts = self._turn_starts()
+        if len(turn_starts) <= max(self.keep_recent_turns, 1):
+            return False
+
+        dropped = self.messages[:turn_starts[1]]
+        self.messages = self.messages[turn_starts[1]:]
+        self._dropped_tokens += estimate_tokens(dropped)
+        if self.summarizer:
+            self._to_summarize.extend(dropped)
+        return True
+
+    async def _summarize(self):
+        while self._to_summarize:
+            batch, self._to_summarize = self._to_summarize, []
+            if self.summary:
+                batch = [Message(role=Role.SYSTEM, content=f"Summary so far:\n{self.summary}")] + batch
+            try:
+                self.summary = await self.summarizer(batch)
+            except Exception as e:
+                print(f'History summarization failed: {e}')
+
+    def for_request(self) -> list[Message]:
+        """Messages to send for the next turn, also records raw vs sent token counts for the report"""
+        raw_tokens = estimate_tokens(self.pinned + self.messages) + self._dropped_tokens
+
+        request = self._compacted()
+        while estimate_tokens(request) > self.token_budget and self._drop_oldest_turn():
+            request = self._compacted()
+
+        if self._to_summarize and (self._summary_task is None or self._summary_task.done()):
+            self._summary_task = asyncio.create_task(self._summarize())
+
+        self.turn_reports.append(
+            {"turn": len(self.turn_reports) + 1, "raw": raw_tokens, "sent": estimate_tokens(request)}
+        )
+        return request
+
+    def report(self) -> str:
+        lines = [f"{'turn':>5}{'raw tokens':>12}{'sent tokens':>13}{'saved':>8}"]
+        for turn in self.turn_reports:
+            saved = 1 - turn["sent"] / turn["raw"] if turn["raw"] else 0.0
+            lines.append(f"{turn['turn']:>5}{turn['raw']:>12}{turn['sent']:>13}{saved:>8.0%}")
+        return "\n".join(lines)
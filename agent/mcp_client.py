@@ -1,19 +1,71 @@
-from typing import Optional, Any
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Optional, Any
 
-from mcp import ClientSession
+import anyio
+from mcp import ClientSession, types
+from mcp.client.stdio import StdioServerParameters, stdio_client
 from mcp.client.streamable_http import streamablehttp_client
-from mcp.types import CallToolResult, TextContent, GetPromptResult, ReadResourceResult, Resource, TextResourceContents, BlobResourceContents, Prompt
+from mcp.shared.memory import create_client_server_memory_streams
+from mcp.types import CallToolResult, TextContent, GetPromptResult, ReadResourceResult, Resource, TextResourceContents, BlobResourceContents, Prompt, InitializeResult
 from pydantic import AnyUrl
 
+from agent.resource_cache import ResourceCache, content_hash
+from agent.tool_cache import ToolResultCache
+from agent.tracing import span
+
+
+@asynccontextmanager
+async def in_memory_streams(server: Any):
+    """Runs `server` (FastMCP or low-level Server) in this event loop, connected with in-memory streams"""
+    low_level_server = getattr(server, "_mcp_server", server)
+    async with create_client_server_memory_streams() as (client_streams, server_streams):
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(
+                lambda: low_level_server.run(
+                    server_streams[0], server_streams[1], low_level_server.create_initialization_options()
+                )
+            )
+            try:
+                yield client_streams
+            finally:
+                task_group.cancel_scope.cancel()
+
 
 class MCPClient:
-    """Handles MCP server connection and tool execution"""
+    """
+    Handles MCP server connection and tool execution.
+    Connects over streamable HTTP to `mcp_server_url`, over stdio to a subprocess started with `stdio_params`,
+    or in memory to a `server` instance running in the same process.
+    """
 
-    def __init__(self, mcp_server_url: str) -> None:
+    def __init__(
+            self,
+            mcp_server_url: Optional[str] = None,
+            tool_cache: Optional[ToolResultCache] = None,
+            server: Any = None,
+            stdio_params: Optional[StdioServerParameters] = None,
+            resource_cache: Optional[ResourceCache] = None,
+    ) -> None:
+        if sum(option is not None for option in (mcp_server_url, server, stdio_params)) != 1:
+            raise ValueError("Provide exactly one of mcp_server_url, server or stdio_params")
+        self.server = server
+        self.stdio_params = stdio_params
+        if server is not None:
+            mcp_server_url = f"memory://{getattr(server, 'name', type(server).__name__)}"
+        elif stdio_params is not None:
+            mcp_server_url = f"stdio://{' '.join([stdio_params.command, *stdio_params.args])}"
         self.mcp_server_url = mcp_server_url
+        self.tool_cache = tool_cache
+        self.resource_cache = resource_cache
         self.session: Optional[ClientSession] = None
+        self.initialize_result: Optional[InitializeResult] = None
+        # Called with "tools", "prompts" or "resources" when the server announces a list change
+        self.on_list_changed: Optional[Callable[[str], Awaitable[None]]] = None
         self._streams_context = None
         self._session_context = None
+        self._read_stream = None
 
     async def __aenter__(self):
         #TODO:
@@ -25,14 +77,58 @@ class MCPClient:
         # 6. return self
         # raise NotImplementedError()
 
-        self._streams_context = streamablehttp_client(self.mcp_server_url)
-        read_stream, write_stream, _ = await self._streams_context.__aenter__()
-        self._session_context = ClientSession(read_stream, write_stream)
-        self.session = await self._session_context.__aenter__()
-        initialize_result = await self.session.initialize()
-        print(f'Initialize result: {initialize_result}')
+        if self.server is not None:
+            self._streams_context = in_memory_streams(self.server)
+        elif self.stdio_params is not None:
+            self._streams_context = stdio_client(self.stdio_params)
+        else:
+            self._streams_context = streamablehttp_client(self.mcp_server_url)
+        # streamable HTTP yields a third item (session id getter), the other transports only the streams
+        read_stream, write_stream, *_ = await self._streams_context.__aenter__()
+        self._read_stream = read_stream
+        try:
+            self._session_context = ClientSession(read_stream, write_stream, message_handler=self._handle_message)
+            self.session = await self._session_context.__aenter__()
+            self.initialize_result = await self.session.initialize()
+        except BaseException as e:
+            await self.__aexit__(type(e), e, e.__traceback__)
+            raise
+        if self.resource_cache:
+            # A new session may be a different server build, read its manifest again
+            self.resource_cache.invalidate_manifest()
+        print(f'Initialize result: {self.initialize_result}')
         return self
 
+    @property
+    def server_key(self) -> str:
+        """Identity of the connected server: url, name and version reported on initialize"""
+        server_info = self.initialize_result.serverInfo
+        return f"{self.mcp_server_url}|{server_info.name}|{server_info.version}"
+
+    @property
+    def connection_lost(self) -> bool:
+        """True once the transport closed its stream; requests still pending on the session will never complete"""
+        return self._read_stream is not None and self._read_stream.statistics().open_send_streams == 0
+
+    async def _handle_message(self, message):
+        if not isinstance(message, types.ServerNotification):
+            return
+        if self.resource_cache and isinstance(message.root, types.ResourceListChangedNotification):
+            self.resource_cache.invalidate_manifest()
+        if not self.on_list_changed:
+            return
+        match message.root:
+            case types.ToolListChangedNotification():
+                kind = "tools"
+            case types.PromptListChangedNotification():
+                kind = "prompts"
+            case types.ResourceListChangedNotification():
+                kind = "resources"
+            case _:
+                return
+        # The handler runs inside the session receive loop, requests made from it directly would never get a response
+        asyncio.create_task(self.on_list_changed(kind))
+
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         #TODO:
         # This is shutdown method.
@@ -40,11 +136,13 @@ class MCPClient:
         # If streams context is present then shutdown the streams context (__aexit__ method with params)
         # raise NotImplementedError()
 
-        if self.session and self._session_context:
-            await self._session_context.__aexit__(exc_type, exc_val, exc_tb)
-
-        if self._streams_context:
-            await self._streams_context.__aexit__(exc_type, exc_val, exc_tb)
+        try:
+            if self.session and self._session_context:
+                await self._session_context.__aexit__(exc_type, exc_val, exc_tb)
+        finally:
+            # Close the transport even when the session failed, e.g. after the connection dropped
+            if self._streams_context:
+                await self._streams_context.__aexit__(exc_type, exc_val, exc_tb)
 
     async def get_tools(self) -> list[dict[str, Any]]:
         """Get available tools from MCP server"""
@@ -85,13 +183,30 @@ class MCPClient:
         # 4. If `isinstance(content, TextContent)` -> return content.text
         #    else -> return content
         # raise NotImplementedError()
-        tool_result: CallToolResult = await self.session.call_tool(tool_name, tool_args)
-        content = tool_result.content[0]
+        with span("mcp.call_tool", tool=tool_name, transport=self.mcp_server_url.split("://")[0]) as attrs:
+            cache = self.tool_cache
+            if cache and tool_name in cache.cacheable_tools:
+                cached = cache.get(tool_name, tool_args)
+                if cached is not None:
+                    attrs["cached"] = True
+                    return cached
+            generation = cache.generation if cache else 0
 
-        if isinstance(content, TextContent):
-            return content.text
-        else:
-            return content
+            try:
+                tool_result: CallToolResult = await self.session.call_tool(tool_name, tool_args)
+            finally:
+                # A failed mutation may still have changed data, so invalidate either way
+                if cache and tool_name in cache.mutating_tools:
+                    cache.invalidate()
+            content = tool_result.content[0]
+            attrs["is_error"] = tool_result.isError
+
+            if isinstance(content, TextContent):
+                if cache and tool_name in cache.cacheable_tools and not tool_result.isError:
+                    cache.set(tool_name, tool_args, content.text, generation)
+                return content.text
+            else:
+                return content
 
     async def get_resources(self) -> list[Resource]:
         """Get available resources from MCP server"""
@@ -124,13 +239,36 @@ class MCPClient:
         # as bytes, but you can return on the server side some dict just to check how resources are looks like).
         # raise NotImplementedError()
 
+        sha256 = await self._manifest_hash("resources", str(uri))
+        if sha256 and (cached := self.resource_cache.get(sha256)) is not None:
+            return cached
+
         resource = await self.session.read_resource(uri)
 
         content = resource.contents[0]
         if isinstance(content, TextResourceContents):
-            return content.text
+            value, is_blob = content.text, False
         else:
-            return content.blob
+            value, is_blob = content.blob, True
+        # Stored only when the content matches the manifest, a resource changed since then is not cached
+        if sha256 and content_hash(value, is_blob) == sha256:
+            self.resource_cache.set(sha256, value)
+        return value
+
+    async def _manifest_hash(self, kind: str, key: str) -> Optional[str]:
+        """Content hash of a resource or prompt from the server's asset manifest, None without a resource cache"""
+        cache = self.resource_cache
+        if not cache:
+            return None
+        if cache.manifest is None:
+            try:
+                manifest = await self.session.read_resource(AnyUrl(cache.manifest_uri))
+                cache.manifest = json.loads(manifest.contents[0].text)
+            except Exception as e:
+                # Servers without a manifest are read directly
+                print(f'No asset manifest, resource cache disabled for this session: {e}')
+                cache.manifest = {}
+        return cache.hash_for(kind, key)
 
     async def get_prompts(self) -> list[Prompt]:
         """Get available prompts from MCP server"""
@@ -162,7 +300,14 @@ class MCPClient:
         # 4. Return `combined_content`
         # raise NotImplementedError()
 
+        sha256 = await self._manifest_hash("prompts", name)
+        # The combined text differs from the raw body the hash covers, so it gets its own key
+        cache_key = f"{sha256}.prompt" if sha256 else None
+        if cache_key and (cached := self.resource_cache.get(cache_key)) is not None:
+            return cached
+
         combined_content = ''
+        body = ''
 
         prompt = await self.session.get_prompt(name)
 
@@ -174,7 +319,11 @@ class MCPClient:
                     combined_content += content.text
                 else:
                     combined_content += content.text
+                body += content.text
 
                 combined_content += '\n'
 
+        # Stored only when the prompt matches the manifest, like resources in `get_resource`
+        if cache_key and content_hash(body, False) == sha256:
+            self.resource_cache.set(cache_key, combined_content)
         return combined_content
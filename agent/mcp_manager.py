@@ -0,0 +1,331 @@
+import asyncio
+import contextlib
+import itertools
+import random
+import re
+from typing import Any, Awaitable, Callable, Optional
+
+import anyio
+import httpx
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+
+from agent.mcp_client import MCPClient
+from agent.resource_cache import ResourceCache
+from agent.tool_cache import MUTATING_TOOLS, ToolResultCache
+
+MAX_CALL_ATTEMPTS = 3
+RECONNECT_BACKOFF_SECONDS = 0.5
+RECONNECT_MAX_BACKOFF_SECONDS = 10.0
+HEALTH_CHECK_SECONDS = 0.5
+
+TRANSPORT_ERRORS = (
+    OSError, httpx.TransportError, anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream
+)
+
+
+def parse_mcp_servers(value: str) -> dict[str, list[str]]:
+    """Parses `name=url|url,name=url` (replicas separated by `|`) into {name: [urls]}"""
+    servers = {}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        name, _, urls = entry.partition("=")
+        servers[name.strip()] = [url.strip() for url in urls.split("|") if url.strip()]
+    return servers
+
+
+class _Replica:
+    """
+    One connection to one server replica. The connection is opened and closed by its own long-lived task,
+    because MCP transports must be entered and exited by the same task.
+    """
+
+    def __init__(self, create_client: Callable[[], MCPClient]) -> None:
+        self.create_client = create_client
+        self.client: Optional[MCPClient] = None
+        self.broken = True
+        self.in_flight = 0
+        self.lock = asyncio.Lock()
+        # Resolved when the current connection is lost, calls waiting on it are then retried elsewhere
+        self.lost: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.on_list_changed: Optional[Callable[[str], Awaitable[None]]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = asyncio.Event()
+
+    async def _run(self, client: MCPClient, ready: asyncio.Event):
+        async with client:
+            self.client = client
+            ready.set()
+            while not client.connection_lost and not self._closing.is_set():
+                with contextlib.suppress(asyncio.TimeoutError):
+                    await asyncio.wait_for(self._closing.wait(), HEALTH_CHECK_SECONDS)
+
+    async def connect(self):
+        await self.close()
+        client = self.create_client()
+        client.on_list_changed = self.on_list_changed
+        ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self.lost = lost = asyncio.get_running_loop().create_future()
+        self._task = task = asyncio.create_task(self._run(client, ready))
+
+        def on_done(_):
+            if not lost.done():
+                lost.set_result(None)
+            if self._task is task:
+                self.broken = True
+
+        task.add_done_callback(on_done)
+
+        # A failed connect may leave `initialize` waiting forever, so also watch the transport
+        ready_waiter = asyncio.create_task(ready.wait())
+        while not ready.is_set() and not task.done():
+            if client.connection_lost:
+                task.cancel()
+                break
+            await asyncio.wait(
+                {task, ready_waiter}, timeout=HEALTH_CHECK_SECONDS, return_when=asyncio.FIRST_COMPLETED
+            )
+        ready_waiter.cancel()
+        if not ready.is_set():
+            await asyncio.wait({task})
+            error = None if task.cancelled() else task.exception()
+            raise ConnectionError(f"connection failed: {error or 'transport closed'}") from error
+        self.broken = False
+
+    async def close(self):
+        self.broken = True
+        self.client = None
+        if self._task is not None:
+            self._closing.set()
+            # Errors of a dropped connection are expected here, `wait` does not re-raise them
+            await asyncio.wait({self._task})
+            if not self._task.cancelled():
+                self._task.exception()
+            self._task = None
+
+
+class MCPServerPool:
+    """
+    Sessions to the replicas of one MCP server, with the MCPClient API.
+    Calls go to the replica with the fewest in-flight calls. A call that fails with a connection error marks the
+    replica broken and is retried on another replica; broken replicas reconnect with exponential backoff.
+    Other errors come from a healthy session and are raised unchanged. Mutating tools are not retried once the
+    request may have been sent, the first attempt may already have been applied.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            client_factories: list[Callable[[], MCPClient]],
+            max_attempts: int = MAX_CALL_ATTEMPTS,
+            backoff: float = RECONNECT_BACKOFF_SECONDS,
+            max_backoff: float = RECONNECT_MAX_BACKOFF_SECONDS,
+            tool_cache: Optional[ToolResultCache] = None,
+            mutating_tools: frozenset[str] = MUTATING_TOOLS,
+    ) -> None:
+        if not client_factories:
+            raise ValueError(f"MCP server '{name}' has no replicas")
+        self.name = name
+        self.replicas = [_Replica(factory) for factory in client_factories]
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.mutating_tools = mutating_tools
+        # Only kept for reporting, the clients created by the factories do the caching
+        self.tool_cache = tool_cache
+        self.reconnects = 0
+        self._round_robin = itertools.count()
+
+    @classmethod
+    def from_urls(
+            cls,
+            name: str,
+            urls: list[str],
+            tool_cache: Optional[ToolResultCache] = None,
+            resource_cache: Optional[ResourceCache] = None,
+            **kwargs,
+    ):
+        """Streamable HTTP replicas, sharing one tool result cache and one resource cache"""
+        return cls(
+            name,
+            [lambda url=url: MCPClient(url, tool_cache=tool_cache, resource_cache=resource_cache) for url in urls],
+            tool_cache=tool_cache,
+            **kwargs,
+        )
+
+    @property
+    def connected(self) -> bool:
+        return any(not replica.broken for replica in self.replicas)
+
+    @property
+    def on_list_changed(self) -> Optional[Callable[[str], Awaitable[None]]]:
+        return self.replicas[0].on_list_changed
+
+    @on_list_changed.setter
+    def on_list_changed(self, callback: Optional[Callable[[str], Awaitable[None]]]):
+        for replica in self.replicas:
+            replica.on_list_changed = callback
+            if replica.client:
+                replica.client.on_list_changed = callback
+
+    @property
+    def server_key(self) -> str:
+        client = next(replica.client for replica in self.replicas if replica.client)
+        server_info = client.initialize_result.serverInfo
+        return f"pool://{self.name}|{server_info.name}|{server_info.version}"
+
+    async def connect(self):
+        """Connects all replicas concurrently, fails only when none of them is reachable"""
+        results = await asyncio.gather(*(replica.connect() for replica in self.replicas), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if len(errors) == len(self.replicas):
+            raise ConnectionError(f"Cannot connect to any replica of MCP server '{self.name}': {errors[0]}")
+        for error in errors:
+            print(f'MCP server {self.name}: replica unavailable, will retry on demand: {error}')
+
+    async def close(self):
+        await asyncio.gather(*(replica.close() for replica in self.replicas))
+
+    def _pick_replica(self, exclude: set[int]) -> _Replica:
+        candidates = [i for i in range(len(self.replicas)) if i not in exclude] or list(range(len(self.replicas)))
+        healthy = [i for i in candidates if not self.replicas[i].broken] or candidates
+        offset = next(self._round_robin)
+        best = min(
+            healthy,
+            key=lambda i: (self.replicas[i].in_flight, (i - offset) % len(self.replicas)),
+        )
+        return self.replicas[best]
+
+    async def _ensure_connected(self, replica: _Replica):
+        async with replica.lock:
+            attempt = 0
+            while replica.broken:
+                try:
+                    await replica.connect()
+                    self.reconnects += 1
+                except Exception as e:
+                    attempt += 1
+                    if attempt >= self.max_attempts:
+                        raise ConnectionError(f"MCP server {self.name}: reconnect failed: {e}") from e
+                    delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+                    await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    @staticmethod
+    def _is_transport_error(error: Exception, client: Optional[MCPClient]) -> bool:
+        if isinstance(error, McpError):
+            return error.error.code == CONNECTION_CLOSED
+        return isinstance(error, TRANSPORT_ERRORS) or (client is not None and client.connection_lost)
+
+    async def _call(self, method: str, *args, retry_after_send: bool = True, **kwargs) -> Any:
+        tried: set[int] = set()
+        last_error: Optional[Exception] = None
+        for _ in range(self.max_attempts):
+            replica = self._pick_replica(tried)
+            tried.add(self.replicas.index(replica))
+            try:
+                await self._ensure_connected(replica)
+            except ConnectionError as e:
+                last_error = e
+                continue
+
+            replica.in_flight += 1
+            client = replica.client
+            call = asyncio.ensure_future(getattr(client, method)(*args, **kwargs))
+            try:
+                await asyncio.wait({call, replica.lost}, return_when=asyncio.FIRST_COMPLETED)
+                if not call.done():
+                    raise ConnectionError("connection lost")
+                return call.result()
+            except Exception as e:
+                if not self._is_transport_error(e, client):
+                    # E.g. an unknown resource or prompt: the session is fine and another attempt would fail the same
+                    raise
+                print(f'MCP server {self.name}: {method} failed, reconnecting: {e}')
+                last_error = e
+                replica.broken = True
+                if not retry_after_send:
+                    raise ConnectionError(
+                        f"MCP server {self.name}: connection lost during {method}, it may have been applied "
+                        f"and is not retried"
+                    ) from e
+            finally:
+                if not call.done():
+                    call.cancel()
+                replica.in_flight -= 1
+        raise ConnectionError(f"MCP server {self.name}: {method} failed after {self.max_attempts} attempts") \
+            from last_error
+
+    async def get_tools(self) -> list[dict[str, Any]]:
+        return await self._call("get_tools")
+
+    async def call_tool(self, tool_name: str, tool_args: dict[str, Any]) -> Any:
+        return await self._call(
+            "call_tool", tool_name=tool_name, tool_args=tool_args, retry_after_send=tool_name not in self.mutating_tools
+        )
+
+    async def get_resources(self):
+        return await self._call("get_resources")
+
+    async def get_resource(self, uri):
+        return await self._call("get_resource", uri)
+
+    async def get_prompts(self):
+        return await self._call("get_prompts")
+
+    async def get_prompt(self, name: str) -> str:
+        return await self._call("get_prompt", name)
+
+
+class MCPConnectionManager:
+    """
+    Several MCP servers behind one `get_tools`/`call_tool` API.
+    Tool names that exist on more than one server are exposed as `<server>__<tool>`; `call_tool` routes every
+    exposed name back to its server and original tool name.
+    """
+
+    def __init__(self, pools: list[MCPServerPool]) -> None:
+        self.pools = {pool.name: pool for pool in pools}
+        self._routes: dict[str, tuple[MCPServerPool, str]] = {}
+
+    async def __aenter__(self):
+        results = await asyncio.gather(*(pool.connect() for pool in self.pools.values()), return_exceptions=True)
+        for pool, result in zip(self.pools.values(), results):
+            if isinstance(result, BaseException):
+                print(f'Skipping MCP server {pool.name}: {result}')
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await asyncio.gather(*(pool.close() for pool in self.pools.values()))
+
+    def route_tools(self, tools_by_server: dict[str, list[dict[str, Any]]]) -> list[dict[str, Any]]:
+        """Merges per-server tool lists (DIAL format), renaming colliding tools, and updates routing"""
+        counts: dict[str, int] = {}
+        for tools in tools_by_server.values():
+            for tool in tools:
+                counts[tool['function']['name']] = counts.get(tool['function']['name'], 0) + 1
+
+        merged = []
+        routes = {}
+        for server_name, tools in tools_by_server.items():
+            prefix = re.sub(r"[^a-zA-Z0-9_-]", "_", server_name)
+            for tool in tools:
+                name = tool['function']['name']
+                exposed = name if counts[name] == 1 else f"{prefix}__{name}"[:64]
+                routes[exposed] = (self.pools[server_name], name)
+                merged.append({**tool, 'function': {**tool['function'], 'name': exposed}})
+
+        self._routes = routes
+        return merged
+
+    async def get_tools(self) -> list[dict[str, Any]]:
+        names = list(self.pools)
+        results = await asyncio.gather(*(self.pools[name].get_tools() for name in names), return_exceptions=True)
+        return self.route_tools(
+            {name: tools for name, tools in zip(names, results) if not isinstance(tools, BaseException)}
+        )
+
+    async def call_tool(self, tool_name: str, tool_args: dict[str, Any]) -> Any:
+        if tool_name not in self._routes:
+            raise ValueError(f"Unknown tool: {tool_name}")
+        pool, original_name = self._routes[tool_name]
+        return await pool.call_tool(original_name, tool_args)
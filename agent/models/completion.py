@@ -0,0 +1,26 @@
+from enum import StrEnum
+
+from pydantic import BaseModel
+
+from agent.models.message import Message
+
+
+class StopReason(StrEnum):
+    COMPLETED = "completed"
+    MAX_TOOL_ROUNDS = "max_tool_rounds"
+    DEADLINE = "deadline"
+    TOKEN_BUDGET = "token_budget"
+
+
+class CompletionResult(BaseModel):
+    message: Message
+    stop_reason: StopReason
+    tool_rounds: int = 0
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
@@ -43,4 +43,9 @@ You are a User Management Agent responsible for managing user accounts and profi
 - Show what action will be taken
 - Provide the result or status
 - Offer next steps or additional help
-"""
\ No newline at end of file
+"""
+SUMMARY_PROMPT="""
+Summarize the following part of a conversation between a user and the User Management Agent.
+Keep user ids, names and emails that were found, created, updated or deleted, open questions and user preferences.
+Drop raw tool output. Answer with a short bullet list, no more than 10 bullets.
+"""
@@ -0,0 +1,70 @@
+import base64
+import hashlib
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+ASSET_MANIFEST_URI = "users-management://asset-manifest"
+RESOURCE_CACHE_DIR = Path(
+    os.getenv("MCP_RESOURCE_CACHE_DIR", Path.home() / ".cache" / "users-management-agent" / "resources")
+)
+
+
+def content_hash(value: str, is_blob: bool) -> str:
+    """SHA-256 of the raw content, as published in the server's asset manifest"""
+    return hashlib.sha256(base64.b64decode(value) if is_blob else value.encode()).hexdigest()
+
+
+class ResourceCache:
+    """
+    Content-addressed cache of resource and prompt contents, keyed by the SHA-256 from the server's asset manifest.
+    Entries are kept in memory and, with `directory`, on disk, so they survive restarts and are shared between
+    servers that publish the same content. The manifest itself is read once per session (and again after the
+    server announces a resource list change).
+    """
+
+    def __init__(self, directory: Optional[Path] = RESOURCE_CACHE_DIR, manifest_uri: str = ASSET_MANIFEST_URI) -> None:
+        self.directory = Path(directory) if directory else None
+        self.manifest_uri = manifest_uri
+        self.manifest: Optional[dict[str, Any]] = None
+        self._entries: dict[str, str] = {}
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+
+    def invalidate_manifest(self):
+        self.manifest = None
+
+    def _path(self, sha256: str) -> Optional[Path]:
+        return self.directory / sha256 if self.directory else None
+
+    def hash_for(self, kind: str, key: str) -> Optional[str]:
+        """Hash of a resource uri (`kind="resources"`) or prompt name (`kind="prompts"`) in the current manifest"""
+        if not self.manifest:
+            return None
+        entry = self.manifest.get(kind, {}).get(key)
+        return entry["sha256"] if entry else None
+
+    def get(self, sha256: str) -> Optional[str]:
+        value = self._entries.get(sha256)
+        path = self._path(sha256)
+        if value is None and path and path.exists():
+            value = self._entries[sha256] = path.read_text()
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.bytes_saved += len(value)
+        return value
+
+    def set(self, sha256: str, value: str):
+        self._entries[sha256] = value
+        path = self._path(sha256)
+        if path:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(".tmp")
+            tmp_path.write_text(value)
+            tmp_path.replace(path)
+
+    def report(self) -> str:
+        return f"Resource cache: {self.hits} hits, {self.misses} misses, {self.bytes_saved} bytes not re-read"
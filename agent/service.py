@@ -0,0 +1,285 @@
+"""
+Async HTTP/SSE service mode of the agent: many independent conversations per process.
+
+All conversations share one DialClient (one pooled HTTP client to DIAL) and one MCPConnectionManager
+(MCP_SESSIONS_PER_REPLICA sessions to every server replica). History is kept per (tenant, session id), turns of one
+session run one at a time, and each tenant has at most TENANT_MAX_CONCURRENT_TURNS turns in flight.
+
+Run from the repository root:
+    python -m agent.service
+
+    POST   /v1/sessions/{session_id}/messages   {"content": "..."}   (header X-Tenant-Id, default "default")
+           With `Accept: text/event-stream` the answer is streamed: `token` events with content as it arrives,
+           then `done` with the final message and usage (or `error`). Otherwise one JSON response.
+    DELETE /v1/sessions/{session_id}
+    GET    /v1/stats, /health
+"""
+import asyncio
+import json
+import os
+import time
+from typing import Any, Optional
+
+from aiohttp import web
+
+from agent.app import (
+    API_KEY, COMPLETION_CACHE, DIAL_ENDPOINT, HISTORY_TOKEN_BUDGET, SUMMARIZE_HISTORY,
+    create_pools, create_tool_exposure, load_catalogs, pinned_messages, route_catalog_tools, update_tool_exposure,
+)
+from agent.completion_cache import CompletionCache
+from agent.dial_client import DialClient, TokenCallback
+from agent.history import ConversationHistory
+from agent.mcp_manager import MCPConnectionManager
+from agent.models.completion import CompletionResult
+from agent.models.message import Message, Role
+from agent.tool_cache import tool_cache_scope
+
+SERVICE_HOST = os.getenv('SERVICE_HOST', '0.0.0.0')
+SERVICE_PORT = int(os.getenv('SERVICE_PORT', '8080'))
+TENANT_MAX_CONCURRENT_TURNS = int(os.getenv('TENANT_MAX_CONCURRENT_TURNS', '8'))
+SESSION_IDLE_TTL_SECONDS = float(os.getenv('SESSION_IDLE_TTL_SECONDS', '1800'))
+MAX_SESSIONS = int(os.getenv('MAX_SESSIONS', '10000'))
+MCP_SESSIONS_PER_REPLICA = int(os.getenv('MCP_SESSIONS_PER_REPLICA', '4'))
+
+
+class AgentSession:
+    """History of one conversation; the lock keeps its turns in order. Tool results are cached per `scope`"""
+
+    def __init__(self, history: ConversationHistory, scope: tuple[str, str]) -> None:
+        self.history = history
+        self.scope = scope
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+        self.turns = 0
+
+    async def run_turn(self, dial_client: DialClient, content: str, on_token: TokenCallback) -> CompletionResult:
+        user_message = Message(role=Role.USER, content=content)
+        messages = self.history.for_request() + [user_message]
+        sent = len(messages)
+        with tool_cache_scope(self.scope):
+            completion = await dial_client.get_completion(messages, on_token)
+
+        # Only a finished turn is recorded, a cancelled one (client went away) leaves the history as it was
+        self.history.append(user_message)
+        self.history.extend(messages[sent:])
+        self.history.append(completion.message)
+        self.turns += 1
+        return completion
+
+
+class SessionStore:
+    """Sessions by (tenant, session id); idle ones expire, the least recently used go first beyond `max_sessions`"""
+
+    def __init__(
+            self,
+            pinned: list[Message],
+            dial_client: DialClient,
+            idle_ttl: float = SESSION_IDLE_TTL_SECONDS,
+            max_sessions: int = MAX_SESSIONS,
+    ) -> None:
+        self.pinned = pinned
+        self.dial_client = dial_client
+        self.idle_ttl = idle_ttl
+        self.max_sessions = max_sessions
+        self._sessions: dict[tuple[str, str], AgentSession] = {}
+        self.created = 0
+        self.expired = 0
+
+    def _new_session(self, key: tuple[str, str]) -> AgentSession:
+        history = ConversationHistory(
+            token_budget=HISTORY_TOKEN_BUDGET,
+            summarizer=self.dial_client.summarize if SUMMARIZE_HISTORY else None,
+        )
+        for message in self.pinned:
+            history.pin(message)
+        self.created += 1
+        return AgentSession(history, key)
+
+    def _evict(self):
+        now = time.monotonic()
+        for key, session in list(self._sessions.items()):
+            if now - session.last_used > self.idle_ttl and not session.lock.locked():
+                del self._sessions[key]
+                self.expired += 1
+        if len(self._sessions) >= self.max_sessions:
+            idle = sorted(
+                (session.last_used, key) for key, session in self._sessions.items() if not session.lock.locked()
+            )
+            for _, key in idle[:len(self._sessions) - self.max_sessions + 1]:
+                del self._sessions[key]
+                self.expired += 1
+
+    def get(self, tenant: str, session_id: str) -> AgentSession:
+        key = (tenant, session_id)
+        session = self._sessions.get(key)
+        if session is None:
+            self._evict()
+            session = self._sessions[key] = self._new_session(key)
+        session.last_used = time.monotonic()
+        return session
+
+    def drop(self, tenant: str, session_id: str) -> bool:
+        return self._sessions.pop((tenant, session_id), None) is not None
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class TenantLimiter:
+    """At most `max_concurrent` turns in flight per tenant, over the limit is rejected rather than queued"""
+
+    def __init__(self, max_concurrent: int = TENANT_MAX_CONCURRENT_TURNS) -> None:
+        self.max_concurrent = max_concurrent
+        self.in_flight: dict[str, int] = {}
+        self.rejected = 0
+
+    def try_acquire(self, tenant: str) -> bool:
+        if self.in_flight.get(tenant, 0) >= self.max_concurrent:
+            self.rejected += 1
+            return False
+        self.in_flight[tenant] = self.in_flight.get(tenant, 0) + 1
+        return True
+
+    def release(self, tenant: str):
+        self.in_flight[tenant] -= 1
+        if not self.in_flight[tenant]:
+            del self.in_flight[tenant]
+
+
+def _completion_payload(completion: CompletionResult) -> dict[str, Any]:
+    return {
+        "message": completion.message.content,
+        "stop_reason": completion.stop_reason,
+        "tool_rounds": completion.tool_rounds,
+        "prompt_tokens": completion.prompt_tokens,
+        "completion_tokens": completion.completion_tokens,
+        "elapsed": round(completion.elapsed, 3),
+    }
+
+
+async def _send_event(response: web.StreamResponse, event: str, data: dict[str, Any]):
+    await response.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+
+
+class AgentService:
+
+    def __init__(self, dial_client: DialClient, sessions: SessionStore, limiter: TenantLimiter) -> None:
+        self.dial_client = dial_client
+        self.sessions = sessions
+        self.limiter = limiter
+
+    async def handle_message(self, request: web.Request) -> web.StreamResponse:
+        tenant = request.headers.get("X-Tenant-Id", "default")
+        try:
+            content = (await request.json())["content"]
+        except (ValueError, KeyError, TypeError):
+            return web.json_response({"detail": "Body must be JSON with `content`"}, status=400)
+
+        if not self.limiter.try_acquire(tenant):
+            return web.json_response(
+                {"detail": f"Tenant {tenant} has {self.limiter.max_concurrent} turns in flight"},
+                status=429,
+                headers={"Retry-After": "1"},
+            )
+        try:
+            session = self.sessions.get(tenant, request.match_info["session_id"])
+            async with session.lock:
+                if "text/event-stream" in request.headers.get("Accept", ""):
+                    return await self._stream_turn(request, session, content)
+                try:
+                    completion = await session.run_turn(self.dial_client, content, _discard_token)
+                except Exception as e:
+                    return web.json_response({"detail": f"Turn failed: {e}"}, status=502)
+                return web.json_response(_completion_payload(completion))
+        finally:
+            self.limiter.release(tenant)
+
+    async def _stream_turn(self, request: web.Request, session: AgentSession, content: str) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        await response.prepare(request)
+
+        async def on_token(token: str):
+            await _send_event(response, "token", {"content": token})
+
+        try:
+            completion = await session.run_turn(self.dial_client, content, on_token)
+            await _send_event(response, "done", _completion_payload(completion))
+        except (ConnectionResetError, asyncio.CancelledError):
+            raise
+        except Exception as e:
+            await _send_event(response, "error", {"detail": str(e)})
+        await response.write_eof()
+        return response
+
+    async def handle_delete(self, request: web.Request) -> web.Response:
+        tenant = request.headers.get("X-Tenant-Id", "default")
+        if not self.sessions.drop(tenant, request.match_info["session_id"]):
+            return web.json_response({"detail": "Session not found"}, status=404)
+        return web.Response(status=204)
+
+    async def handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response({
+            "sessions": len(self.sessions),
+            "sessions_created": self.sessions.created,
+            "sessions_expired": self.sessions.expired,
+            "turns_in_flight": self.limiter.in_flight,
+            "turns_rejected": self.limiter.rejected,
+            "completion_cache": cache.report() if (cache := self.dial_client.completion_cache) else None,
+        })
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok"})
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes(
+            [
+                web.post("/v1/sessions/{session_id}/messages", self.handle_message),
+                web.delete("/v1/sessions/{session_id}", self.handle_delete),
+                web.get("/v1/stats", self.handle_stats),
+                web.get("/health", self.handle_health),
+            ]
+        )
+        return app
+
+
+async def _discard_token(_: str):
+    """JSON mode answers at the end, streamed tokens are not printed on the server console either"""
+
+
+async def main(host: str = SERVICE_HOST, port: int = SERVICE_PORT, ready: Optional[asyncio.Event] = None):
+    async with MCPConnectionManager(create_pools(MCP_SESSIONS_PER_REPLICA)) as mcp_manager:
+        catalog_managers = await load_catalogs(mcp_manager)
+        dial_client = DialClient(
+            api_key=API_KEY,
+            endpoint=DIAL_ENDPOINT,
+            tools=route_catalog_tools(mcp_manager, catalog_managers),
+            mcp_client=mcp_manager,
+            tool_exposure=create_tool_exposure(catalog_managers),
+            completion_cache=CompletionCache() if COMPLETION_CACHE else None,
+        )
+        sessions = SessionStore(pinned_messages(catalog_managers), dial_client)
+
+        def on_catalog_update(_):
+            dial_client.tools = route_catalog_tools(mcp_manager, catalog_managers)
+            sessions.pinned = pinned_messages(catalog_managers)
+            update_tool_exposure(dial_client.tool_exposure, catalog_managers)
+
+        for catalog_manager in catalog_managers.values():
+            catalog_manager.on_update = on_catalog_update
+
+        service = AgentService(dial_client, sessions, TenantLimiter())
+        runner = web.AppRunner(service.create_app(), access_log=None)
+        await runner.setup()
+        await web.TCPSite(runner, host, port).start()
+        print(f'Agent service listening on http://{host}:{port}')
+        if ready:
+            ready.set()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
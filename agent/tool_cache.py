@@ -0,0 +1,90 @@
+import contextlib
+import json
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Hashable, Optional
+
+READ_ONLY_TOOLS = frozenset({"get_user_by_id", "search_user", "get_users_by_ids", "aggregate_users"})
+MUTATING_TOOLS = frozenset(
+    {"add_user", "update_user", "delete_user", "bulk_add_users", "bulk_update_users", "bulk_delete_users"}
+)
+TOOL_CACHE_TTL_SECONDS = 120.0
+TOOL_CACHE_MAX_ENTRIES = 256
+
+# Conversation the current tool calls belong to; tool calls started with asyncio.gather or create_task inherit it
+_cache_scope: ContextVar[Optional[Hashable]] = ContextVar("tool_cache_scope", default=None)
+
+
+@contextlib.contextmanager
+def tool_cache_scope(scope: Hashable):
+    """Results cached inside the block are only served back to calls made in the same scope"""
+    token = _cache_scope.set(scope)
+    try:
+        yield
+    finally:
+        _cache_scope.reset(token)
+
+
+class ToolResultCache:
+    """
+    Memoizes results of read-only tool calls, keyed by the current `tool_cache_scope`, tool name and canonical JSON
+    of the arguments. Any mutating tool call clears the cache; a read that was in flight during a mutation is not
+    stored.
+    """
+
+    def __init__(
+            self,
+            cacheable_tools: frozenset[str] = READ_ONLY_TOOLS,
+            mutating_tools: frozenset[str] = MUTATING_TOOLS,
+            ttl: float = TOOL_CACHE_TTL_SECONDS,
+            max_entries: int = TOOL_CACHE_MAX_ENTRIES,
+    ) -> None:
+        self.cacheable_tools = cacheable_tools
+        self.mutating_tools = mutating_tools
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.generation = 0
+        self._entries: OrderedDict[tuple[Optional[Hashable], str, str], tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(tool_name: str, tool_args: dict[str, Any]) -> tuple[Optional[Hashable], str, str]:
+        return _cache_scope.get(), tool_name, json.dumps(tool_args, sort_keys=True, separators=(",", ":"), default=str)
+
+    def get(self, tool_name: str, tool_args: dict[str, Any]) -> Optional[Any]:
+        key = self.key(tool_name, tool_args)
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self._entries.pop(key, None)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, tool_name: str, tool_args: dict[str, Any], result: Any, generation: int):
+        """`generation` is the value seen before the call, a mutation since then makes the result unsafe to store"""
+        if generation != self.generation:
+            return
+        key = self.key(tool_name, tool_args)
+        self._entries[key] = (time.monotonic() + self.ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self):
+        self.generation += 1
+        self.invalidations += 1
+        self._entries.clear()
+
+    def report(self) -> str:
+        lookups = self.hits + self.misses
+        hit_rate = self.hits / lookups if lookups else 0.0
+        return (
+            f"tool cache: {self.hits} hits, {self.misses} misses ({hit_rate:.0%} hit rate), "
+            f"{self.invalidations} invalidations, {len(self._entries)} entries"
+        )
@@ -0,0 +1,166 @@
+import re
+from collections import Counter
+from typing import Any, Optional
+
+from agent.models.message import Message, Role
+from agent.tool_cache import MUTATING_TOOLS
+
+MUTATION_INTENT = re.compile(
+    r"\b(add|create|insert|register|new|update|change|modify|edit|set|rename|move|delete|remove|erase|drop)\b",
+    re.IGNORECASE,
+)
+# MCP prompts sent only in turns that ask for what they help with, other prompts stay pinned
+PROMPT_TRIGGERS = {
+    "make_search_request": re.compile(r"\b(search|find|look|lookup|who|named|list|show)\b", re.IGNORECASE),
+    "create_user_request": re.compile(r"\b(add|create|register|new|generate)\b", re.IGNORECASE),
+}
+_DEF_PREFIX = "#/$defs/"
+
+
+def _strip(node: Any) -> Any:
+    """Drops titles and `default: null`, an optional `anyOf [X, null]` becomes X, descriptions lose indentation"""
+    if isinstance(node, list):
+        return [_strip(item) for item in node]
+    if not isinstance(node, dict):
+        return node
+
+    result = {}
+    for key, value in node.items():
+        if key == "title" and isinstance(value, str) or key == "default" and value is None:
+            continue
+        if key == "description" and isinstance(value, str):
+            result[key] = " ".join(value.split())
+        elif key in ("properties", "$defs"):
+            # Keys here are property/definition names (a property may be called `title`), not keywords
+            result[key] = {name: _strip(schema) for name, schema in value.items()}
+        else:
+            result[key] = _strip(value)
+
+    any_of = result.get("anyOf")
+    if "default" in node and node["default"] is None and isinstance(any_of, list) and len(any_of) == 2 \
+            and {"type": "null"} in any_of:
+        del result["anyOf"]
+        result = {**next(schema for schema in any_of if schema != {"type": "null"}), **result}
+    return result
+
+
+def _refs(node: Any, counts: Counter):
+    if isinstance(node, list):
+        for item in node:
+            _refs(item, counts)
+    elif isinstance(node, dict):
+        ref = node.get("$ref")
+        if isinstance(ref, str) and ref.startswith(_DEF_PREFIX):
+            counts[ref[len(_DEF_PREFIX):]] += 1
+        for value in node.values():
+            _refs(value, counts)
+
+
+def minify_schema(schema: dict[str, Any]) -> dict[str, Any]:
+    """
+    Same constraints in fewer tokens: see `_strip`, plus definitions used once are inlined and unused ones dropped.
+    Definitions used more than once (or recursively) stay in `$defs`.
+    """
+    schema = _strip(schema)
+    defs = schema.pop("$defs", {})
+    counts = Counter()
+    _refs(schema, counts)
+    _refs(defs, counts)
+    kept = {name for name, count in counts.items() if count > 1}
+
+    def inline(node: Any, stack: tuple[str, ...]) -> Any:
+        if isinstance(node, list):
+            return [inline(item, stack) for item in node]
+        if not isinstance(node, dict):
+            return node
+        ref = node.get("$ref")
+        if isinstance(ref, str) and ref.startswith(_DEF_PREFIX):
+            name = ref[len(_DEF_PREFIX):]
+            if name in defs and name not in kept:
+                if name in stack:
+                    kept.add(name)
+                else:
+                    siblings = {key: value for key, value in node.items() if key != "$ref"}
+                    return inline({**defs[name], **siblings}, stack + (name,))
+        return {key: inline(value, stack) for key, value in node.items()}
+
+    schema = inline(schema, ())
+    resolved = {}
+    # Inlining may mark recursive definitions as kept, so resolve until nothing new is added
+    while pending := [name for name in kept if name in defs and name not in resolved]:
+        for name in pending:
+            resolved[name] = inline(defs[name], (name,))
+    if resolved:
+        schema["$defs"] = resolved
+    return schema
+
+
+def minify_tool(tool: dict[str, Any]) -> dict[str, Any]:
+    function = tool["function"]
+    minified = {"name": function["name"], "description": " ".join((function.get("description") or "").split())}
+    if function.get("parameters") is not None:
+        minified["parameters"] = minify_schema(function["parameters"])
+    return {**tool, "function": minified}
+
+
+def base_tool_name(name: str) -> str:
+    """Tool name without the `<server>__` prefix MCPConnectionManager adds on name collisions"""
+    return name.rsplit("__", 1)[-1]
+
+
+class ToolExposure:
+    """
+    Decides what each LLM request carries besides the conversation: tool schemas, minified when `minify` is set,
+    and with `subset` only read-only tools unless the turn asks for a change, plus the MCP prompts in `prompts`
+    (name -> message) for turns that match their PROMPT_TRIGGERS.
+    """
+
+    def __init__(
+            self,
+            minify: bool = True,
+            subset: bool = False,
+            prompts: Optional[dict[str, Message]] = None,
+            mutating_tools: frozenset[str] = MUTATING_TOOLS,
+    ) -> None:
+        self.minify = minify
+        self.subset = subset
+        self.prompts = prompts or {}
+        self.mutating_tools = mutating_tools
+        self._source: Optional[list[dict[str, Any]]] = None
+        self._minified: list[dict[str, Any]] = []
+
+    def _minified_tools(self, tools: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        # DialClient replaces its tools list on catalog updates, so the identity check is enough
+        if tools is not self._source:
+            self._source = tools
+            self._minified = [minify_tool(tool) for tool in tools]
+        return self._minified
+
+    @staticmethod
+    def _turn(messages: list[Message]) -> tuple[Optional[int], str]:
+        """Index of the user message of the current turn and the text intent is read from"""
+        last_user = next((i for i in range(len(messages) - 1, -1, -1) if messages[i].role == Role.USER), None)
+        if last_user is None:
+            return None, ""
+        text = messages[last_user].content or ""
+        # "yes" to "Should I delete user 5?" is a mutation too
+        if last_user and messages[last_user - 1].role == Role.AI:
+            text = f"{messages[last_user - 1].content or ''}\n{text}"
+        return last_user, text
+
+    def prepare(
+            self, messages: list[Message], tools: list[dict[str, Any]]
+    ) -> tuple[list[Message], list[dict[str, Any]]]:
+        """Messages and tools for one LLM request, `messages` itself is not changed"""
+        if self.minify:
+            tools = self._minified_tools(tools)
+        if not self.subset:
+            return messages, tools
+
+        last_user, text = self._turn(messages)
+        if not MUTATION_INTENT.search(text):
+            tools = [tool for tool in tools if base_tool_name(tool["function"]["name"]) not in self.mutating_tools]
+        on_demand = [message for name, message in self.prompts.items() if PROMPT_TRIGGERS[name].search(text)]
+        if on_demand and last_user is not None:
+            messages = messages[:last_user] + on_demand + messages[last_user:]
+        return messages, tools
@@ -0,0 +1,152 @@
+import contextlib
+import json
+import sys
+import time
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+# Trace of the turn being processed; tool calls started with asyncio.gather inherit it
+_current_turn: ContextVar[Optional["TurnTrace"]] = ContextVar("current_turn", default=None)
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class TurnTrace:
+    """Spans of one user turn, offsets and durations in milliseconds from the start of the turn"""
+
+    def __init__(self, turn: int) -> None:
+        self.turn = turn
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.spans: list[dict[str, Any]] = []
+        self.upstream: dict[str, Any] = {}
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.started
+
+    def add(self, name: str, started: float, duration: float, **attrs: Any):
+        self.spans.append({
+            "name": name,
+            "start_ms": round((started - self.started) * 1000, 3),
+            "duration_ms": round(duration * 1000, 3),
+            **attrs,
+        })
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "turn": self.turn,
+            "duration_ms": round(self.duration * 1000, 3),
+            "spans": self.spans,
+            "upstream": self.upstream,
+        }
+
+
+@contextlib.contextmanager
+def span(name: str, **attrs: Any):
+    """
+    Times the block as a span of the current turn, does nothing outside a traced turn.
+    Yields the attribute dict, so the block can add attributes known only at the end (token counts, cache hits).
+    """
+    turn = _current_turn.get()
+    started = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        if turn is not None:
+            turn.add(name, started, time.perf_counter() - started, **attrs)
+
+
+def record(name: str, started: float, **attrs: Any):
+    """Adds a span that started at `started` (perf_counter) and ends now, e.g. time to first token"""
+    turn = _current_turn.get()
+    if turn is not None:
+        turn.add(name, started, time.perf_counter() - started, **attrs)
+
+
+class Tracer:
+    """
+    Writes one JSON line per turn to `path` (stderr when not set) and keeps span durations for `summary()`.
+    `upstream_probe` returns the MCP server's cumulative upstream latency stats (`users-management://upstream-latency`);
+    each turn records the calls and time added since the previous turn.
+    """
+
+    def __init__(
+            self,
+            path: Optional[Path] = None,
+            upstream_probe: Optional[Callable[[], Awaitable[dict[str, Any]]]] = None,
+    ) -> None:
+        self.path = Path(path) if path else None
+        self.upstream_probe = upstream_probe
+        self.turns = 0
+        self._durations: dict[str, list[float]] = {}
+        self._upstream: dict[str, Any] = {}
+
+    async def _probe_upstream(self) -> dict[str, Any]:
+        try:
+            return await self.upstream_probe()
+        except Exception as e:
+            print(f'Upstream latency probe failed: {e}')
+            return self._upstream
+
+    @contextlib.asynccontextmanager
+    async def turn(self):
+        if self.upstream_probe and not self._upstream:
+            self._upstream = await self._probe_upstream()
+        self.turns += 1
+        trace = TurnTrace(self.turns)
+        token = _current_turn.set(trace)
+        try:
+            yield trace
+        finally:
+            trace.finish()
+            _current_turn.reset(token)
+            if self.upstream_probe:
+                upstream = await self._probe_upstream()
+                trace.upstream = self._upstream_delta(upstream)
+                self._upstream = upstream
+            self._emit(trace)
+
+    def _upstream_delta(self, upstream: dict[str, Any]) -> dict[str, Any]:
+        delta = {}
+        for operation, stats in upstream.items():
+            previous = self._upstream.get(operation, {"count": 0, "total_ms": 0.0})
+            calls = stats["count"] - previous["count"]
+            if calls:
+                delta[operation] = {"calls": calls, "total_ms": round(stats["total_ms"] - previous["total_ms"], 3)}
+        return delta
+
+    def _emit(self, trace: TurnTrace):
+        data = trace.to_dict()
+        self._durations.setdefault("turn", []).append(data["duration_ms"])
+        for item in trace.spans:
+            self._durations.setdefault(item["name"], []).append(item["duration_ms"])
+
+        line = json.dumps(data)
+        if self.path:
+            with self.path.open("a") as fp:
+                fp.write(line + "\n")
+        else:
+            print(line, file=sys.stderr)
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Count and p50/p95 (ms) per phase over the session"""
+        return {
+            name: {
+                "count": len(samples),
+                "p50_ms": round(percentile(samples, 0.5), 3),
+                "p95_ms": round(percentile(samples, 0.95), 3),
+            }
+            for name, samples in self._durations.items()
+        }
+
+    def summary(self) -> str:
+        """p50/p95 per phase over the session, plus the server-side upstream percentiles when probed"""
+        phases = {**self.stats(), **{f"upstream {operation}": stats for operation, stats in self._upstream.items()}}
+        lines = [f"{'phase':<32}{'count':>7}{'p50 ms':>11}{'p95 ms':>11}"]
+        for name, stats in phases.items():
+            lines.append(f"{name:<32}{stats['count']:>7}{stats['p50_ms']:>11.1f}{stats['p95_ms']:>11.1f}")
+        return "\n".join(lines)
@@ -0,0 +1,48 @@
+import hashlib
+from pathlib import Path
+from typing import Any, Union
+
+ASSET_DIR = Path(__file__).resolve().parent
+
+
+class Asset:
+    """Immutable content loaded once, with its SHA-256 computed up front"""
+
+    def __init__(self, content: Union[bytes, str], mime_type: str) -> None:
+        self.content = content
+        self.mime_type = mime_type
+        raw = content.encode() if isinstance(content, str) else content
+        self.sha256 = hashlib.sha256(raw).hexdigest()
+        self.size = len(raw)
+
+    def data(self) -> Union[bytes, str]:
+        return self.content
+
+    def describe(self) -> dict[str, Any]:
+        return {"sha256": self.sha256, "size": self.size, "mime_type": self.mime_type}
+
+
+class AssetStore:
+    """Static resources and prompt bodies, read once at startup instead of on every request"""
+
+    def __init__(self, base_dir: Path = ASSET_DIR) -> None:
+        self.base_dir = Path(base_dir)
+        self.resources: dict[str, Asset] = {}
+        self.prompts: dict[str, Asset] = {}
+
+    def add_file(self, uri: str, path: str, mime_type: str) -> Asset:
+        with open(self.base_dir / path, "rb") as fp:
+            content = fp.read()
+        self.resources[uri] = Asset(content, mime_type)
+        return self.resources[uri]
+
+    def add_prompt(self, name: str, body: str) -> Asset:
+        self.prompts[name] = Asset(body, "text/plain")
+        return self.prompts[name]
+
+    def manifest(self) -> dict[str, Any]:
+        """Content hashes clients use to skip re-reading what they already have"""
+        return {
+            "resources": {uri: asset.describe() for uri, asset in self.resources.items()},
+            "prompts": {name: asset.describe() for name, asset in self.prompts.items()},
+        }
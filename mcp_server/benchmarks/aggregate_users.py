@@ -0,0 +1,132 @@
+"""
+`aggregate_users` on the columnar snapshot vs the same aggregation in plain Python over the user records (what the
+agent otherwise does after pulling them through `search_user`, transfer and tokens not included), plus the cost
+of applying writes to the snapshot in place vs reloading it.
+
+Run from the `mcp_server` folder:
+    python -m benchmarks.aggregate_users --sizes 10000 1000000
+"""
+import argparse
+import datetime
+import math
+import random
+import statistics
+import time
+from collections import defaultdict
+
+from benchmarks.user_service_stub import generate_users
+from user_analytics import UserAnalytics, _age, _field_value
+
+QUERIES = [
+    {"operations": ["count"], "group_by": "country"},
+    {"operations": ["mean"], "field": "salary", "group_by": "gender"},
+    {"operations": ["min", "max", "p50", "p95"], "field": "age", "group_by": "company"},
+    {"operations": ["mean", "p90"], "field": "salary", "filters": {"gender": "female", "email": "gmail"}},
+]
+
+
+def python_aggregate(users, operations, field=None, group_by=None, filters=None):
+    """Reference: a pass over the records per query, like code working on fetched search results"""
+    today = datetime.date.today()
+    groups = defaultdict(list)
+    for user in users:
+        if any(
+            query and not (query.lower() == _field_value(user, key).lower() if key == "gender"
+                           else query.lower() in _field_value(user, key).lower())
+            for key, query in (filters or {}).items()
+        ):
+            continue
+        if field == "age":
+            value = _age(user.get("date_of_birth"), today)
+        else:
+            value = user.get(field) if field else None
+        groups[_field_value(user, group_by) if group_by else "all"].append(value)
+
+    rows = []
+    for group, values in groups.items():
+        row = {"group": group, "count": len(values)}
+        present = sorted(value for value in values if value is not None and not math.isnan(value))
+        for operation in operations:
+            if operation == "count":
+                continue
+            if operation == "sum":
+                row[operation] = sum(present)
+            elif operation == "mean":
+                row[operation] = statistics.fmean(present)
+            elif operation == "min":
+                row[operation] = present[0]
+            elif operation == "max":
+                row[operation] = present[-1]
+            else:
+                # Linear interpolation between the closest ranks, as numpy.percentile does by default
+                rank = float(operation[1:]) / 100 * (len(present) - 1)
+                low = math.floor(rank)
+                high = min(low + 1, len(present) - 1)
+                row[operation] = present[low] + (present[high] - present[low]) * (rank - low)
+        rows.append(row)
+    return sorted(rows, key=lambda row: -row["count"])
+
+
+def timed(call, repeats: int) -> tuple[float, object]:
+    samples = []
+    result = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        result = call()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, result
+
+
+def same(rows, expected) -> bool:
+    by_group = {row["group"]: row for row in expected}
+    for row in rows:
+        reference = by_group.get(row["group"])
+        if reference is None or row["count"] != reference["count"]:
+            return False
+        for key, value in row.items():
+            if key not in ("group", "count") and not math.isclose(value, reference[key], rel_tol=1e-6):
+                return False
+    return len(rows) == len(expected)
+
+
+def bench_size(size: int, repeats: int, writes: int):
+    users = generate_users(size)
+
+    analytics = UserAnalytics()
+    started = time.perf_counter()
+    analytics.load(users)
+    load_seconds = time.perf_counter() - started
+
+    arrays = [analytics.ids, analytics.alive, *analytics.numbers.values()]
+    arrays += [column.codes for column in analytics.columns.values()]
+    megabytes = sum(array.nbytes for array in arrays) / 2 ** 20
+    print(f"\n{size} users (snapshot load {load_seconds:.2f}s, {megabytes:.0f} MiB of arrays)")
+    print(f"{'query':<72}{'groups':>8}{'python ms':>11}{'snapshot ms':>13}{'speedup':>9}")
+    for query in QUERIES:
+        python_ms, expected = timed(lambda: python_aggregate(users, **query), 1)
+        snapshot_ms, rows = timed(lambda: analytics.aggregate(**query), repeats)
+        assert same(rows, expected), f"snapshot and reference differ for {query}"
+        label = " ".join(f"{key}={value}" for key, value in query.items())
+        print(f"{label[:70]:<72}{len(rows):>8}{python_ms:>11.1f}{snapshot_ms:>13.2f}{python_ms / snapshot_ms:>8.0f}x")
+
+    rnd = random.Random(7)
+    updated = [{**user, "salary": rnd.randint(30000, 150000)} for user in rnd.sample(users, writes)]
+    deleted = [user["id"] for user in rnd.sample(users, writes)]
+    started = time.perf_counter()
+    for user in updated:
+        analytics.upsert(user)
+    for user_id in deleted:
+        analytics.remove(user_id)
+    incremental_ms = (time.perf_counter() - started) * 1000
+    print(f"{writes} updates + {writes} deletes applied in place: {incremental_ms:.1f} ms "
+          f"(full reload: {load_seconds * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 1000000])
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--writes", type=int, default=100, help="Updated and deleted users for the in-place refresh")
+    args = parser.parse_args()
+    for size in args.sizes:
+        bench_size(size, args.repeats, args.writes)
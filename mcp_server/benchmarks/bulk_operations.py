@@ -0,0 +1,67 @@
+"""
+Creating/deleting N users one call at a time (like one tool call per user) vs the bulk tools.
+
+Run from the `mcp_server` folder:
+    python -m benchmarks.bulk_operations --items 50 --latency 0.05
+The per-item path only counts upstream time, the LLM round trip per tool call it saves comes on top.
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.user_service_stub import UserServiceStub, generate_users
+from models.user_info import UserCreate
+from user_client import UserClient
+
+
+def new_users(count: int, prefix: str) -> list[UserCreate]:
+    return [
+        UserCreate(name="Test", surname=f"User{i}", email=f"{prefix}{i}@example.com", about_me="Bulk test user")
+        for i in range(count)
+    ]
+
+
+async def timed(coroutine) -> float:
+    started = time.perf_counter()
+    await coroutine
+    return time.perf_counter() - started
+
+
+async def main(args):
+    stub = UserServiceStub(generate_users(100), latency=args.latency)
+    runner, base_url = await stub.start()
+    client = UserClient(base_url=base_url)
+
+    async def one_by_one(models: list[UserCreate]) -> list[int]:
+        return [(await client.create_user(model))["id"] for model in models]
+
+    created_ids = []
+
+    async def sequential_add():
+        created_ids.extend(await one_by_one(new_users(args.items, "seq")))
+
+    async def sequential_delete():
+        for user_id in created_ids:
+            await client.delete_user(user_id)
+
+    add_seq = await timed(sequential_add())
+    delete_seq = await timed(sequential_delete())
+
+    add_bulk = await timed(client.bulk_add_users(new_users(args.items, "bulk")))
+    bulk_ids = [user["id"] for user in stub.search(email="bulk")]
+    delete_bulk = await timed(client.bulk_delete_users(bulk_ids))
+
+    print(f"items={args.items} upstream latency={args.latency * 1000:.0f}ms concurrency={client.bulk_concurrency}")
+    print(f"{'operation':<10}{'per item s':>12}{'bulk s':>10}{'speedup':>10}")
+    print(f"{'add':<10}{add_seq:>12.2f}{add_bulk:>10.2f}{add_seq / add_bulk:>9.1f}x")
+    print(f"{'delete':<10}{delete_seq:>12.2f}{delete_bulk:>10.2f}{delete_seq / delete_bulk:>9.1f}x")
+
+    await client.close()
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05, help="Stand-in service latency in seconds")
+    asyncio.run(main(parser.parse_args()))
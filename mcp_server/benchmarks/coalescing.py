@@ -0,0 +1,67 @@
+"""
+Concurrent `get_user_by_id`/`search_user` calls over a small set of hot keys, without and with single-flight
+coalescing (`USER_COALESCE_ENABLED`). The response cache is off, so every saved call is one upstream request less.
+
+Run from the `mcp_server` folder:
+    python -m benchmarks.coalescing --requests 2000 --concurrency 100 --hot-keys 10
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from benchmarks.user_service_stub import UserServiceStub, generate_users
+from latency import percentile
+from user_client import UserClient
+
+SEARCH_NAMES = ["john", "mike", "anna", "olena", "chen", "maria", "liam", "emma"]
+
+
+async def run_mode(url: str, args, coalesce: bool) -> tuple[float, list[float], UserClient]:
+    client = UserClient(base_url=url, coalesce=coalesce)
+    rnd = random.Random(42)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    samples = []
+
+    async def one():
+        async with semaphore:
+            started = time.perf_counter()
+            if rnd.random() < args.search_share:
+                await client.fetch_users(name=rnd.choice(SEARCH_NAMES))
+            else:
+                await client.fetch_user(rnd.randint(1, args.hot_keys))
+            samples.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    await client.close()
+    return elapsed, samples, client
+
+
+async def main(args):
+    print(f"requests={args.requests} concurrency={args.concurrency} hot keys={args.hot_keys} "
+          f"searches={args.search_share:.0%} latency={args.latency * 1000:.0f}ms")
+    print(f"{'mode':<14}{'req/s':>9}{'p50 ms':>9}{'p99 ms':>9}{'upstream':>10}{'coalesced':>11}")
+    for coalesce in (False, True):
+        stub = UserServiceStub(generate_users(args.users), latency=args.latency)
+        runner, url = await stub.start()
+        elapsed, samples, client = await run_mode(url, args, coalesce)
+        await runner.cleanup()
+        coalesced = client.flight.coalesced if client.flight else 0
+        print(
+            f"{'single-flight' if coalesce else 'off':<14}{args.requests / elapsed:>9.1f}"
+            f"{percentile(samples, 0.5):>9.1f}{percentile(samples, 0.99):>9.1f}{stub.requests_served:>10}"
+            f"{coalesced:>11}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--hot-keys", type=int, default=10, help="Distinct user ids requested")
+    parser.add_argument("--search-share", type=float, default=0.3)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.02, help="Stand-in service latency in seconds")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,111 @@
+"""
+Peak RSS and time to get the whole user directory out of the MCP server: the whole `GET /v1/users` body decoded and
+rendered at once (what an unfiltered `search_user` or a one-shot export holds in memory) vs `export_users` pages.
+The stand-in user service and every mode run in their own processes, so each peak RSS belongs to one mode.
+
+Run from the `mcp_server` folder:
+    python -m benchmarks.export_users --users 100000 1000000
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import resource
+import subprocess
+import sys
+import time
+
+import httpx
+
+from user_client import UserClient
+from user_renderer import get_renderer
+
+MODES = ("fetch_all", "export_users")
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def worker(mode: str, url: str, page: int):
+    client = UserClient(base_url=url)
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    users = pages = 0
+    written = 0
+    with open(os.devnull, "w") as output:
+        if mode == "fetch_all":
+            records = await client.fetch_all_users()
+            written = output.write(get_renderer("jsonl").render(records))
+            users, pages = len(records), 1
+        else:
+            cursor = None
+            while True:
+                result = await client.export_users(output_format="jsonl", cursor=cursor, limit=page)
+                written += output.write(result)
+                users += result.count("\n{")
+                pages += 1
+                match = re.search(r'cursor="([^"]+)"', result)
+                if not match:
+                    break
+                cursor = match.group(1)
+    await client.close()
+    print(json.dumps({
+        "seconds": time.perf_counter() - started,
+        "users": users,
+        "pages": pages,
+        "output_mb": written / 2 ** 20,
+        "rss_growth_mb": peak_rss_mb() - baseline,
+    }))
+
+
+def wait_ready(url: str, timeout: float = 600):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health").status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        time.sleep(0.5)
+    raise Exception(f"User service stub at {url} did not start within {timeout}s")
+
+
+def bench_size(size: int, page: int, port: int):
+    url = f"http://127.0.0.1:{port}"
+    stub = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.user_service_stub", "--users", str(size), "--port", str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        wait_ready(url)
+        print(f"\n{size} users")
+        print(f"{'mode':<16}{'users':>10}{'pages':>7}{'output MiB':>12}{'seconds':>9}{'RSS growth MiB':>16}")
+        for mode in MODES:
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.export_users", "--worker", mode, "--url", url, "--page", str(page)],
+                capture_output=True, text=True, check=True,
+            ).stdout
+            stats = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:<16}{stats['users']:>10}{stats['pages']:>7}{stats['output_mb']:>12.1f}"
+                  f"{stats['seconds']:>9.2f}{stats['rss_growth_mb']:>16.1f}")
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, nargs="+", default=[100000, 1000000])
+    parser.add_argument("--page", type=int, default=10000, help="Users per `export_users` page")
+    parser.add_argument("--port", type=int, default=8042, help="Port for the stand-in user service")
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        asyncio.run(worker(args.worker, args.url, args.page))
+    else:
+        for size in args.users:
+            bench_size(size, args.page, args.port)
@@ -0,0 +1,59 @@
+"""
+Rendering cost of user records per output format: time, bytes and approximate LLM tokens.
+
+Run from the `mcp_server` folder:
+    python -m benchmarks.render_formats --users 10000
+Tokens are counted with tiktoken when it is installed, otherwise estimated as bytes / 4.
+"""
+import argparse
+import time
+
+from benchmarks.user_service_stub import generate_users
+from user_renderer import RENDERERS, get_renderer
+
+
+def legacy_render(users) -> str:
+    """Previous `__users_to_string` implementation, repeated `+=` per key and per user"""
+    users_str = ""
+    for user in users:
+        user_str = "```\n"
+        for key, value in user.items():
+            user_str += f"  {key}: {value}\n"
+        user_str += "```\n"
+        users_str += user_str
+    users_str += "\n"
+    return users_str
+
+
+def token_counter():
+    try:
+        import tiktoken
+    except ImportError:
+        return lambda text: len(text.encode()) // 4, "bytes/4 estimate"
+    encoding = tiktoken.get_encoding("o200k_base")
+    return lambda text: len(encoding.encode(text)), "tiktoken o200k_base"
+
+
+def main(args):
+    users = generate_users(args.users)
+    count_tokens, token_method = token_counter()
+
+    candidates = {"legacy markdown": legacy_render}
+    candidates.update({name: get_renderer(name).render for name in RENDERERS})
+
+    print(f"{args.users} users, tokens: {token_method}")
+    print(f"{'format':<18}{'ms':>10}{'bytes':>12}{'tokens':>12}")
+    for name, render in candidates.items():
+        samples = []
+        for _ in range(args.repeats):
+            started = time.perf_counter()
+            text = render(users)
+            samples.append(time.perf_counter() - started)
+        print(f"{name:<18}{min(samples) * 1000:>10.1f}{len(text.encode()):>12}{count_tokens(text):>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=3)
+    main(parser.parse_args())
@@ -0,0 +1,72 @@
+"""
+`search_user` latency: local trigram index vs upstream `/v1/users/search` on the stand-in user service.
+
+Run from the `mcp_server` folder:
+    python -m benchmarks.search_index_latency --sizes 1000 100000 1000000
+The index is built straight from the generated users, bulk-load transfer time is not part of the comparison.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from benchmarks.user_service_stub import UserServiceStub, generate_users
+from user_client import UserClient
+from user_index import UserSearchIndex
+
+QUERIES = [
+    {"name": "john"},
+    {"surname": "kovalenko", "gender": "female"},
+    {"email": "liz.smith1"},
+    {"name": "mi", "email": "yahoo"},
+    {"email": "99@company"},
+]
+
+
+async def time_query(search, query: dict[str, str], repeats: int) -> tuple[float, int]:
+    samples = []
+    found = 0
+    for _ in range(repeats):
+        started = time.perf_counter()
+        found = len(await search(**query))
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples) * 1000, found
+
+
+async def bench_size(size: int, repeats: int):
+    users = generate_users(size)
+
+    index = UserSearchIndex()
+    started = time.perf_counter()
+    index.load(users)
+    build_seconds = time.perf_counter() - started
+
+    stub = UserServiceStub(users)
+    runner, base_url = await stub.start()
+    upstream = UserClient(base_url=base_url)
+
+    async def index_search(**query):
+        return index.search(**query)
+
+    print(f"\n{size} users (index build {build_seconds:.2f}s)")
+    print(f"{'query':<48}{'matches':>10}{'upstream ms':>14}{'index ms':>12}{'speedup':>10}")
+    for query in QUERIES:
+        upstream_ms, found = await time_query(upstream.fetch_users, query, repeats)
+        index_ms, index_found = await time_query(index_search, query, repeats)
+        assert found == index_found, f"index returned {index_found} users, upstream {found} for {query}"
+        print(f"{str(query):<48}{found:>10}{upstream_ms:>14.2f}{index_ms:>12.3f}{upstream_ms / index_ms:>9.0f}x")
+
+    await upstream.close()
+    await runner.cleanup()
+
+
+async def main(args):
+    for size in args.sizes:
+        await bench_size(size, args.repeats)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--repeats", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
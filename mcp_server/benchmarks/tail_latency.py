@@ -0,0 +1,74 @@
+"""
+`get_user_by_id` latency against a user service where a share of requests stall: no controls vs per-attempt
+timeout with jittered retries vs hedged requests (second request after the recent p95).
+
+Run from the `mcp_server` folder:
+    python -m benchmarks.tail_latency --requests 2000 --stall-rate 0.02 --stall-seconds 1
+"""
+import argparse
+import asyncio
+import time
+
+from benchmarks.user_service_stub import UserServiceStub, generate_users
+from latency import LatencyRecorder, percentile
+from user_client import UserClient
+
+MODES = {
+    "no controls": {"read_retries": 0, "hedge": False},
+    "timeout + retries": {"read_retries": 2, "hedge": False},
+    "hedged": {"read_retries": 0, "hedge": True},
+}
+
+
+async def run_mode(url: str, args, options: dict) -> tuple[list[float], int, dict]:
+    read_timeout = args.attempt_timeout if options["read_retries"] else 30.0
+    client = UserClient(base_url=url, read_timeout=read_timeout, latency=LatencyRecorder(), **options)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    samples = []
+    errors = 0
+
+    async def one(i: int):
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await client.fetch_user(i % args.users + 1)
+            except Exception:
+                errors += 1
+            samples.append((time.perf_counter() - started) * 1000)
+
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    await client.close()
+    return samples, errors, client.metrics.stats()["get_user"]
+
+
+async def main(args):
+    print(f"requests={args.requests} concurrency={args.concurrency} latency={args.latency * 1000:.0f}ms "
+          f"stalls={args.stall_rate:.1%} of {args.stall_seconds * 1000:.0f}ms")
+    print(f"{'mode':<20}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'max ms':>9}{'errors':>8}{'upstream':>10}"
+          f"{'retries':>9}{'hedges':>8}{'won':>6}")
+    for mode, options in MODES.items():
+        stub = UserServiceStub(
+            generate_users(args.users), latency=args.latency, stall_rate=args.stall_rate,
+            stall_seconds=args.stall_seconds,
+        )
+        runner, url = await stub.start()
+        samples, errors, metrics = await run_mode(url, args, options)
+        await runner.cleanup()
+        print(
+            f"{mode:<20}{percentile(samples, 0.5):>9.1f}{percentile(samples, 0.95):>9.1f}"
+            f"{percentile(samples, 0.99):>9.1f}{max(samples):>9.1f}{errors:>8}{stub.requests_served:>10}"
+            f"{metrics['retries']:>9}{metrics['hedges']:>8}{metrics['hedge_wins']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.01, help="Stand-in service latency in seconds")
+    parser.add_argument("--stall-rate", type=float, default=0.02, help="Share of requests that stall")
+    parser.add_argument("--stall-seconds", type=float, default=1.0)
+    parser.add_argument("--attempt-timeout", type=float, default=0.1, help="Read timeout per attempt with retries")
+    asyncio.run(main(parser.parse_args()))
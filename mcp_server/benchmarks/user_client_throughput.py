@@ -0,0 +1,83 @@
+"""
+Concurrent `get_user_by_id` throughput: blocking `requests` backend (previous implementation) vs pooled async backend.
+
+Run from the `mcp_server` folder:
+    python -m benchmarks.user_client_throughput --requests 500 --concurrency 50 --latency 0.02
+"""
+import argparse
+import asyncio
+import threading
+import time
+
+import requests
+
+from benchmarks.user_service_stub import UserServiceStub, generate_users
+from user_client import UserClient
+
+
+class BlockingUserClient:
+    """Previous `UserClient.get_user` behaviour: sync `requests` call inside a coroutine, new connection per call"""
+
+    def __init__(self, base_url: str) -> None:
+        self.base_url = base_url
+
+    async def get_user(self, user_id: int) -> str:
+        response = requests.get(url=f"{self.base_url}/v1/users/{user_id}", headers={"Content-Type": "application/json"})
+        if response.status_code == 200:
+            return response.text
+        raise Exception(f"HTTP {response.status_code}: {response.text}")
+
+
+def start_stub_in_thread(users: int, latency: float) -> str:
+    """The stub gets its own loop, otherwise the blocking client would block the stub too"""
+    ready = threading.Event()
+    result = {}
+
+    def run():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        stub = UserServiceStub(generate_users(users), latency=latency)
+        _, result["url"] = loop.run_until_complete(stub.start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    ready.wait()
+    return result["url"]
+
+
+async def run_load(client, total: int, concurrency: int, users: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await client.get_user(i % users + 1)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(total)))
+    return time.perf_counter() - started
+
+
+async def main(args):
+    base_url = start_stub_in_thread(args.users, args.latency)
+
+    blocking_elapsed = await run_load(BlockingUserClient(base_url), args.requests, args.concurrency, args.users)
+
+    pooled = UserClient(base_url=base_url, max_connections=args.concurrency)
+    pooled_elapsed = await run_load(pooled, args.requests, args.concurrency, args.users)
+    await pooled.close()
+
+    print(f"requests={args.requests} concurrency={args.concurrency} upstream latency={args.latency * 1000:.0f}ms")
+    print(f"{'backend':<20}{'seconds':>10}{'req/s':>12}")
+    print(f"{'blocking requests':<20}{blocking_elapsed:>10.2f}{args.requests / blocking_elapsed:>12.1f}")
+    print(f"{'pooled httpx':<20}{pooled_elapsed:>10.2f}{args.requests / pooled_elapsed:>12.1f}")
+    print(f"speedup: {blocking_elapsed / pooled_elapsed:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.02, help="Stand-in service latency in seconds")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,197 @@
+import argparse
+import asyncio
+import json
+import random
+from typing import Any, Optional
+
+from aiohttp import web
+
+FIRST_NAMES = ["John", "Johnny", "Mike", "Michael", "Liz", "Elizabeth", "Anna", "Olena", "Taras", "Maria", "Chen",
+               "Aisha", "Pedro", "Sofia", "Ivan", "Emma", "Noah", "Olivia", "Liam", "Mia"]
+SURNAMES = ["Smith", "Johnson", "Brown", "Garcia", "Kovalenko", "Shevchenko", "Miller", "Davis", "Wilson", "Lee",
+            "Martinez", "Taylor", "Anderson", "Thomas", "Moore", "Jackson", "White", "Harris", "Clark", "Lewis"]
+DOMAINS = ["gmail.com", "yahoo.com", "outlook.com", "company.com", "example.org"]
+GENDERS = ["male", "female", "other", "prefer_not_to_say"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella", "Stark Industries", "Wayne Enterprises"]
+COUNTRIES = {
+    "United States": ["New York", "Chicago", "Austin"],
+    "Ukraine": ["Kyiv", "Lviv", "Odesa"],
+    "Germany": ["Berlin", "Munich", "Hamburg"],
+    "Japan": ["Tokyo", "Osaka", "Kyoto"],
+}
+
+
+def generate_users(count: int, seed: int = 42) -> list[dict[str, Any]]:
+    """Generate `count` deterministic synthetic users shaped like the user service responses"""
+    rnd = random.Random(seed)
+    users = []
+    for user_id in range(1, count + 1):
+        name = rnd.choice(FIRST_NAMES)
+        surname = rnd.choice(SURNAMES)
+        country = rnd.choice(list(COUNTRIES))
+        users.append(
+            {
+                "id": user_id,
+                "name": name,
+                "surname": surname,
+                "email": f"{name.lower()}.{surname.lower()}{user_id}@{rnd.choice(DOMAINS)}",
+                "phone": f"+1{rnd.randint(2000000000, 9999999999)}",
+                "date_of_birth": f"{rnd.randint(1950, 2005)}-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d}",
+                "address": {
+                    "country": country,
+                    "city": rnd.choice(COUNTRIES[country]),
+                    "street": f"{rnd.randint(1, 999)} Main St",
+                    "flat_house": f"Apt {rnd.randint(1, 300)}",
+                },
+                "gender": rnd.choice(GENDERS),
+                "company": rnd.choice(COMPANIES),
+                "salary": float(rnd.randrange(30000, 200000, 500)),
+                "about_me": "I'm a curious person who loves hiking, reading and cooking.",
+                "credit_card": {
+                    "num": "-".join(f"{rnd.randint(0, 9999):04d}" for _ in range(4)),
+                    "cvv": f"{rnd.randint(0, 999):03d}",
+                    "exp_date": f"{rnd.randint(1, 12):02d}/{rnd.randint(2027, 2032)}",
+                },
+            }
+        )
+    return users
+
+
+class UserServiceStub:
+    """In-memory stand-in for the mock user service, with the same endpoints and an artificial latency"""
+
+    def __init__(
+            self,
+            users: Optional[list[dict[str, Any]]] = None,
+            latency: float = 0.0,
+            stall_rate: float = 0.0,
+            stall_seconds: float = 1.0,
+            seed: int = 42,
+    ) -> None:
+        self.users: dict[int, dict[str, Any]] = {user["id"]: user for user in users or []}
+        self.latency = latency
+        self.stall_rate = stall_rate
+        self.stall_seconds = stall_seconds
+        self._rnd = random.Random(seed)
+        self.requests_served = 0
+        self._next_id = max(self.users, default=0) + 1
+
+    async def _delay(self):
+        self.requests_served += 1
+        if self.stall_rate and self._rnd.random() < self.stall_rate:
+            # A stalled request, like a GC pause or a lost packet on the real service
+            await asyncio.sleep(self.stall_seconds)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def search(
+            self,
+            name: Optional[str] = None,
+            surname: Optional[str] = None,
+            email: Optional[str] = None,
+            gender: Optional[str] = None,
+    ) -> list[dict[str, Any]]:
+        """Case-insensitive partial match on name/surname/email and exact match on gender, like the real service"""
+        name, surname, email = (value.lower() if value else None for value in (name, surname, email))
+        gender = gender.lower() if gender else None
+        return [
+            user for user in self.users.values()
+            if (not name or name in user["name"].lower())
+               and (not surname or surname in user["surname"].lower())
+               and (not email or email in user["email"].lower())
+               and (not gender or gender == (user.get("gender") or "").lower())
+        ]
+
+    async def handle_search(self, request: web.Request) -> web.Response:
+        await self._delay()
+        query = request.query
+        return web.json_response(
+            self.search(query.get("name"), query.get("surname"), query.get("email"), query.get("gender"))
+        )
+
+    async def handle_list(self, request: web.Request) -> web.StreamResponse:
+        await self._delay()
+        # Written in batches, so a million users don't need one huge body in memory
+        response = web.StreamResponse(headers={"Content-Type": "application/json"})
+        await response.prepare(request)
+        users = list(self.users.values())
+        try:
+            for start in range(0, len(users), 1000):
+                batch = ",".join(json.dumps(user) for user in users[start:start + 1000])
+                await response.write(f"{'[' if start == 0 else ','}{batch}".encode())
+            await response.write(b"]" if users else b"[]")
+            await response.write_eof()
+        except ConnectionError:
+            # The client stopped reading, e.g. an export that was not continued
+            pass
+        return response
+
+    async def handle_get(self, request: web.Request) -> web.Response:
+        await self._delay()
+        user = self.users.get(int(request.match_info["user_id"]))
+        if user is None:
+            return web.json_response({"detail": "User not found"}, status=404)
+        return web.json_response(user)
+
+    async def handle_create(self, request: web.Request) -> web.Response:
+        await self._delay()
+        user = {"id": self._next_id, **await request.json()}
+        self.users[user["id"]] = user
+        self._next_id += 1
+        return web.json_response(user, status=201)
+
+    async def handle_update(self, request: web.Request) -> web.Response:
+        await self._delay()
+        user = self.users.get(int(request.match_info["user_id"]))
+        if user is None:
+            return web.json_response({"detail": "User not found"}, status=404)
+        user.update({key: value for key, value in (await request.json()).items() if value is not None})
+        return web.json_response(user, status=201)
+
+    async def handle_delete(self, request: web.Request) -> web.Response:
+        await self._delay()
+        if self.users.pop(int(request.match_info["user_id"]), None) is None:
+            return web.json_response({"detail": "User not found"}, status=404)
+        return web.Response(status=204)
+
+    async def handle_health(self, request: web.Request) -> web.Response:
+        return web.json_response({"status": "ok"})
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.add_routes(
+            [
+                web.get("/v1/users/search", self.handle_search),
+                web.get("/v1/users", self.handle_list),
+                web.post("/v1/users", self.handle_create),
+                web.get("/v1/users/{user_id}", self.handle_get),
+                web.put("/v1/users/{user_id}", self.handle_update),
+                web.delete("/v1/users/{user_id}", self.handle_delete),
+                web.get("/health", self.handle_health),
+            ]
+        )
+        return app
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> tuple[web.AppRunner, str]:
+        """Start serving in the current event loop, returns runner (for cleanup) and base url"""
+        runner = web.AppRunner(self.create_app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        return runner, f"http://{host}:{bound_port}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the user management service")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Artificial per-request latency in seconds")
+    parser.add_argument("--stall-rate", type=float, default=0.0, help="Share of requests that stall")
+    parser.add_argument("--stall-seconds", type=float, default=1.0)
+    parser.add_argument("--port", type=int, default=8041)
+    args = parser.parse_args()
+
+    stub = UserServiceStub(
+        generate_users(args.users), latency=args.latency, stall_rate=args.stall_rate, stall_seconds=args.stall_seconds
+    )
+    web.run_app(stub.create_app(), host="0.0.0.0", port=args.port, access_log=None)
@@ -0,0 +1,57 @@
+import os
+import re
+from collections import deque
+from typing import Any, Optional
+
+LATENCY_WINDOW = int(os.getenv("LATENCY_WINDOW", "1000"))
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def operation_name(method: str, path: str) -> str:
+    """`GET /v1/users/42` -> `GET /v1/users/{id}`, so all lookups share one series"""
+    return f"{method} {_ID_SEGMENT.sub('/{id}', path)}"
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class LatencyRecorder:
+    """Durations per operation: cumulative count and total, percentiles over the last `window` samples"""
+
+    def __init__(self, window: int = LATENCY_WINDOW) -> None:
+        self.window = window
+        self._samples: dict[str, deque[float]] = {}
+        self._counts: dict[str, int] = {}
+        self._totals: dict[str, float] = {}
+
+    def record(self, operation: str, seconds: float):
+        if operation not in self._samples:
+            self._samples[operation] = deque(maxlen=self.window)
+            self._counts[operation] = 0
+            self._totals[operation] = 0.0
+        self._samples[operation].append(seconds)
+        self._counts[operation] += 1
+        self._totals[operation] += seconds
+
+    def quantile(self, operation: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """Seconds at quantile `q` of the recent samples, None until there are `min_samples` of them"""
+        samples = self._samples.get(operation)
+        if not samples or len(samples) < min_samples:
+            return None
+        return percentile(list(samples), q)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            operation: {
+                "count": self._counts[operation],
+                "total_ms": round(self._totals[operation] * 1000, 3),
+                "p50_ms": round(percentile(list(samples), 0.5) * 1000, 3),
+                "p95_ms": round(percentile(list(samples), 0.95) * 1000, 3),
+                "p99_ms": round(percentile(list(samples), 0.99) * 1000, 3),
+                "max_ms": round(max(samples) * 1000, 3),
+            }
+            for operation, samples in self._samples.items()
+        }
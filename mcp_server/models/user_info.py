@@ -43,6 +43,11 @@ class UserUpdate(BaseModel):
     credit_card: Optional[UserCreate] = None
 
 
+class UserUpdateItem(BaseModel):
+    user_id: int
+    user_update_model: UserUpdate
+
+
 class UserSearchRequest(BaseModel):
     name: Optional[str] = None
     email: Optional[str] = None
@@ -0,0 +1,149 @@
+import asyncio
+import os
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from latency import LatencyRecorder
+
+USER_SERVICE_READ_RETRIES = int(os.getenv("USER_SERVICE_READ_RETRIES", "2"))
+USER_SERVICE_RETRY_BACKOFF = float(os.getenv("USER_SERVICE_RETRY_BACKOFF", "0.05"))
+USER_SERVICE_RETRY_MAX_BACKOFF = float(os.getenv("USER_SERVICE_RETRY_MAX_BACKOFF", "1.0"))
+USER_SERVICE_HEDGE = os.getenv("USER_SERVICE_HEDGE", "false").lower() == "true"
+USER_SERVICE_HEDGE_QUANTILE = float(os.getenv("USER_SERVICE_HEDGE_QUANTILE", "0.95"))
+USER_SERVICE_HEDGE_DELAY = float(os.getenv("USER_SERVICE_HEDGE_DELAY", "0.1"))
+USER_SERVICE_HEDGE_MIN_SAMPLES = int(os.getenv("USER_SERVICE_HEDGE_MIN_SAMPLES", "20"))
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", "5"))
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(Exception):
+    """The upstream is considered unhealthy, the call was not attempted"""
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for `reset_timeout` seconds.
+    Then a single trial call is let through (half-open): success closes the circuit, failure opens it again.
+    """
+
+    def __init__(
+            self,
+            failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+            reset_timeout: float = BREAKER_RESET_SECONDS,
+    ) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self.opened = 0
+        self.rejected = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_timeout:
+            return "open"
+        return "half_open"
+
+    def before_call(self) -> bool:
+        """Raises CircuitOpenError when the call may not go out, returns True when it is the half-open trial"""
+        state = self.state
+        if state == "open" or (state == "half_open" and self._trial_in_flight):
+            self.rejected += 1
+            raise CircuitOpenError(
+                f"User service unavailable: circuit open after {self.failures} consecutive failures"
+            )
+        if state == "half_open":
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def release_trial(self):
+        """The trial call ended without an outcome (cancelled by the caller, unexpected error): allow a new one"""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opened += 1
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class ResilienceMetrics:
+    """Counters per operation, plus the latency of whole operations (all retries and hedges included)"""
+
+    COUNTERS = ("calls", "failures", "deadline_exceeded", "retries", "hedges", "hedge_wins", "rejected")
+
+    def __init__(self) -> None:
+        self.counters: dict[str, dict[str, int]] = {}
+        self.latency = LatencyRecorder()
+
+    def count(self, operation: str, counter: str):
+        counters = self.counters.setdefault(operation, dict.fromkeys(self.COUNTERS, 0))
+        counters[counter] += 1
+
+    def stats(self) -> dict[str, Any]:
+        latency = self.latency.stats()
+        return {
+            operation: {**counters, **latency.get(operation, {})}
+            for operation, counters in self.counters.items()
+        }
+
+
+def backoff_delay(attempt: int, base: float = USER_SERVICE_RETRY_BACKOFF, cap: float = USER_SERVICE_RETRY_MAX_BACKOFF):
+    """Full jitter, so retries of many concurrent calls don't arrive at the upstream together"""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+async def hedged(
+        send: Callable[[], Awaitable[T]],
+        delay: float,
+        on_hedge: Callable[[], None],
+        on_hedge_win: Callable[[], None],
+) -> T:
+    """
+    Starts `send()`, and once more if the first one hasn't finished after `delay` seconds.
+    Returns the first successful result and cancels the other request.
+    """
+    first = asyncio.ensure_future(send())
+    pending = {first}
+    try:
+        done, pending = await asyncio.wait(pending, timeout=delay)
+        if done:
+            return first.result()
+        on_hedge()
+        second = asyncio.ensure_future(send())
+        pending.add(second)
+        error: Optional[BaseException] = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        on_hedge_win()
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
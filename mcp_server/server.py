@@ -1,10 +1,17 @@
+import json
+import os
 from pathlib import Path
 from typing import Optional
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import Context, FastMCP
 
-from models.user_info import UserSearchRequest, UserCreate, UserUpdate
+from asset_store import AssetStore
+from latency import LatencyRecorder
+from models.user_info import UserSearchRequest, UserCreate, UserUpdate, UserUpdateItem
+from user_analytics import UserAnalytics, USER_ANALYTICS_ENABLED
+from user_cache import UserCache, USER_CACHE_ENABLED
 from user_client import UserClient
+from user_index import UserSearchIndex, USER_INDEX_ENABLED
 
 #TODO:
 # 1. Create instance of FastMCP as `mcp` (or another name if you wish) with:
@@ -12,8 +19,18 @@ from user_client import UserClient
 #       - host is "0.0.0.0",
 #       - port is 8005,
 # 2. Create UserClient
-mcp = FastMCP(name='users-management-mcp-server', host='0.0.0.0', port=8005)
-user_client = UserClient()
+mcp = FastMCP(name='users-management-mcp-server', host='0.0.0.0', port=int(os.getenv('MCP_SERVER_PORT', '8005')))
+user_client = UserClient(
+    cache=UserCache() if USER_CACHE_ENABLED else None,
+    index=UserSearchIndex() if USER_INDEX_ENABLED else None,
+    latency=LatencyRecorder(),
+    analytics=UserAnalytics() if USER_ANALYTICS_ENABLED else None,
+)
+
+FLOW_DIAGRAM_URI = "users-management://flow-diagram"
+
+assets = AssetStore()
+assets.add_file(FLOW_DIAGRAM_URI, "flow.png", "image/png")
 
 # ==================== TOOLS ====================
 #TODO:
@@ -30,9 +47,9 @@ user_client = UserClient()
 # 5. `update_user`:-
 
 @mcp.tool()
-async def get_user_by_id(id: int) -> str:
-    """Retrive user by id"""
-    return await user_client.get_user(id)
+async def get_user_by_id(id: int, output_format: Optional[str] = None) -> str:
+    """Retrieve user by id. `output_format`: markdown, jsonl (compact) or csv; server default if omitted"""
+    return await user_client.get_user(id, output_format=output_format)
 
 
 @mcp.tool()
@@ -47,16 +64,37 @@ async def search_user(
     surname: Optional[str] = None,
     email: Optional[str] = None,
     gender: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    fields: Optional[list[str]] = None,
+    output_format: Optional[str] = None,
 ) -> str:
-    """Delete user by id"""
-    return await user_client.search_users(name=name, surname=surname, email=email, gender=gender)
+    """
+    Search users by name, surname, email (partial, case-insensitive) and gender (exact).
+    Results are paginated: `limit` users per page (server default and maximum apply), starting at `offset`.
+    When more users match, the result ends with a `cursor`; pass only the cursor to get the next page.
+    Use `fields` to return only some fields, e.g. ["id", "name", "surname", "email"].
+    `output_format`: markdown, jsonl (compact) or csv (most compact for many users); server default if omitted.
+    """
+    return await user_client.search_users(
+        name=name,
+        surname=surname,
+        email=email,
+        gender=gender,
+        limit=limit,
+        offset=offset,
+        cursor=cursor,
+        fields=fields,
+        output_format=output_format,
+    )
 
 
 @mcp.tool()
 async def add_user(
     user_create_model: UserCreate,
 ) -> str:
-    """Delete user by id"""
+    """Create new user"""
     return await user_client.add_user(user_create_model)
 
 
@@ -64,10 +102,88 @@ async def add_user(
 async def update_user(
     user_id: int, user_update_model: UserUpdate
 ) -> str:
-    """Delete user by id"""
+    """Update user by id, only provided fields are changed"""
     return await user_client.update_user(user_id=user_id, user_update_model=user_update_model)
 
 
+@mcp.tool()
+async def aggregate_users(
+    operations: list[str],
+    field: Optional[str] = None,
+    group_by: Optional[str] = None,
+    name: Optional[str] = None,
+    surname: Optional[str] = None,
+    email: Optional[str] = None,
+    gender: Optional[str] = None,
+) -> str:
+    """
+    Statistics over all users computed on the server, use it instead of `search_user` for counts, averages etc.
+    `operations`: count, sum, mean, min, max or percentiles like p50, p90, p99; all but count need `field`.
+    `field`: salary or age. `group_by`: gender, company or country, omit for one total.
+    Filters work like in `search_user`: name, surname, email (partial, case-insensitive) and gender (exact).
+    Returns CSV with one line per group, largest groups first.
+    """
+    return await user_client.aggregate_users(
+        operations,
+        field=field,
+        group_by=group_by,
+        name=name,
+        surname=surname,
+        email=email,
+        gender=gender,
+    )
+
+
+@mcp.tool()
+async def export_users(
+    ctx: Context,
+    output_format: str = "jsonl",
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+    fields: Optional[list[str]] = None,
+) -> str:
+    """
+    Export the whole user directory page by page, for bulk transfers rather than questions (see `aggregate_users`).
+    `output_format`: jsonl or csv (fixed columns). `limit` users per page: the default is small, pass a larger
+    limit (up to the server maximum) to transfer the directory in fewer calls.
+    When more users remain, the result ends with a `cursor`; pass only the cursor to get the next page.
+    Sends progress notifications with the number of users exported so far.
+    """
+    async def on_progress(exported: int):
+        await ctx.report_progress(exported, message=f"Exported {exported} users")
+
+    return await user_client.export_users(
+        output_format=output_format, cursor=cursor, limit=limit, fields=fields, on_progress=on_progress
+    )
+
+
+# Batch variants: one tool call and concurrent upstream requests instead of one tool call per user.
+# Every item gets its own status, a failed item doesn't abort the rest of the batch.
+
+@mcp.tool()
+async def get_users_by_ids(ids: list[int], output_format: Optional[str] = None) -> str:
+    """Retrieve several users by their ids in one call. Missing ids are reported after the found users"""
+    return await user_client.get_users_by_ids(ids, output_format=output_format)
+
+
+@mcp.tool()
+async def bulk_add_users(user_create_models: list[UserCreate]) -> str:
+    """Create several users in one call. Returns `<index>: ok id=<new id>` or `<index>: error ...` per user"""
+    return await user_client.bulk_add_users(user_create_models)
+
+
+@mcp.tool()
+async def bulk_update_users(updates: list[UserUpdateItem]) -> str:
+    """Update several users in one call. Returns `<index>: ok id=<id>` or `<index>: error ...` per update"""
+    return await user_client.bulk_update_users(updates)
+
+
+@mcp.tool()
+async def bulk_delete_users(ids: list[int]) -> str:
+    """Delete several users by ids in one call. Returns `<index>: ok id=<id>` or `<index>: error ...` per id"""
+    return await user_client.bulk_delete_users(ids)
+
+
 # ==================== MCP RESOURCES ====================
 
 #TODO:
@@ -81,11 +197,66 @@ async def update_user(
 # 2. You need to get `flow.png` picture from `mcp_server` folder and return it as bytes.
 # 3. Don't forget to provide resource description
 
-@mcp.resource(uri="users-management://flow-diagram", mime_type="image/png")
+@mcp.resource(uri=FLOW_DIAGRAM_URI, mime_type="image/png")
 async def get_flow_diagram() -> bytes:
     """Provides flow screenshot"""
-    with open('flow.png', 'rb') as fp:
-        return fp.read()
+    return assets.resources[FLOW_DIAGRAM_URI].data()
+
+
+@mcp.resource(uri="users-management://asset-manifest", mime_type="application/json")
+async def get_asset_manifest() -> str:
+    """Provides SHA-256, size and mime type of static resources and prompt bodies, to skip re-reading unchanged ones"""
+    return json.dumps(assets.manifest())
+
+
+@mcp.resource(uri="users-management://cache-stats", mime_type="application/json")
+async def get_cache_stats() -> str:
+    """Provides hit, miss and eviction counters of the user lookup/search cache"""
+    if user_client.cache is None:
+        return json.dumps({"enabled": False})
+    return json.dumps({"enabled": True, **user_client.cache.stats()})
+
+
+@mcp.resource(uri="users-management://search-index-stats", mime_type="application/json")
+async def get_search_index_stats() -> str:
+    """Provides size and age of the local search index (USER_INDEX_ENABLED=true)"""
+    if user_client.index is None:
+        return json.dumps({"enabled": False})
+    return json.dumps({"enabled": True, **user_client.index.stats()})
+
+
+@mcp.resource(uri="users-management://analytics-stats", mime_type="application/json")
+async def get_analytics_stats() -> str:
+    """Provides size, age and distinct group values of the columnar snapshot behind `aggregate_users`"""
+    if user_client.analytics is None:
+        return json.dumps({"enabled": False})
+    return json.dumps({"enabled": True, **user_client.analytics.stats()})
+
+
+@mcp.resource(uri="users-management://export-stats", mime_type="application/json")
+async def get_export_stats() -> str:
+    """Provides pages served by `export_users` and how many continued an open upstream stream vs resumed by id"""
+    return json.dumps(user_client.exporter.stats())
+
+
+@mcp.resource(uri="users-management://upstream-latency", mime_type="application/json")
+async def get_upstream_latency() -> str:
+    """Provides count, total and p50/p95 time of user service HTTP calls per operation"""
+    return json.dumps(user_client.latency.stats())
+
+
+@mcp.resource(uri="users-management://upstream-resilience", mime_type="application/json")
+async def get_upstream_resilience() -> str:
+    """Provides circuit breaker state and per-operation retries, hedges, deadline misses and p50/p95/p99"""
+    return json.dumps({"breaker": user_client.breaker.stats(), "operations": user_client.metrics.stats()})
+
+
+@mcp.resource(uri="users-management://request-coalescing", mime_type="application/json")
+async def get_request_coalescing() -> str:
+    """Provides how many identical concurrent reads shared one upstream request (USER_COALESCE_ENABLED=true)"""
+    if user_client.flight is None:
+        return json.dumps({"enabled": False})
+    return json.dumps({"enabled": True, **user_client.flight.stats()})
 
 
 # ==================== MCP PROMPTS ====================
@@ -227,8 +398,13 @@ When creating profiles, aim for diversity in:
 """
 
 
+# Prompt bodies are constants, hashed once for the asset manifest
+for prompt in (make_search_request, create_user_request):
+    assets.add_prompt(prompt.__name__, prompt())
+
 if __name__ == "__main__":
     #TODO:
     # Run server with `transport="streamable-http"`
     # raise NotImplementedError()
-    mcp.run(transport="streamable-http")
+    # MCP_TRANSPORT=stdio lets a co-located agent spawn the server as a subprocess (logs go to stderr then)
+    mcp.run(transport=os.getenv("MCP_TRANSPORT", "streamable-http"))
@@ -0,0 +1,42 @@
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+USER_COALESCE_ENABLED = os.getenv("USER_COALESCE_ENABLED", "true").lower() == "true"
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one in-flight call and its result (or exception).
+    The call runs as its own task, so a caller that is cancelled doesn't cancel it for the others.
+    """
+
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        self.calls += 1
+        future = self._calls[key] = asyncio.ensure_future(call())
+        future.add_done_callback(lambda _: self._calls.pop(key, None) if self._calls.get(key) is future else None)
+        return await asyncio.shield(future)
+
+    def forget(self, predicate: Callable[[Hashable], bool]):
+        """Later callers of matching keys start a new call instead of joining one that may predate a write"""
+        for key in [key for key in self._calls if predicate(key)]:
+            del self._calls[key]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "upstream_calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._calls),
+        }
@@ -0,0 +1,26 @@
+import sys
+from pathlib import Path
+from typing import Any, Callable
+
+import httpx
+import pytest
+
+# The server modules import each other by their flat names, as when run from the `mcp_server` folder
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from user_client import UserClient  # noqa: E402
+
+BASE_URL = "http://users.test"
+
+
+@pytest.fixture
+def make_client() -> Callable[..., UserClient]:
+    """UserClient whose requests go to `handler` (an httpx.MockTransport handler) instead of the user service"""
+
+    def make(handler: Callable[[httpx.Request], Any], **kwargs: Any) -> UserClient:
+        kwargs.setdefault("coalesce", False)
+        client = UserClient(base_url=BASE_URL, **kwargs)
+        client._http = httpx.AsyncClient(base_url=BASE_URL, transport=httpx.MockTransport(handler))
+        return client
+
+    return make
@@ -0,0 +1,172 @@
+import asyncio
+
+import httpx
+import pytest
+
+from resilience import CircuitBreaker, CircuitOpenError
+
+
+def open_breaker(threshold: int = 2) -> CircuitBreaker:
+    breaker = CircuitBreaker(failure_threshold=threshold, reset_timeout=60)
+    for _ in range(threshold):
+        breaker.record_failure()
+    return breaker
+
+
+def half_open(breaker: CircuitBreaker) -> CircuitBreaker:
+    breaker.opened_at -= breaker.reset_timeout
+    return breaker
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    assert breaker.before_call() is False
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.stats()["opened"] == 1
+    assert breaker.stats()["rejected"] == 1
+
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+
+
+def test_half_open_lets_a_single_trial_through():
+    breaker = half_open(open_breaker())
+    assert breaker.state == "half_open"
+    assert breaker.before_call() is True
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+    assert breaker.before_call() is False
+
+
+def test_failed_trial_opens_again():
+    breaker = half_open(open_breaker())
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.stats()["opened"] == 2
+
+
+def test_released_trial_allows_a_new_one():
+    breaker = half_open(open_breaker())
+    breaker.before_call()
+    breaker.release_trial()
+    assert breaker.state == "half_open"
+    assert breaker.before_call() is True
+
+
+def test_server_errors_open_the_circuit_and_later_calls_fail_fast(make_client):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(503, text="unavailable")
+
+    async def main():
+        client = make_client(handler, read_retries=0, breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+        for _ in range(2):
+            with pytest.raises(Exception, match="HTTP 503"):
+                await client.fetch_user(1)
+        with pytest.raises(CircuitOpenError):
+            await client.fetch_user(1)
+        await client.close()
+
+    asyncio.run(main())
+    assert len(requests) == 2
+
+
+def test_client_errors_keep_the_circuit_closed(make_client):
+    async def main():
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        client = make_client(lambda request: httpx.Response(404, text="not found"), read_retries=0, breaker=breaker)
+        for _ in range(3):
+            with pytest.raises(Exception, match="HTTP 404"):
+                await client.fetch_user(1)
+        await client.close()
+        return breaker
+
+    assert asyncio.run(main()).state == "closed"
+
+
+def test_deadline_counts_as_a_failure(make_client):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(1)
+        return httpx.Response(200, json={"id": 1})
+
+    async def main():
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+        client = make_client(handler, read_retries=0, breaker=breaker, deadlines={"get_user": 0.01})
+        with pytest.raises(Exception, match="did not answer get_user"):
+            await client.fetch_user(1)
+        await client.close()
+        return breaker
+
+    assert asyncio.run(main()).state == "open"
+
+
+def test_cancelled_trial_is_not_a_failure_and_frees_the_half_open_state(make_client):
+    answer = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await answer.wait()
+        return httpx.Response(200, json={"id": 1})
+
+    async def main():
+        breaker = half_open(open_breaker())
+        client = make_client(handler, read_retries=0, breaker=breaker)
+        call = asyncio.create_task(client.fetch_user(1))
+        await asyncio.sleep(0.01)
+        call.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await call
+        assert breaker.state == "half_open"
+        assert breaker.failures == 2
+
+        answer.set()
+        assert await client.fetch_user(1) == {"id": 1}
+        assert breaker.state == "closed"
+        await client.close()
+
+    asyncio.run(main())
+
+
+def test_abandoned_export_stream_frees_the_half_open_trial(make_client):
+    answer = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await answer.wait()
+        return httpx.Response(200, json=[{"id": 1}])
+
+    async def main():
+        breaker = half_open(open_breaker())
+        client = make_client(handler, breaker=breaker)
+        users = client.stream_users()
+        first = asyncio.create_task(anext(users))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        await users.aclose()
+        assert breaker.state == "half_open"
+
+        answer.set()
+        assert [user async for user in client.stream_users()] == [{"id": 1}]
+        assert breaker.state == "closed"
+        await client.close()
+
+    asyncio.run(main())
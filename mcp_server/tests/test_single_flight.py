@@ -0,0 +1,102 @@
+import asyncio
+
+import httpx
+import pytest
+
+from models.user_info import UserUpdate
+from single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_call():
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"id": 1}
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("key", call) for _ in range(10)))
+        return flight, results
+
+    flight, results = asyncio.run(main())
+    assert len(calls) == 1
+    assert results == [{"id": 1}] * 10
+    assert flight.stats() == {"upstream_calls": 1, "coalesced": 9, "in_flight": 0}
+
+
+def test_error_reaches_every_caller_and_is_not_kept():
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise ValueError("upstream failed")
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.do("key", failing) for _ in range(3)), return_exceptions=True)
+        assert await flight.do("key", lambda: asyncio.sleep(0, "ok")) == "ok"
+        return results
+
+    assert [str(result) for result in asyncio.run(main())] == ["upstream failed"] * 3
+
+
+def test_cancelled_caller_does_not_cancel_the_others():
+    async def call():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def main():
+        flight = SingleFlight()
+        first = asyncio.create_task(flight.do("key", call))
+        second = asyncio.create_task(flight.do("key", call))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "done"
+
+
+def test_forgotten_key_starts_a_new_call():
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return len(calls)
+
+    async def main():
+        flight = SingleFlight()
+        first = asyncio.create_task(flight.do(("user", 1), call))
+        await asyncio.sleep(0)
+        flight.forget(lambda key: key == ("user", 1))
+        return await first, await flight.do(("user", 1), call)
+
+    assert asyncio.run(main()) == (1, 2)
+
+
+def test_read_after_a_write_does_not_join_an_older_read(make_client):
+    reads = []
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "PUT":
+            return httpx.Response(201, json={"name": "New"})
+        reads.append(request)
+        name = "Old" if len(reads) == 1 else "New"
+        await asyncio.sleep(0.02)
+        return httpx.Response(200, json={"id": 1, "name": name})
+
+    async def main():
+        client = make_client(handler, coalesce=True)
+        before = asyncio.create_task(client.fetch_user(1))
+        joined = asyncio.create_task(client.fetch_user(1))
+        await asyncio.sleep(0.005)
+        await client.modify_user(1, UserUpdate(name="New"))
+        after = await client.fetch_user(1)
+        results = (await before)["name"], (await joined)["name"], after["name"]
+        await client.close()
+        return results
+
+    assert asyncio.run(main()) == ("Old", "Old", "New")
+    assert len(reads) == 2
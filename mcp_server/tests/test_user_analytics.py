@@ -0,0 +1,65 @@
+import asyncio
+
+import httpx
+
+from models.user_info import UserCreate
+from user_analytics import UserAnalytics
+
+USERS = [
+    {"id": 1, "name": "Ann", "gender": "female", "salary": 100.0},
+    {"id": 2, "name": "Bea", "gender": "female", "salary": 300.0},
+    {"id": 3, "name": "Bob", "gender": "male", "salary": 200.0},
+]
+
+
+def by_group(rows: list[dict]) -> dict:
+    return {row["group"]: row for row in rows}
+
+
+def test_in_place_writes_match_a_reload():
+    analytics = UserAnalytics()
+    analytics.load(USERS)
+    analytics.upsert({"id": 3, "name": "Bob", "gender": "male", "salary": 400.0})
+    analytics.upsert({"id": 4, "name": "Cid", "gender": "male", "salary": 600.0})
+    analytics.remove(1)
+
+    reloaded = UserAnalytics()
+    reloaded.load([
+        USERS[1],
+        {**USERS[2], "salary": 400.0},
+        {"id": 4, "name": "Cid", "gender": "male", "salary": 600.0},
+    ])
+    query = {"operations": ["count", "mean"], "field": "salary", "group_by": "gender"}
+    assert by_group(analytics.aggregate(**query)) == by_group(reloaded.aggregate(**query))
+
+
+def test_reload_keeps_writes_made_while_the_directory_was_fetched(make_client):
+    snapshot_requested = asyncio.Event()
+    answer = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            snapshot_requested.set()
+            snapshot = list(USERS)
+            await answer.wait()
+            return httpx.Response(200, json=snapshot)
+        if request.method == "POST":
+            return httpx.Response(201, json={"id": 4, "name": "Cid", "gender": "male", "salary": 600.0})
+        return httpx.Response(204)
+
+    async def main():
+        client = make_client(handler, analytics=UserAnalytics())
+        # The first load: writes made before any snapshot exists must not be lost either
+        reload = asyncio.create_task(client.reload_analytics())
+        await snapshot_requested.wait()
+        await client.create_user(UserCreate(name="Cid", surname="New", email="cid@example.com", about_me=""))
+        await client.remove_user(1)
+        answer.set()
+        await reload
+        await client.close()
+        return client.analytics
+
+    analytics = asyncio.run(main())
+    rows = by_group(analytics.aggregate(operations=["count", "sum"], field="salary", group_by="gender"))
+    assert rows["female"]["count"] == 1
+    assert rows["male"] == {"group": "male", "count": 2, "sum": 800.0}
@@ -0,0 +1,75 @@
+import asyncio
+
+import httpx
+
+from models.user_info import UserUpdate
+from user_cache import UserCache
+
+
+def test_read_started_before_a_write_is_not_stored():
+    cache = UserCache()
+    generation = cache.generation
+    cache.invalidate_user(1)
+    cache.set_user(1, {"id": 1, "name": "Old"}, generation)
+    assert cache.get_user(1) is None
+
+    cache.set_user(1, {"id": 1, "name": "New"}, cache.generation)
+    assert cache.get_user(1) == {"id": 1, "name": "New"}
+
+
+def test_search_started_before_a_write_is_not_stored():
+    cache = UserCache()
+    generation = cache.generation
+    cache.invalidate_searches()
+    cache.set_search({"name": "ann"}, [{"id": 1, "name": "Ann"}], generation)
+    assert cache.get_search({"name": "ann"}) is None
+
+
+def test_write_drops_searches_holding_the_user_or_matching_its_new_state():
+    cache = UserCache()
+    cache.set_search({"name": "ann"}, [{"id": 1, "name": "Ann"}], cache.generation)
+    cache.set_search({"name": "bob"}, [], cache.generation)
+    cache.set_search({"name": "cid"}, [{"id": 3, "name": "Cid"}], cache.generation)
+
+    cache.invalidate_user(1, {"id": 1, "name": "Bob"})
+    assert cache.get_search({"name": "ann"}) is None
+    assert cache.get_search({"name": "bob"}) is None
+    assert cache.get_search({"name": "cid"}) == [{"id": 3, "name": "Cid"}]
+
+
+def test_expired_entries_are_misses():
+    cache = UserCache(ttl=0)
+    cache.set_user(1, {"id": 1}, cache.generation)
+    assert cache.get_user(1) is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_read_overlapping_an_update_does_not_cache_the_old_record(make_client):
+    old_read = asyncio.Event()
+    state = {"name": "Old"}
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "PUT":
+            state["name"] = "New"
+            return httpx.Response(201, json={"name": "New"})
+        if not old_read.is_set():
+            old_read.set()
+            # The response was produced before the update below
+            answer = {"id": 1, "name": "Old"}
+            await asyncio.sleep(0.05)
+            return httpx.Response(200, json=answer)
+        return httpx.Response(200, json={"id": 1, **state})
+
+    async def main():
+        client = make_client(handler, cache=UserCache())
+        read = asyncio.create_task(client.fetch_user(1))
+        await old_read.wait()
+        await client.modify_user(1, UserUpdate(name="New"))
+        assert (await read)["name"] == "Old"
+
+        assert client.cache.get_user(1) is None
+        assert (await client.fetch_user(1))["name"] == "New"
+        assert client.cache.get_user(1)["name"] == "New"
+        await client.close()
+
+    asyncio.run(main())
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import re
+
+import httpx
+import pytest
+
+from user_export import EXPORT_CSV_COLUMNS, JsonArrayDecoder
+
+ITEMS = [
+    {"id": 1, "name": "Ann", "about_me": "likes [brackets], {braces} and \"quotes\" \\ ", "address": None},
+    {"id": 2, "name": "Łukasz", "salary": 1234.5, "tags": [1, [2, 3]], "active": True},
+    12345,
+    -0.5e3,
+    "text, with ] inside",
+    None,
+    False,
+    [],
+]
+TEXT = json.dumps(ITEMS, ensure_ascii=False, indent=1)
+
+
+def decode(chunks: list[str]) -> list:
+    decoder = JsonArrayDecoder()
+    items = []
+    for chunk in chunks:
+        items.extend(decoder.feed(chunk))
+    decoder.close()
+    return items
+
+
+def test_every_split_point_decodes_the_same_items():
+    for split in range(len(TEXT) + 1):
+        assert decode([TEXT[:split], TEXT[split:]]) == ITEMS, f"split at {split}"
+
+
+def test_one_char_chunks():
+    assert decode(list(TEXT)) == ITEMS
+
+
+def test_number_at_the_end_of_a_chunk_waits_for_the_next_one():
+    decoder = JsonArrayDecoder()
+    assert decoder.feed("[1") == []
+    assert decoder.feed("2, tr") == [12]
+    assert decoder.feed("ue]") == [True]
+    decoder.close()
+
+
+def test_only_the_unparsed_tail_is_buffered():
+    decoder = JsonArrayDecoder()
+    decoder.feed('[{"id": 1}, {"id": 2}, {"na')
+    assert decoder._buffer == '{"na'
+
+
+@pytest.mark.parametrize("text, error", [
+    ('{"id": 1}', "Expected a JSON array"),
+    ('[{"id": 1} {"id": 2}]', "Expected ',' or ']'"),
+    ('[1] 2', "Unexpected data after the end"),
+])
+def test_malformed_arrays_are_rejected(text, error):
+    with pytest.raises(ValueError, match=error):
+        decode([text])
+
+
+def test_truncated_array_is_rejected():
+    with pytest.raises(ValueError, match="ended before its closing bracket"):
+        decode(['[{"id": 1},'])
+
+
+def test_oversized_element_is_rejected():
+    decoder = JsonArrayDecoder(max_item_chars=10)
+    with pytest.raises(ValueError, match="longer than 10 chars"):
+        decoder.feed('[{"about_me": "' + "x" * 20)
+
+
+def directory(count: int) -> list[dict]:
+    return [{"id": user_id, "name": f"User{user_id}", "email": f"user{user_id}@example.com"}
+            for user_id in range(1, count + 1)]
+
+
+def streaming_handler(users: list[dict], chunk_size: int = 7):
+    """Serves `GET /v1/users` in small chunks, so users arrive split across chunk boundaries"""
+    body = json.dumps(users).encode()
+
+    async def chunks():
+        for start in range(0, len(body), chunk_size):
+            yield body[start:start + chunk_size]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=chunks())
+
+    return handler
+
+
+def cursor_of(page: str):
+    match = re.search(r'cursor="([^"]+)"', page)
+    return match.group(1) if match else None
+
+
+def test_stream_users_decodes_chunked_body(make_client):
+    users = directory(20)
+
+    async def main():
+        client = make_client(streaming_handler(users))
+        streamed = [user async for user in client.stream_users()]
+        await client.close()
+        return streamed
+
+    assert asyncio.run(main()) == users
+
+
+def test_export_pages_cover_the_directory_with_fixed_csv_columns(make_client):
+    users = directory(5)
+
+    async def main():
+        client = make_client(streaming_handler(users))
+        pages = []
+        cursor = None
+        while True:
+            page = await client.export_users(output_format="csv", cursor=cursor, limit=2)
+            pages.append(page)
+            cursor = cursor_of(page)
+            if not cursor:
+                break
+        stats = client.exporter.stats()
+        await client.close()
+        return pages, stats
+
+    pages, stats = asyncio.run(main())
+    assert len(pages) == 3
+    assert "Export complete: 5 users" in pages[-1]
+    for page in pages:
+        assert page.splitlines()[1] == ",".join(EXPORT_CSV_COLUMNS)
+    exported = [line for page in pages for line in page.splitlines() if line.startswith(tuple("12345"))]
+    assert [int(line.split(",")[0]) for line in exported] == [1, 2, 3, 4, 5]
+    assert stats["resumed_open_streams"] == 2
+    assert stats["open_streams"] == 0
@@ -0,0 +1,97 @@
+import asyncio
+
+import httpx
+
+from models.user_info import UserCreate, UserUpdate
+from user_index import UserSearchIndex
+
+USERS = [
+    {"id": 1, "name": "Anna", "surname": "Smith", "email": "anna@example.com", "gender": "female"},
+    {"id": 2, "name": "Hannah", "surname": "Jones", "email": "hannah@mail.com", "gender": "female"},
+    {"id": 3, "name": "Bob", "surname": "Annandale", "email": "bob@example.com", "gender": "male"},
+]
+
+
+def loaded(users=USERS) -> UserSearchIndex:
+    index = UserSearchIndex()
+    index.load(users)
+    return index
+
+
+def ids(users) -> list[int]:
+    return sorted(user["id"] for user in users)
+
+
+def test_search_matches_the_user_service_semantics():
+    index = loaded()
+    assert ids(index.search(name="ANN")) == [1, 2]
+    assert ids(index.search(name="an")) == [1, 2]
+    assert ids(index.search(surname="ann")) == [3]
+    assert ids(index.search(email="example", gender="Female")) == [1]
+    assert ids(index.search(gender="male")) == [3]
+    assert ids(index.search()) == [1, 2, 3]
+    assert index.search(name="zzz") == []
+
+
+def test_upsert_replaces_the_indexed_values():
+    index = loaded()
+    index.upsert({**USERS[0], "name": "Zoe"})
+    assert ids(index.search(name="anna")) == [2]
+    assert ids(index.search(name="zoe")) == [1]
+
+
+def test_values_without_users_leave_the_postings():
+    index = loaded([])
+    for number in range(100):
+        index.upsert({"id": 1, "name": f"name{number}"})
+    names = index._fields["name"]
+    assert list(names.values) == ["name99"]
+    assert all(postings == {"name99"} for postings in names.trigrams.values())
+
+    index.remove(1)
+    assert not names.values
+    assert not names.trigrams
+
+
+def test_shared_value_stays_while_a_user_has_it():
+    index = loaded([{"id": 1, "name": "Ann"}, {"id": 2, "name": "Ann"}])
+    index.remove(1)
+    assert ids(index.search(name="ann")) == [2]
+
+
+def test_reload_keeps_writes_made_while_the_directory_was_fetched(make_client):
+    snapshot_requested = asyncio.Event()
+    answer = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            snapshot_requested.set()
+            # The snapshot is taken before the writes below
+            snapshot = list(USERS)
+            await answer.wait()
+            return httpx.Response(200, json=snapshot)
+        if request.method == "POST":
+            return httpx.Response(201, json={"id": 4, "name": "Dora", "surname": "New", "email": "dora@example.com"})
+        if request.method == "PUT":
+            return httpx.Response(201, json={"name": "Bobby"})
+        return httpx.Response(204)
+
+    async def main():
+        client = make_client(handler, index=UserSearchIndex(refresh_interval=0))
+        client.index.load(USERS)
+        reload = asyncio.create_task(client.reload_index())
+        await snapshot_requested.wait()
+
+        await client.create_user(UserCreate(name="Dora", surname="New", email="dora@example.com", about_me=""))
+        await client.modify_user(3, UserUpdate(name="Bobby"))
+        await client.remove_user(1)
+        answer.set()
+        await reload
+        await client.close()
+        return client.index
+
+    index = asyncio.run(main())
+    assert sorted(index.users) == [2, 3, 4]
+    assert index.users[3]["name"] == "Bobby"
+    assert ids(index.search(name="dora")) == [4]
+    assert ids(index.search(email="anna@")) == []
@@ -0,0 +1,275 @@
+import datetime
+import math
+import os
+import re
+import time
+from typing import Any, Optional
+
+import numpy as np
+
+USER_ANALYTICS_ENABLED = os.getenv("USER_ANALYTICS_ENABLED", "true").lower() == "true"
+USER_ANALYTICS_REFRESH_SECONDS = float(os.getenv("USER_ANALYTICS_REFRESH_SECONDS", "300"))
+AGGREGATE_MAX_GROUPS = int(os.getenv("AGGREGATE_MAX_GROUPS", "50"))
+
+GROUP_FIELDS = ("gender", "company", "country")
+NUMERIC_FIELDS = ("salary", "age")
+TEXT_FIELDS = ("name", "surname", "email")
+_PERCENTILE = re.compile(r"^p(\d{1,2}(?:\.\d+)?)$")
+
+
+def _field_value(user: dict[str, Any], field: str) -> str:
+    if field == "country":
+        return str((user.get("address") or {}).get("country") or "")
+    return str(user.get(field) or "")
+
+
+def _age(date_of_birth: Optional[str], today: datetime.date) -> float:
+    try:
+        born = datetime.date.fromisoformat(str(date_of_birth))
+    except ValueError:
+        return math.nan
+    return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
+
+
+def _salary(value: Any) -> float:
+    try:
+        return float(value) if value is not None else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class _Column:
+    """Dictionary-encoded string column: distinct values once, an int32 code per row"""
+
+    def __init__(self, capacity: int) -> None:
+        self.values: list[str] = []
+        self.lowered: list[str] = []
+        self._codes_by_value: dict[str, int] = {}
+        self.codes = np.zeros(capacity, dtype=np.int32)
+
+    def encode(self, value: str) -> int:
+        code = self._codes_by_value.get(value)
+        if code is None:
+            code = self._codes_by_value[value] = len(self.values)
+            self.values.append(value)
+            self.lowered.append(value.lower())
+        return code
+
+    def matching(self, query: str, exact: bool) -> np.ndarray:
+        """Lookup table by code: does the value match `query` with the user service semantics (case-insensitive)"""
+        query = query.lower()
+        return np.fromiter(
+            ((value == query if exact else query in value) for value in self.lowered), dtype=bool,
+            count=len(self.lowered),
+        )
+
+
+class UserAnalytics:
+    """
+    Columnar snapshot of the user directory (NumPy arrays, string fields dictionary-encoded) for aggregations.
+    Writes are applied in place: updated rows are overwritten, new rows appended, deleted rows masked out until
+    they make up a quarter of the snapshot and it is compacted.
+    """
+
+    def __init__(self, refresh_interval: float = USER_ANALYTICS_REFRESH_SECONDS, capacity: int = 1024) -> None:
+        self.refresh_interval = refresh_interval
+        self.loaded_at: Optional[float] = None
+        self._reset(capacity)
+
+    def _reset(self, capacity: int):
+        self.size = 0
+        self.deleted = 0
+        self._rows: dict[int, int] = {}
+        self._today = datetime.date.today()
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.numbers = {field: np.full(capacity, np.nan) for field in NUMERIC_FIELDS}
+        self.columns = {field: _Column(capacity) for field in GROUP_FIELDS + TEXT_FIELDS}
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    @property
+    def is_stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > self.refresh_interval
+
+    def invalidate(self):
+        """Forces a full reload on the next aggregation"""
+        self.loaded_at = None
+
+    def _grow(self, capacity: int):
+        def resized(array: np.ndarray, fill: Any) -> np.ndarray:
+            grown = np.full(capacity, fill, dtype=array.dtype)
+            grown[:self.size] = array[:self.size]
+            return grown
+
+        self.ids = resized(self.ids, 0)
+        self.alive = resized(self.alive, False)
+        self.numbers = {field: resized(array, np.nan) for field, array in self.numbers.items()}
+        for column in self.columns.values():
+            column.codes = resized(column.codes, 0)
+
+    def _write_row(self, row: int, user: dict[str, Any]):
+        self.ids[row] = user["id"]
+        self.alive[row] = True
+        self.numbers["salary"][row] = _salary(user.get("salary"))
+        self.numbers["age"][row] = _age(user.get("date_of_birth"), self._today)
+        for field, column in self.columns.items():
+            column.codes[row] = column.encode(_field_value(user, field))
+
+    def load(self, users: list[dict[str, Any]]):
+        """Rebuilds the snapshot from the full directory, column by column"""
+        count = len(users)
+        self._reset(max(count, 1024))
+        self._rows = {user["id"]: row for row, user in enumerate(users)}
+        if len(self._rows) != count:
+            # Duplicate ids: the later record wins, as it would with upserts
+            self._reset(max(count, 1024))
+            for user in users:
+                self.upsert(user)
+        else:
+            self.size = count
+            self.ids[:count] = [user["id"] for user in users]
+            self.alive[:count] = True
+            self.numbers["salary"][:count] = [_salary(user.get("salary")) for user in users]
+            ages: dict[Any, float] = {}
+            self.numbers["age"][:count] = [
+                ages[born] if (born := user.get("date_of_birth")) in ages
+                else ages.setdefault(born, _age(born, self._today))
+                for user in users
+            ]
+            for field, column in self.columns.items():
+                column.codes[:count] = [column.encode(_field_value(user, field)) for user in users]
+        self.loaded_at = time.monotonic()
+
+    def upsert(self, user: dict[str, Any]):
+        row = self._rows.get(user["id"])
+        if row is None:
+            if self.size == len(self.ids):
+                self._grow(len(self.ids) * 2)
+            row = self._rows[user["id"]] = self.size
+            self.size += 1
+        self._write_row(row, user)
+
+    def remove(self, user_id: int):
+        row = self._rows.pop(user_id, None)
+        if row is None:
+            return
+        self.alive[row] = False
+        self.deleted += 1
+        if self.deleted * 4 > self.size:
+            self._compact()
+
+    def _compact(self):
+        keep = np.flatnonzero(self.alive[:self.size])
+        self.ids[:len(keep)] = self.ids[keep]
+        self.alive[:len(keep)] = True
+        self.alive[len(keep):self.size] = False
+        for array in self.numbers.values():
+            array[:len(keep)] = array[keep]
+        for column in self.columns.values():
+            column.codes[:len(keep)] = column.codes[keep]
+        self.size = len(keep)
+        self.deleted = 0
+        self._rows = {int(user_id): row for row, user_id in enumerate(self.ids[:self.size])}
+
+    def _mask(self, filters: dict[str, Optional[str]]) -> np.ndarray:
+        mask = self.alive[:self.size].copy()
+        for field, query in filters.items():
+            if query:
+                column = self.columns[field]
+                mask &= column.matching(query, exact=field == "gender")[column.codes[:self.size]]
+        return mask
+
+    @staticmethod
+    def _operation(values: np.ndarray, operation: str) -> float:
+        """`values` are sorted and without NaN"""
+        if not len(values):
+            return math.nan
+        if operation == "sum":
+            return float(values.sum())
+        if operation == "mean":
+            return float(values.mean())
+        if operation == "min":
+            return float(values[0])
+        if operation == "max":
+            return float(values[-1])
+        return float(np.percentile(values, float(_PERCENTILE.match(operation).group(1))))
+
+    def aggregate(
+            self,
+            operations: list[str],
+            field: Optional[str] = None,
+            group_by: Optional[str] = None,
+            filters: Optional[dict[str, Optional[str]]] = None,
+    ) -> list[dict[str, Any]]:
+        """
+        One row per group (or a single row without `group_by`) with `count` and every operation over `field`,
+        largest groups first. Users without a value of `field` count but are left out of the operations.
+        """
+        for operation in operations:
+            if operation not in ("count", "sum", "mean", "min", "max") and not _PERCENTILE.match(operation):
+                raise ValueError(f"Unknown operation: {operation}, use count, sum, mean, min, max or p<0-99>")
+        numeric = [operation for operation in operations if operation != "count"]
+        if numeric and field not in NUMERIC_FIELDS:
+            raise ValueError(f"Operations {', '.join(numeric)} need `field`, one of: {', '.join(NUMERIC_FIELDS)}")
+        if group_by is not None and group_by not in GROUP_FIELDS:
+            raise ValueError(f"Unknown group_by: {group_by}, use one of: {', '.join(GROUP_FIELDS)}")
+
+        mask = self._mask(filters or {})
+        if group_by:
+            column = self.columns[group_by]
+            codes = column.codes[:self.size][mask]
+            labels = column.values
+        else:
+            codes = np.zeros(int(mask.sum()), dtype=np.int32)
+            labels = ["all"]
+        counts = np.bincount(codes, minlength=len(labels))
+
+        grouped_values = bounds = sums = present_counts = None
+        ordered = any(operation not in ("sum", "mean") for operation in numeric)
+        if numeric:
+            values = self.numbers[field][:self.size][mask]
+            present = ~np.isnan(values)
+            grouped_codes, values = codes[present], values[present]
+        if numeric and not ordered:
+            # Sums and means need no sorting at all: weighted counts per group
+            sums = np.bincount(grouped_codes, weights=values, minlength=len(labels))
+            present_counts = np.bincount(grouped_codes, minlength=len(labels))
+        elif numeric:
+            # Stable sort by group code only (radix sort for int32): each group is one slice of `grouped_values`,
+            # sorted by value on its own for min/max/percentiles
+            order = np.argsort(grouped_codes, kind="stable")
+            grouped_values = values[order]
+            bounds = np.searchsorted(grouped_codes[order], np.arange(len(labels) + 1))
+
+        rows = []
+        for code in np.argsort(-counts, kind="stable"):
+            if not counts[code]:
+                break
+            row = {"group": labels[code], "count": int(counts[code])}
+            if sums is not None:
+                for operation in numeric:
+                    if not present_counts[code]:
+                        row[operation] = math.nan
+                    elif operation == "sum":
+                        row[operation] = float(sums[code])
+                    else:
+                        row[operation] = float(sums[code] / present_counts[code])
+            elif numeric:
+                values = np.sort(grouped_values[bounds[code]:bounds[code + 1]])
+                for operation in numeric:
+                    row[operation] = self._operation(values, operation)
+            rows.append(row)
+        return rows
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "users": self.size - self.deleted,
+            "deleted_rows": self.deleted,
+            "capacity": len(self.ids),
+            "age_seconds": round(time.monotonic() - self.loaded_at, 1) if self.loaded_at else None,
+            "refresh_interval_seconds": self.refresh_interval,
+            "distinct_values": {field: len(self.columns[field].values) for field in GROUP_FIELDS},
+        }
@@ -0,0 +1,126 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+USER_CACHE_ENABLED = os.getenv("USER_CACHE_ENABLED", "true").lower() == "true"
+USER_CACHE_MAX_ENTRIES = int(os.getenv("USER_CACHE_MAX_ENTRIES", "1024"))
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "30"))
+
+SEARCH_FIELDS = ("name", "surname", "email", "gender")
+
+
+def matches_search(user: dict[str, Any], filters: dict[str, Optional[str]]) -> bool:
+    """Same semantics as the user service: partial case-insensitive name/surname/email, exact gender"""
+    for field in SEARCH_FIELDS:
+        expected = filters.get(field)
+        if not expected:
+            continue
+        actual = str(user.get(field) or "").lower()
+        if field == "gender":
+            if actual != expected.lower():
+                return False
+        elif expected.lower() not in actual:
+            return False
+    return True
+
+
+class UserCache:
+    """Bounded LRU cache with TTL for user records and search results"""
+
+    def __init__(self, max_entries: int = USER_CACHE_MAX_ENTRIES, ttl: float = USER_CACHE_TTL_SECONDS) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        # Bumped by every invalidation, a read that started before one must not store its result
+        self.generation = 0
+        self._entries: OrderedDict[tuple, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _search_key(filters: dict[str, Optional[str]]) -> tuple:
+        return ("search",) + tuple((filters.get(field) or "").lower() for field in SEARCH_FIELDS)
+
+    @staticmethod
+    def _search_filters(key: tuple) -> dict[str, str]:
+        return dict(zip(SEARCH_FIELDS, key[1:]))
+
+    def _get(self, key: tuple) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def _set(self, key: tuple, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _pop(self, key: tuple):
+        if self._entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def get_user(self, user_id: int) -> Optional[dict[str, Any]]:
+        return self._get(("user", user_id))
+
+    def set_user(self, user_id: int, user: dict[str, Any], generation: int):
+        """`generation` is the value seen before the upstream call, a write since then makes `user` unsafe to store"""
+        if generation == self.generation:
+            self._set(("user", user_id), user)
+
+    def get_search(self, filters: dict[str, Optional[str]]) -> Optional[list[dict[str, Any]]]:
+        return self._get(self._search_key(filters))
+
+    def set_search(self, filters: dict[str, Optional[str]], users: list[dict[str, Any]], generation: int):
+        if generation == self.generation:
+            self._set(self._search_key(filters), users)
+
+    def invalidate_user(self, user_id: int, user: Optional[dict[str, Any]] = None):
+        """
+        Drops the user entry and every cached search that contains the user or whose filters match its new state.
+        When the new state is unknown (user is None) all searches containing the user are dropped.
+        """
+        self.generation += 1
+        self._pop(("user", user_id))
+
+        for key in [key for key in self._entries if key[0] == "search"]:
+            _, users = self._entries[key]
+            if any(cached.get("id") == user_id for cached in users) or (
+                    user is not None and matches_search(user, self._search_filters(key))
+            ):
+                self._pop(key)
+
+    def invalidate_searches(self):
+        self.generation += 1
+        for key in [key for key in self._entries if key[0] == "search"]:
+            self._pop(key)
+
+    def stats(self) -> dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
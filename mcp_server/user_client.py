@@ -1,50 +1,275 @@
+import asyncio
+import base64
+import json
 import os
-from typing import Any, Optional
+import sys
+import time
+from typing import Any, AsyncGenerator, Awaitable, Callable, Coroutine, Optional
 
-import requests
+import httpx
 
-from models.user_info import UserUpdate, UserCreate
+from latency import LatencyRecorder, operation_name
+from models.user_info import UserUpdate, UserCreate, UserUpdateItem
+from resilience import (
+    USER_SERVICE_HEDGE, USER_SERVICE_HEDGE_DELAY, USER_SERVICE_HEDGE_MIN_SAMPLES, USER_SERVICE_HEDGE_QUANTILE,
+    USER_SERVICE_READ_RETRIES, CircuitBreaker, CircuitOpenError, ResilienceMetrics, backoff_delay, hedged,
+)
+from user_cache import UserCache
+from user_export import JsonArrayDecoder, UserExporter
+from user_index import UserSearchIndex
+from single_flight import SingleFlight, USER_COALESCE_ENABLED
+from user_analytics import AGGREGATE_MAX_GROUPS, UserAnalytics
+from user_renderer import get_renderer
 
 USER_SERVICE_ENDPOINT = os.getenv("USERS_MANAGEMENT_SERVICE_URL", "http://localhost:8041")
+USER_SERVICE_MAX_CONNECTIONS = int(os.getenv("USER_SERVICE_MAX_CONNECTIONS", "100"))
+USER_SERVICE_MAX_KEEPALIVE = int(os.getenv("USER_SERVICE_MAX_KEEPALIVE", "20"))
+USER_SERVICE_CONNECT_TIMEOUT = float(os.getenv("USER_SERVICE_CONNECT_TIMEOUT", "5"))
+USER_SERVICE_READ_TIMEOUT = float(os.getenv("USER_SERVICE_READ_TIMEOUT", "30"))
+USER_SERVICE_HTTP2 = os.getenv("USER_SERVICE_HTTP2", "true").lower() == "true"
+SEARCH_DEFAULT_LIMIT = int(os.getenv("SEARCH_DEFAULT_LIMIT", "20"))
+SEARCH_MAX_LIMIT = int(os.getenv("SEARCH_MAX_LIMIT", "100"))
+SEARCH_MAX_RESULT_CHARS = int(os.getenv("SEARCH_MAX_RESULT_CHARS", "16000"))
+USER_SERVICE_GET_DEADLINE = float(os.getenv("USER_SERVICE_GET_DEADLINE", "5"))
+USER_SERVICE_SEARCH_DEADLINE = float(os.getenv("USER_SERVICE_SEARCH_DEADLINE", "10"))
+USER_SERVICE_LIST_DEADLINE = float(os.getenv("USER_SERVICE_LIST_DEADLINE", "60"))
+USER_SERVICE_WRITE_DEADLINE = float(os.getenv("USER_SERVICE_WRITE_DEADLINE", "15"))
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", "10"))
+BULK_MAX_ITEMS = int(os.getenv("BULK_MAX_ITEMS", "100"))
+
+
+# Whole operation, retries and hedged requests included
+DEADLINES = {
+    "get_user": USER_SERVICE_GET_DEADLINE,
+    "search_users": USER_SERVICE_SEARCH_DEADLINE,
+    "list_users": USER_SERVICE_LIST_DEADLINE,
+    "create_user": USER_SERVICE_WRITE_DEADLINE,
+    "update_user": USER_SERVICE_WRITE_DEADLINE,
+    "delete_user": USER_SERVICE_WRITE_DEADLINE,
+}
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+
+
+def encode_cursor(filters: dict[str, str], offset: int, fields: Optional[list[str]]) -> str:
+    payload = json.dumps({"f": filters, "o": offset, "p": fields}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[dict[str, str], int, Optional[list[str]]]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return payload["f"], int(payload["o"]), payload["p"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
 
 class UserClient:
 
-    def __user_to_string(self, user: dict[str, Any]):
-        user_str = "```\n"
-        for key, value in user.items():
-            user_str += f"  {key}: {value}\n"
-        user_str += "```\n"
+    def __init__(
+            self,
+            base_url: str = USER_SERVICE_ENDPOINT,
+            max_connections: int = USER_SERVICE_MAX_CONNECTIONS,
+            max_keepalive_connections: int = USER_SERVICE_MAX_KEEPALIVE,
+            connect_timeout: float = USER_SERVICE_CONNECT_TIMEOUT,
+            read_timeout: float = USER_SERVICE_READ_TIMEOUT,
+            http2: bool = USER_SERVICE_HTTP2,
+            cache: Optional[UserCache] = None,
+            index: Optional[UserSearchIndex] = None,
+            bulk_concurrency: int = BULK_CONCURRENCY,
+            latency: Optional[LatencyRecorder] = None,
+            deadlines: Optional[dict[str, float]] = None,
+            read_retries: int = USER_SERVICE_READ_RETRIES,
+            hedge: bool = USER_SERVICE_HEDGE,
+            breaker: Optional[CircuitBreaker] = None,
+            coalesce: bool = USER_COALESCE_ENABLED,
+            analytics: Optional[UserAnalytics] = None,
+    ) -> None:
+        self.bulk_concurrency = bulk_concurrency
+        self.deadlines = {**DEADLINES, **(deadlines or {})}
+        self.read_retries = read_retries
+        self.hedge = hedge
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = ResilienceMetrics()
+        self.flight = SingleFlight() if coalesce else None
+        self.cache = cache
+        self.index = index
+        self.latency = latency
+        self._index_lock = asyncio.Lock()
+        self._index_refresh: Optional[asyncio.Task] = None
+        self.analytics = analytics
+        self._analytics_lock = asyncio.Lock()
+        self._analytics_refresh: Optional[asyncio.Task] = None
+        # Writes applied to a local replica ("index" or "analytics") while its next snapshot is being fetched
+        self._reload_writes: dict[str, list[tuple[str, tuple]]] = {}
+        self.exporter = UserExporter(self.stream_users)
+        # All upstream calls go through one pooled client, so connections are kept alive and reused between
+        # tool calls. The user service is a single host, so `max_connections` is effectively the per-host limit.
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            headers={"Content-Type": "application/json"},
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            http2=http2 and _http2_available(),
+            event_hooks={"request": [self._on_request], "response": [self._on_response]} if latency else None,
+        )
 
-        return user_str
+    async def close(self):
+        await self.exporter.close()
+        await self._http.aclose()
 
-    def __users_to_string(self, users: list[dict[str, Any]]):
-        users_str = ""
-        for value in users:
-            users_str += self.__user_to_string(value)
-        users_str += "\n"
+    @staticmethod
+    async def _on_request(request: httpx.Request):
+        request.extensions["started"] = time.perf_counter()
 
-        return users_str
+    async def _on_response(self, response: httpx.Response):
+        request = response.request
+        if request.extensions.get("streamed"):
+            # The body is consumed incrementally by the caller, its sample covers the headers only
+            self.latency.record(
+                operation_name(request.method, request.url.path),
+                time.perf_counter() - request.extensions["started"],
+            )
+            return
+        # Reading the body here makes the sample cover the whole exchange, not just the headers
+        await response.aread()
+        self.latency.record(
+            operation_name(request.method, request.url.path),
+            time.perf_counter() - request.extensions["started"],
+        )
 
-    async def get_user(self, user_id: int) -> str:
-        headers = {"Content-Type": "application/json"}
+    def _hedge_delay(self, method: str, url: str) -> float:
+        """The recent p95 of this operation, so only the slowest ~5% of requests are sent twice"""
+        if self.latency:
+            delay = self.latency.quantile(
+                operation_name(method, url), USER_SERVICE_HEDGE_QUANTILE, USER_SERVICE_HEDGE_MIN_SAMPLES
+            )
+            if delay is not None:
+                return delay
+        return USER_SERVICE_HEDGE_DELAY
 
-        response = requests.get(url=f"{USER_SERVICE_ENDPOINT}/v1/users/{user_id}", headers=headers)
+    async def _attempt(self, operation: str, method: str, url: str, hedge: bool, **kwargs: Any) -> httpx.Response:
+        trial = self.breaker.before_call()
+
+        async def send() -> httpx.Response:
+            return await self._http.request(method, url, **kwargs)
+
+        try:
+            if hedge:
+                response = await hedged(
+                    send,
+                    self._hedge_delay(method, url),
+                    on_hedge=lambda: self.metrics.count(operation, "hedges"),
+                    on_hedge_win=lambda: self.metrics.count(operation, "hedge_wins"),
+                )
+            else:
+                response = await send()
+            if response.status_code >= 500:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+            return response
+        except httpx.TransportError:
+            self.breaker.record_failure()
+            raise
+        finally:
+            # Cancellation (by the MCP caller or the deadline) says nothing about the upstream here, the deadline
+            # is recorded as a failure by `_request`
+            if trial:
+                self.breaker.release_trial()
+
+    async def _request(
+            self,
+            operation: str,
+            method: str,
+            url: str,
+            retries: int = 0,
+            hedge: bool = False,
+            **kwargs: Any,
+    ) -> httpx.Response:
+        """
+        One upstream operation within its deadline. Fails fast while the circuit is open, otherwise retries transport
+        errors and RETRYABLE_STATUSES up to `retries` times (only for idempotent reads) with jittered backoff.
+        """
+        deadline = self.deadlines[operation]
+        self.metrics.count(operation, "calls")
+        started = time.perf_counter()
+        try:
+            async with asyncio.timeout(deadline):
+                attempt = 0
+                while True:
+                    try:
+                        response = await self._attempt(operation, method, url, hedge, **kwargs)
+                        if response.status_code not in RETRYABLE_STATUSES or attempt >= retries:
+                            return response
+                    except httpx.TransportError:
+                        if attempt >= retries:
+                            raise
+                    self.metrics.count(operation, "retries")
+                    await asyncio.sleep(backoff_delay(attempt))
+                    attempt += 1
+        except CircuitOpenError:
+            self.metrics.count(operation, "rejected")
+            raise
+        except TimeoutError:
+            self.breaker.record_failure()
+            self.metrics.count(operation, "deadline_exceeded")
+            raise Exception(f"User service did not answer {operation} within {deadline}s")
+        except Exception:
+            self.metrics.count(operation, "failures")
+            raise
+        finally:
+            self.metrics.latency.record(operation, time.perf_counter() - started)
+
+    async def _coalesced(self, key: tuple, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Identical concurrent reads share one upstream request, writes never go through here"""
+        if self.flight is None:
+            return await call()
+        return await self.flight.do(key, call)
+
+    def _forget_reads(self, user_id: Optional[int] = None):
+        # Reads already in flight may predate the write, callers after it must not join them
+        if self.flight:
+            self.flight.forget(lambda key: key[0] == "search" or key == ("user", user_id))
+
+    async def fetch_user(self, user_id: int) -> dict[str, Any]:
+        """Get raw user record, served from cache when possible"""
+        if self.cache and (cached := self.cache.get_user(user_id)) is not None:
+            return cached
+        return await self._coalesced(("user", user_id), lambda: self._fetch_user(user_id))
+
+    async def _fetch_user(self, user_id: int) -> dict[str, Any]:
+        generation = self.cache.generation if self.cache else 0
+        response = await self._request(
+            "get_user", "GET", f"/v1/users/{user_id}", retries=self.read_retries, hedge=self.hedge
+        )
 
         if response.status_code == 200:
             data = response.json()
-            return self.__user_to_string(data)
+            if self.cache:
+                self.cache.set_user(user_id, data, generation)
+            return data
 
         raise Exception(f"HTTP {response.status_code}: {response.text}")
 
-    async def search_users(
+    async def fetch_users(
             self,
             name: Optional[str] = None,
             surname: Optional[str] = None,
             email: Optional[str] = None,
             gender: Optional[str] = None,
-    ) -> str:
-        headers = {"Content-Type": "application/json"}
-
+    ) -> list[dict[str, Any]]:
+        """Search raw user records, served from cache when possible"""
         params = {}
         if name:
             params["name"] = name
@@ -55,49 +280,389 @@ class UserClient:
         if gender:
             params["gender"] = gender
 
-        response = requests.get(url=USER_SERVICE_ENDPOINT + "/v1/users/search", headers=headers, params=params)
+        if self.index:
+            return await self._search_index(params)
+
+        if self.cache and (cached := self.cache.get_search(params)) is not None:
+            return cached
+        return await self._coalesced(("search", tuple(sorted(params.items()))), lambda: self._fetch_users(params))
+
+    async def _fetch_users(self, params: dict[str, str]) -> list[dict[str, Any]]:
+        generation = self.cache.generation if self.cache else 0
+        response = await self._request(
+            "search_users", "GET", "/v1/users/search", retries=self.read_retries, hedge=self.hedge, params=params
+        )
 
         if response.status_code == 200:
             data = response.json()
-            print(f"Get {len(data)} users successfully")
-            return self.__users_to_string(data)
+            print(f"Get {len(data)} users successfully", file=sys.stderr)
+            if self.cache:
+                self.cache.set_search(params, data, generation)
+            return data
 
         raise Exception(f"HTTP {response.status_code}: {response.text}")
 
-    async def add_user(self, user_create_model: UserCreate) -> str:
-        headers = {"Content-Type": "application/json"}
+    async def fetch_all_users(self) -> list[dict[str, Any]]:
+        """Get the whole user directory"""
+        response = await self._request("list_users", "GET", "/v1/users", retries=self.read_retries)
+
+        if response.status_code == 200:
+            return response.json()
+
+        raise Exception(f"HTTP {response.status_code}: {response.text}")
+
+    async def stream_users(self) -> AsyncGenerator[dict[str, Any], None]:
+        """
+        The whole user directory, decoded from `GET /v1/users` while the body arrives instead of after its last byte.
+        There is no deadline for the whole stream, the read timeout bounds every wait for the next chunk.
+        """
+        self.metrics.count("export_users", "calls")
+        trial = self.breaker.before_call()
+        decoder = JsonArrayDecoder()
+        try:
+            async with self._http.stream("GET", "/v1/users", extensions={"streamed": True}) as response:
+                if response.status_code >= 500:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                # The outcome is recorded, the rest of the body may take long and must not free a later trial
+                trial = False
+                if response.status_code != 200:
+                    await response.aread()
+                    raise Exception(f"HTTP {response.status_code}: {response.text}")
+                async for text in response.aiter_text():
+                    for user in decoder.feed(text):
+                        yield user
+            decoder.close()
+        except httpx.TransportError:
+            self.breaker.record_failure()
+            self.metrics.count("export_users", "failures")
+            raise
+        except Exception:
+            self.metrics.count("export_users", "failures")
+            raise
+        finally:
+            # An abandoned export (GeneratorExit) or a cancelled caller is not an upstream failure
+            if trial:
+                self.breaker.release_trial()
+
+    def _write_replica(self, name: str, method: str, *args):
+        """Applies a write to the local replica `name` and keeps it for replay while the replica is reloading"""
+        replica = getattr(self, name)
+        if replica is None:
+            return
+        if replica.is_loaded:
+            getattr(replica, method)(*args)
+        if name in self._reload_writes:
+            self._reload_writes[name].append((method, args))
+
+    async def _fetch_snapshot(self, name: str) -> tuple[list[dict[str, Any]], list[tuple[str, tuple]]]:
+        """
+        All users for a reload of the local replica `name`, plus the writes made while they were fetched: the fetched
+        directory may predate them, so they are replayed on the new snapshot
+        """
+        writes = self._reload_writes[name] = []
+        try:
+            return await self.fetch_all_users(), writes
+        finally:
+            del self._reload_writes[name]
+
+    @staticmethod
+    def _replay_writes(replica: Any, writes: list[tuple[str, tuple]]):
+        for method, args in writes:
+            getattr(replica, method)(*args)
+
+    async def reload_index(self):
+        async with self._index_lock:
+            if not self.index.is_stale:
+                return
+            users, writes = await self._fetch_snapshot("index")
+            self.index.load(users)
+            self._replay_writes(self.index, writes)
+            print(f"Search index loaded with {len(users)} users", file=sys.stderr)
+
+    async def _search_index(self, params: dict[str, str]) -> list[dict[str, Any]]:
+        if not self.index.is_loaded:
+            await self.reload_index()
+        elif self.index.is_stale and (self._index_refresh is None or self._index_refresh.done()):
+            # Serve the current snapshot while the next one is loading
+            self._index_refresh = asyncio.create_task(self.reload_index())
+        return self.index.search(**params)
+
+    async def reload_analytics(self):
+        async with self._analytics_lock:
+            if not self.analytics.is_stale:
+                return
+            users, writes = await self._fetch_snapshot("analytics")
+            started = time.perf_counter()
+            self.analytics.load(users)
+            self._replay_writes(self.analytics, writes)
+            print(
+                f"Analytics snapshot loaded with {len(users)} users in {time.perf_counter() - started:.2f}s",
+                file=sys.stderr,
+            )
+
+    async def get_user(self, user_id: int, output_format: Optional[str] = None) -> str:
+        return get_renderer(output_format).render([await self.fetch_user(user_id)])
+
+    async def search_users(
+            self,
+            name: Optional[str] = None,
+            surname: Optional[str] = None,
+            email: Optional[str] = None,
+            gender: Optional[str] = None,
+            limit: Optional[int] = None,
+            offset: int = 0,
+            cursor: Optional[str] = None,
+            fields: Optional[list[str]] = None,
+            output_format: Optional[str] = None,
+    ) -> str:
+        """
+        Returns one page of matching users. The page holds at most `limit` users and is cut earlier if it would grow
+        beyond SEARCH_MAX_RESULT_CHARS. When more users match, the result ends with a cursor for the next page.
+        `cursor` (from the previous page) takes precedence over filters, `offset` and `fields`.
+        """
+        if cursor:
+            filters, offset, fields = decode_cursor(cursor)
+        else:
+            filters = {
+                key: value for key, value in
+                (("name", name), ("surname", surname), ("email", email), ("gender", gender)) if value
+            }
+        limit = max(1, min(limit or SEARCH_DEFAULT_LIMIT, SEARCH_MAX_LIMIT))
+        offset = max(0, offset)
+
+        renderer = get_renderer(output_format)
+        users = await self.fetch_users(**filters)
+
+        candidates = users[offset:offset + limit]
+        if fields:
+            candidates = [{key: user[key] for key in fields if key in user} for user in candidates]
+
+        header = renderer.header(candidates)
+        page = []
+        page_chars = len(header)
+        for user in candidates:
+            user_str = renderer.record(user)
+            if page and page_chars + len(user_str) > SEARCH_MAX_RESULT_CHARS:
+                break
+            page.append(user_str)
+            page_chars += len(user_str)
+
+        next_offset = offset + len(page)
+        result = [f"Found {len(users)} users, showing {offset + 1 if page else 0}-{next_offset}:\n", header]
+        result.extend(page)
+        if next_offset < len(users):
+            result.append(
+                f"\n{len(users) - next_offset} more users. To get them call `search_user` with "
+                f"cursor=\"{encode_cursor(filters, next_offset, fields)}\"\n"
+            )
 
-        response = requests.post(
-            url=f"{USER_SERVICE_ENDPOINT}/v1/users",
-            headers=headers,
-            json=user_create_model.model_dump()
+        return "".join(result)
+
+    async def aggregate_users(
+            self,
+            operations: list[str],
+            field: Optional[str] = None,
+            group_by: Optional[str] = None,
+            name: Optional[str] = None,
+            surname: Optional[str] = None,
+            email: Optional[str] = None,
+            gender: Optional[str] = None,
+    ) -> str:
+        """
+        Aggregates over the columnar snapshot as CSV, one line per group, largest groups first and at most
+        AGGREGATE_MAX_GROUPS of them. The snapshot is loaded on first use and refreshed in the background when stale.
+        Without a kept snapshot (`analytics` is None) every call aggregates over a fresh copy of the directory.
+        """
+        if self.analytics is None:
+            analytics = UserAnalytics()
+            analytics.load(await self.fetch_all_users())
+        else:
+            analytics = self.analytics
+            if not analytics.is_loaded:
+                await self.reload_analytics()
+            elif analytics.is_stale and (self._analytics_refresh is None or self._analytics_refresh.done()):
+                self._analytics_refresh = asyncio.create_task(self.reload_analytics())
+
+        operations = list(dict.fromkeys(["count", *operations]))
+        rows = analytics.aggregate(
+            operations,
+            field=field,
+            group_by=group_by,
+            filters={"name": name, "surname": surname, "email": email, "gender": gender},
+        )
+
+        def cell(value: Any) -> str:
+            if isinstance(value, float):
+                return "" if value != value else f"{value:.2f}".rstrip("0").rstrip(".")
+            return str(value).replace(",", " ") or "(none)"
+
+        matched = sum(row["count"] for row in rows)
+        columns = [group_by or "group"] + [
+            operation if operation == "count" else f"{operation}({field})" for operation in operations
+        ]
+        result = [f"Aggregated {matched} users in {len(rows)} groups:\n", ",".join(columns) + "\n"]
+        result.extend(
+            ",".join(cell(value) for value in (row["group"], *(row[op] for op in operations))) + "\n"
+            for row in rows[:AGGREGATE_MAX_GROUPS]
         )
+        if len(rows) > AGGREGATE_MAX_GROUPS:
+            others = sum(row["count"] for row in rows[AGGREGATE_MAX_GROUPS:])
+            result.append(f"\n{len(rows) - AGGREGATE_MAX_GROUPS} more groups with {others} users not shown\n")
+        return "".join(result)
+
+    async def export_users(
+            self,
+            output_format: str = "jsonl",
+            cursor: Optional[str] = None,
+            limit: Optional[int] = None,
+            fields: Optional[list[str]] = None,
+            on_progress: Optional[Callable[[int], Awaitable[None]]] = None,
+    ) -> str:
+        return await self.exporter.export_page(
+            output_format=output_format, cursor=cursor, limit=limit, fields=fields, on_progress=on_progress
+        )
+
+    @staticmethod
+    def _response_user(response: httpx.Response) -> Optional[dict[str, Any]]:
+        try:
+            data = response.json()
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+
+    async def create_user(self, user_create_model: UserCreate) -> Optional[dict[str, Any]]:
+        """Create user, returns the created record when the service sends it back"""
+        response = await self._request("create_user", "POST", "/v1/users", json=user_create_model.model_dump())
 
         if response.status_code == 201:
-            return f"User successfully added: {response.text}"
+            user = self._response_user(response)
+            self._forget_reads()
+            if self.cache:
+                if user is not None and "id" in user:
+                    self.cache.invalidate_user(user["id"], user)
+                else:
+                    self.cache.invalidate_searches()
+            if user is not None and "id" in user:
+                self._write_replica("index", "upsert", user)
+            else:
+                self._write_replica("index", "invalidate")
+            if user is not None and "id" in user:
+                self._write_replica("analytics", "upsert", user)
+            else:
+                self._write_replica("analytics", "invalidate")
+            return user
 
         raise Exception(f"HTTP {response.status_code}: {response.text}")
 
-    async def update_user(self, user_id: int, user_update_model: UserUpdate) -> str:
-        headers = {"Content-Type": "application/json"}
-
-        response = requests.put(
-            url=f"{USER_SERVICE_ENDPOINT}/v1/users/{user_id}",
-            headers=headers,
-            json=user_update_model.model_dump()
+    async def modify_user(self, user_id: int, user_update_model: UserUpdate) -> Optional[dict[str, Any]]:
+        """Update user, returns the updated record when the service sends it back"""
+        response = await self._request(
+            "update_user", "PUT", f"/v1/users/{user_id}", json=user_update_model.model_dump()
         )
 
         if response.status_code == 201:
-            return f"User successfully updated: {response.text}"
+            user = self._response_user(response)
+            self._forget_reads(user_id)
+            if self.cache:
+                self.cache.invalidate_user(user_id, user)
+                if user is None:
+                    self.cache.invalidate_searches()
+            if user is not None:
+                self._write_replica("index", "upsert", {"id": user_id, **user})
+            else:
+                self._write_replica("index", "invalidate")
+            if user is not None:
+                self._write_replica("analytics", "upsert", {"id": user_id, **user})
+            else:
+                self._write_replica("analytics", "invalidate")
+            return user
 
         raise Exception(f"HTTP {response.status_code}: {response.text}")
 
-    async def delete_user(self, user_id: int) -> str:
-        headers = {"Content-Type": "application/json"}
-
-        response = requests.delete(url=f"{USER_SERVICE_ENDPOINT}/v1/users/{user_id}", headers=headers)
+    async def remove_user(self, user_id: int):
+        response = await self._request("delete_user", "DELETE", f"/v1/users/{user_id}")
 
         if response.status_code == 204:
-            return "User successfully deleted"
+            self._forget_reads(user_id)
+            if self.cache:
+                self.cache.invalidate_user(user_id)
+            self._write_replica("index", "remove", user_id)
+            self._write_replica("analytics", "remove", user_id)
+            return
 
         raise Exception(f"HTTP {response.status_code}: {response.text}")
+
+    async def add_user(self, user_create_model: UserCreate) -> str:
+        user = await self.create_user(user_create_model)
+        return f"User successfully added: {json.dumps(user)}"
+
+    async def update_user(self, user_id: int, user_update_model: UserUpdate) -> str:
+        user = await self.modify_user(user_id, user_update_model)
+        return f"User successfully updated: {json.dumps(user)}"
+
+    async def delete_user(self, user_id: int) -> str:
+        await self.remove_user(user_id)
+        return "User successfully deleted"
+
+    # ==================== BULK OPERATIONS ====================
+
+    async def _bounded_gather(self, coroutines: list[Coroutine]) -> list[Any]:
+        """Runs coroutines with at most `bulk_concurrency` in flight, exceptions are returned instead of raised"""
+        semaphore = asyncio.Semaphore(self.bulk_concurrency)
+
+        async def run(coroutine: Coroutine):
+            async with semaphore:
+                return await coroutine
+
+        return await asyncio.gather(*(run(coroutine) for coroutine in coroutines), return_exceptions=True)
+
+    @staticmethod
+    def _check_bulk_size(items: list):
+        if len(items) > BULK_MAX_ITEMS:
+            raise ValueError(f"Too many items: {len(items)}, at most {BULK_MAX_ITEMS} per call")
+
+    @staticmethod
+    def _bulk_report(action: str, items: list[Any], results: list[Any], describe) -> str:
+        """One summary line, then `<index>: ok ...` or `<index>: error ...` per item in request order"""
+        lines = []
+        succeeded = 0
+        for index, (item, result) in enumerate(zip(items, results)):
+            if isinstance(result, BaseException):
+                lines.append(f"{index}: error {result}")
+            else:
+                succeeded += 1
+                lines.append(f"{index}: ok {describe(item, result)}")
+        return f"{action} {succeeded}/{len(items)} users\n" + "\n".join(lines)
+
+    async def get_users_by_ids(self, user_ids: list[int], output_format: Optional[str] = None) -> str:
+        self._check_bulk_size(user_ids)
+        results = await self._bounded_gather([self.fetch_user(user_id) for user_id in user_ids])
+
+        found = [result for result in results if not isinstance(result, BaseException)]
+        errors = [
+            f"id={user_id}: error {result}"
+            for user_id, result in zip(user_ids, results) if isinstance(result, BaseException)
+        ]
+        output = f"Found {len(found)}/{len(user_ids)} users\n" + get_renderer(output_format).render(found)
+        if errors:
+            output += "\n".join(errors) + "\n"
+        return output
+
+    async def bulk_add_users(self, user_create_models: list[UserCreate]) -> str:
+        self._check_bulk_size(user_create_models)
+        results = await self._bounded_gather([self.create_user(model) for model in user_create_models])
+        return self._bulk_report("Added", user_create_models, results, lambda _, user: f"id={(user or {}).get('id')}")
+
+    async def bulk_update_users(self, updates: list[UserUpdateItem]) -> str:
+        self._check_bulk_size(updates)
+        results = await self._bounded_gather(
+            [self.modify_user(update.user_id, update.user_update_model) for update in updates]
+        )
+        return self._bulk_report("Updated", updates, results, lambda update, _: f"id={update.user_id}")
+
+    async def bulk_delete_users(self, user_ids: list[int]) -> str:
+        self._check_bulk_size(user_ids)
+        results = await self._bounded_gather([self.remove_user(user_id) for user_id in user_ids])
+        return self._bulk_report("Deleted", user_ids, results, lambda user_id, _: f"id={user_id}")
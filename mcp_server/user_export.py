@@ -0,0 +1,277 @@
+import base64
+import json
+import os
+import re
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, AsyncGenerator, Awaitable, Callable, Optional, get_args
+
+from pydantic import BaseModel
+
+from models.user_info import UserCreate
+from user_renderer import CsvRenderer, UserRenderer, get_renderer
+
+EXPORT_PAGE_USERS = int(os.getenv("EXPORT_PAGE_USERS", "100"))
+EXPORT_MAX_PAGE_USERS = int(os.getenv("EXPORT_MAX_PAGE_USERS", "100000"))
+EXPORT_PROGRESS_EVERY = int(os.getenv("EXPORT_PROGRESS_EVERY", "1000"))
+EXPORT_MAX_OPEN_STREAMS = int(os.getenv("EXPORT_MAX_OPEN_STREAMS", "4"))
+EXPORT_STREAM_IDLE_SECONDS = float(os.getenv("EXPORT_STREAM_IDLE_SECONDS", "60"))
+EXPORT_MAX_ITEM_CHARS = 1024 * 1024
+
+EXPORT_FORMATS = ("jsonl", "csv")
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_NUMBER_CHARS = re.compile(r"[0-9.eE+-]*")
+
+
+def _flat_columns(model: type[BaseModel]) -> list[str]:
+    columns = []
+    for name, field in model.model_fields.items():
+        nested = next(
+            (arg for arg in (field.annotation, *get_args(field.annotation))
+             if isinstance(arg, type) and issubclass(arg, BaseModel)),
+            None,
+        )
+        if nested:
+            columns.extend(f"{name}.{child}" for child in nested.model_fields)
+        else:
+            columns.append(name)
+    return columns
+
+
+# Every CSV page has the same columns, whichever users it holds (fields outside UserCreate are only in jsonl)
+EXPORT_CSV_COLUMNS = ["id", *_flat_columns(UserCreate)]
+
+
+def _renderer(output_format: str, fields: Optional[list[str]]) -> UserRenderer:
+    if output_format != "csv":
+        return get_renderer(output_format)
+    if not fields:
+        return CsvRenderer(EXPORT_CSV_COLUMNS)
+    return CsvRenderer([column for column in EXPORT_CSV_COLUMNS if column.split(".")[0] in fields])
+
+
+class JsonArrayDecoder:
+    """Decodes the elements of a JSON array while its text arrives, only the unparsed tail is kept in memory"""
+
+    def __init__(self, max_item_chars: int = EXPORT_MAX_ITEM_CHARS) -> None:
+        self.max_item_chars = max_item_chars
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._started = False
+        self._after_item = False
+        self.finished = False
+
+    def feed(self, text: str) -> list[Any]:
+        buffer = self._buffer + text
+        items = []
+        position = 0
+        while True:
+            position = _WHITESPACE.match(buffer, position).end()
+            if position == len(buffer):
+                break
+            char = buffer[position]
+            if self.finished:
+                raise ValueError("Unexpected data after the end of the JSON array")
+            if not self._started:
+                if char != "[":
+                    raise ValueError("Expected a JSON array")
+                self._started = True
+                position += 1
+            elif char == "]":
+                self.finished = True
+                position += 1
+            elif self._after_item:
+                if char != ",":
+                    raise ValueError(f"Expected ',' or ']' in the JSON array, got {char!r}")
+                self._after_item = False
+                position += 1
+            else:
+                try:
+                    item, end = self._decoder.raw_decode(buffer, position)
+                except json.JSONDecodeError:
+                    # The element is not complete yet
+                    break
+                if (not isinstance(item, (dict, list, str))
+                        and _NUMBER_CHARS.match(buffer, end).end() == len(buffer)):
+                    # A number at the end of the text may continue in the next chunk ("1" of "12", "-0" of "-0.5")
+                    break
+                items.append(item)
+                position = end
+                self._after_item = True
+
+        self._buffer = buffer[position:]
+        if len(self._buffer) > self.max_item_chars:
+            raise ValueError(f"JSON array element longer than {self.max_item_chars} chars")
+        return items
+
+    def close(self):
+        if not self.finished:
+            raise ValueError("The JSON array ended before its closing bracket")
+
+
+def encode_export_cursor(stream: str, output_format: str, fields: Optional[list[str]], after_id: Any, exported: int):
+    payload = json.dumps({"s": stream, "f": output_format, "p": fields, "a": after_id, "n": exported},
+                         separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_export_cursor(cursor: str) -> tuple[str, str, Optional[list[str]], Any, int]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return payload["s"], payload["f"], payload["p"], payload["a"], int(payload["n"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError(f"Invalid export cursor: {cursor}")
+
+
+class _OpenStream:
+
+    def __init__(self, users: AsyncGenerator[dict[str, Any], None], after_id: Any) -> None:
+        self.users = users
+        self.after_id = after_id
+        self.used_at = time.monotonic()
+
+
+class UserExporter:
+    """
+    Pages through the whole user directory with bounded memory: users are decoded from the upstream stream as they
+    arrive and at most one page is rendered at a time. Between calls the upstream stream of an export stays open
+    (up to `max_open_streams`, closed after `idle_seconds`), so the next page continues where the last one stopped.
+    A cursor whose stream is gone resumes from a new stream after the last exported user id.
+    """
+
+    def __init__(
+            self,
+            open_stream: Callable[[], AsyncGenerator[dict[str, Any], None]],
+            max_open_streams: int = EXPORT_MAX_OPEN_STREAMS,
+            idle_seconds: float = EXPORT_STREAM_IDLE_SECONDS,
+    ) -> None:
+        self.open_stream = open_stream
+        self.max_open_streams = max_open_streams
+        self.idle_seconds = idle_seconds
+        self._streams: OrderedDict[str, _OpenStream] = OrderedDict()
+        self.pages = 0
+        self.resumed = 0
+        self.reopened = 0
+
+    async def _close(self, stream: _OpenStream):
+        await stream.users.aclose()
+
+    async def _park(self, key: str, stream: _OpenStream):
+        stream.used_at = time.monotonic()
+        self._streams[key] = stream
+        while len(self._streams) > self.max_open_streams:
+            await self._close(self._streams.popitem(last=False)[1])
+
+    async def _close_idle(self):
+        now = time.monotonic()
+        for key in [key for key, stream in self._streams.items() if now - stream.used_at > self.idle_seconds]:
+            await self._close(self._streams.pop(key))
+
+    async def _reopen(self, after_id: Any) -> _OpenStream:
+        """A new upstream stream positioned after the user with `after_id`"""
+        users = self.open_stream()
+        if after_id is not None:
+            self.reopened += 1
+            try:
+                async for user in users:
+                    if user.get("id") == after_id:
+                        break
+                else:
+                    raise ValueError(f"Cannot resume the export: user {after_id} no longer exists, start a new export")
+            except BaseException:
+                await users.aclose()
+                raise
+        return _OpenStream(users, after_id)
+
+    async def export_page(
+            self,
+            output_format: str = "jsonl",
+            cursor: Optional[str] = None,
+            limit: Optional[int] = None,
+            fields: Optional[list[str]] = None,
+            on_progress: Optional[Callable[[int], Awaitable[None]]] = None,
+    ) -> str:
+        """
+        Returns the next page of at most `limit` users. When users remain, the result ends with a cursor for the next
+        page. `cursor` takes precedence over `output_format` and `fields`.
+        """
+        if cursor:
+            key, output_format, fields, after_id, exported = decode_export_cursor(cursor)
+        else:
+            key, after_id, exported = secrets.token_urlsafe(8), None, 0
+        if output_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{output_format}', supported: {', '.join(EXPORT_FORMATS)}")
+        limit = max(1, min(limit or EXPORT_PAGE_USERS, EXPORT_MAX_PAGE_USERS))
+
+        await self._close_idle()
+        stream = self._streams.pop(key, None)
+        resumed = stream is not None and stream.after_id == after_id
+        if resumed:
+            self.resumed += 1
+        else:
+            if stream is not None:
+                await self._close(stream)
+            stream = await self._reopen(after_id)
+
+        renderer = _renderer(output_format, fields)
+        page: list[str] = []
+        count = 0
+        finished = False
+        try:
+            while count < limit:
+                try:
+                    user = await anext(stream.users)
+                except StopAsyncIteration:
+                    finished = True
+                    break
+                except Exception:
+                    if not (resumed and count == 0):
+                        raise
+                    # The upstream dropped the connection while the stream was parked
+                    resumed = False
+                    await self._close(stream)
+                    stream = await self._reopen(after_id)
+                    continue
+                stream.after_id = user.get("id")
+                if fields:
+                    user = {field: user[field] for field in fields if field in user}
+                if not page:
+                    page.append(renderer.header([user]))
+                page.append(renderer.record(user))
+                count += 1
+                if on_progress and count % EXPORT_PROGRESS_EVERY == 0:
+                    await on_progress(exported + count)
+        except BaseException:
+            await self._close(stream)
+            raise
+
+        self.pages += 1
+        result = [f"Exported users {exported + 1}-{exported + count} as {output_format}:\n"]
+        result.extend(page)
+        exported += count
+        if on_progress:
+            await on_progress(exported)
+        if finished:
+            await self._close(stream)
+            result.append(f"\nExport complete: {exported} users\n")
+        else:
+            await self._park(key, stream)
+            result.append(
+                f"\nMore users remain. To get them call `export_users` with "
+                f"cursor=\"{encode_export_cursor(key, output_format, fields, stream.after_id, exported)}\"\n"
+            )
+        return "".join(result)
+
+    async def close(self):
+        """Closes the parked upstream streams"""
+        while self._streams:
+            await self._close(self._streams.popitem()[1])
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "open_streams": len(self._streams),
+            "pages": self.pages,
+            "resumed_open_streams": self.resumed,
+            "reopened_after_cursor": self.reopened,
+        }
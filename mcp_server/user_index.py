@@ -0,0 +1,138 @@
+import os
+import time
+from collections import defaultdict
+from typing import Any, Optional
+
+USER_INDEX_ENABLED = os.getenv("USER_INDEX_ENABLED", "false").lower() == "true"
+USER_INDEX_REFRESH_SECONDS = float(os.getenv("USER_INDEX_REFRESH_SECONDS", "300"))
+
+TEXT_FIELDS = ("name", "surname", "email")
+
+
+def _trigrams(value: str) -> set[str]:
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+class _FieldIndex:
+    """
+    Trigram index over the distinct lowercase values of one field. A query is answered from the rarest trigram's
+    posting set and every candidate is verified with a plain substring check, so posting sets never need to be
+    intersected. A value leaves its posting sets with its last user.
+    """
+
+    def __init__(self) -> None:
+        self.values: dict[str, set[int]] = {}
+        self.trigrams: dict[str, set[str]] = defaultdict(set)
+
+    def add(self, value: str, user_id: int):
+        ids = self.values.get(value)
+        if ids is None:
+            ids = self.values[value] = set()
+            for trigram in _trigrams(value):
+                self.trigrams[trigram].add(value)
+        ids.add(user_id)
+
+    def remove(self, value: str, user_id: int):
+        ids = self.values.get(value)
+        if ids is not None:
+            ids.discard(user_id)
+            if not ids:
+                del self.values[value]
+                for trigram in _trigrams(value):
+                    postings = self.trigrams[trigram]
+                    postings.discard(value)
+                    if not postings:
+                        del self.trigrams[trigram]
+
+    def search(self, query: str) -> set[int]:
+        if len(query) < 3:
+            candidates = self.values.keys()
+        else:
+            postings = [self.trigrams.get(trigram) for trigram in _trigrams(query)]
+            if not all(postings):
+                return set()
+            candidates = min(postings, key=len)
+
+        result = set()
+        for value in candidates:
+            if query in value and (ids := self.values.get(value)):
+                result |= ids
+        return result
+
+
+class UserSearchIndex:
+    """In-memory replica of the user directory answering `search_user` queries with the user service semantics"""
+
+    def __init__(self, refresh_interval: float = USER_INDEX_REFRESH_SECONDS) -> None:
+        self.refresh_interval = refresh_interval
+        self.loaded_at: Optional[float] = None
+        self.users: dict[int, dict[str, Any]] = {}
+        self._fields = {field: _FieldIndex() for field in TEXT_FIELDS}
+        self._genders: dict[str, set[int]] = defaultdict(set)
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.loaded_at is not None
+
+    @property
+    def is_stale(self) -> bool:
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > self.refresh_interval
+
+    def invalidate(self):
+        """Forces a full reload on the next search"""
+        self.loaded_at = None
+
+    def load(self, users: list[dict[str, Any]]):
+        """Rebuilds the whole index from a full directory snapshot"""
+        self.users = {}
+        self._fields = {field: _FieldIndex() for field in TEXT_FIELDS}
+        self._genders = defaultdict(set)
+        for user in users:
+            self.upsert(user)
+        self.loaded_at = time.monotonic()
+
+    def upsert(self, user: dict[str, Any]):
+        user_id = user["id"]
+        self.remove(user_id)
+        self.users[user_id] = user
+        for field, index in self._fields.items():
+            index.add(str(user.get(field) or "").lower(), user_id)
+        self._genders[str(user.get("gender") or "").lower()].add(user_id)
+
+    def remove(self, user_id: int):
+        user = self.users.pop(user_id, None)
+        if user is None:
+            return
+        for field, index in self._fields.items():
+            index.remove(str(user.get(field) or "").lower(), user_id)
+        self._genders[str(user.get("gender") or "").lower()].discard(user_id)
+
+    def search(
+            self,
+            name: Optional[str] = None,
+            surname: Optional[str] = None,
+            email: Optional[str] = None,
+            gender: Optional[str] = None,
+    ) -> list[dict[str, Any]]:
+        matches: list[set[int]] = []
+        for field, query in (("name", name), ("surname", surname), ("email", email)):
+            if query:
+                matches.append(self._fields[field].search(query.lower()))
+        if gender:
+            matches.append(self._genders.get(gender.lower(), set()))
+
+        if not matches:
+            ids = self.users.keys()
+        else:
+            matches.sort(key=len)
+            ids = matches[0].intersection(*matches[1:])
+
+        return [self.users[user_id] for user_id in sorted(ids)]
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "users": len(self.users),
+            "age_seconds": round(time.monotonic() - self.loaded_at, 1) if self.loaded_at else None,
+            "refresh_interval_seconds": self.refresh_interval,
+            "distinct_values": {field: len(index.values) for field, index in self._fields.items()},
+        }
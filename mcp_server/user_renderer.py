@@ -0,0 +1,104 @@
+import csv
+import io
+import json
+import os
+from typing import Any, Iterable, Optional
+
+USER_OUTPUT_FORMAT = os.getenv("USER_OUTPUT_FORMAT", "markdown")
+
+
+class UserRenderer:
+    """Renders user records as text. `header` is emitted once per result, `record` once per user"""
+
+    def header(self, users: list[dict[str, Any]]) -> str:
+        return ""
+
+    def record(self, user: dict[str, Any]) -> str:
+        raise NotImplementedError()
+
+    def render(self, users: list[dict[str, Any]]) -> str:
+        return self.header(users) + "".join(map(self.record, users))
+
+
+class MarkdownRenderer(UserRenderer):
+    """One code block per user with `key: value` lines (original output format)"""
+
+    def record(self, user: dict[str, Any]) -> str:
+        return "```\n" + "".join([f"  {key}: {value}\n" for key, value in user.items()]) + "```\n"
+
+
+class JsonLinesRenderer(UserRenderer):
+    """One compact JSON object per line"""
+
+    # json.dumps with non-default options builds a new encoder per call
+    _encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+    def record(self, user: dict[str, Any]) -> str:
+        return self._encoder.encode(user) + "\n"
+
+
+class CsvRenderer(UserRenderer):
+    """
+    Header row with the column names once, then one row per user. Nested objects become `parent.child` columns.
+    `columns` fixes the column set, otherwise `header` takes it from the users it is given.
+    """
+
+    def __init__(self, columns: Optional[list[str]] = None) -> None:
+        self.fixed_columns = columns
+        self.columns: list[str] = list(columns or [])
+
+    @staticmethod
+    def _flatten(user: dict[str, Any]) -> dict[str, Any]:
+        flat = {}
+        for key, value in user.items():
+            if isinstance(value, dict):
+                for nested_key, nested_value in value.items():
+                    flat[f"{key}.{nested_key}"] = nested_value
+            else:
+                flat[key] = value
+        return flat
+
+    @staticmethod
+    def _row(values: Iterable[Any]) -> str:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerow(values)
+        return buffer.getvalue()
+
+    def header(self, users: list[dict[str, Any]]) -> str:
+        if self.fixed_columns is None:
+            columns = {}
+            for user in users:
+                columns.update(dict.fromkeys(self._flatten(user)))
+            self.columns = list(columns)
+        return self._row(self.columns)
+
+    def record(self, user: dict[str, Any]) -> str:
+        flat = self._flatten(user)
+        return self._row(flat.get(column, "") for column in self.columns)
+
+    def render(self, users: list[dict[str, Any]]) -> str:
+        rows = [self._flatten(user) for user in users]
+        columns = {}
+        for row in rows:
+            columns.update(dict.fromkeys(row))
+        self.columns = list(columns)
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(self.columns)
+        writer.writerows([row.get(column, "") for column in self.columns] for row in rows)
+        return buffer.getvalue()
+
+
+RENDERERS: dict[str, type[UserRenderer]] = {
+    "markdown": MarkdownRenderer,
+    "jsonl": JsonLinesRenderer,
+    "csv": CsvRenderer,
+}
+
+
+def get_renderer(output_format: str | None = None) -> UserRenderer:
+    output_format = (output_format or USER_OUTPUT_FORMAT).lower()
+    if output_format not in RENDERERS:
+        raise ValueError(f"Unknown output format '{output_format}', supported: {', '.join(RENDERERS)}")
+    return RENDERERS[output_format]()